@@ -1,22 +1,259 @@
 // JS for bootstrap Modal:
 const deleteModal = new bootstrap.Modal(document.getElementById("deleteModal"));
-// Delete buttons
-const deleteButtons = document.getElementsByClassName("delete-btn");
 const deleteConfirm = document.getElementById("delete-confirm");
 
 /**
- * Initializes deletion functionality for the provided delete buttons.
+ * Sends a form-encoded POST request with the page's CSRF token.
  *
- * For each button in the `deleteButtons` collection:
- * - Retrieves the associated booking ID upon click.
- * - Updates the `deleteConfirm` link's href to point to the deletion endpoint for the specific booking.
+ * @param {string} url - The endpoint to post to.
+ * @param {Object} [data] - The form fields to send.
+ * @returns {Promise<Object>} The JSON response.
+ */
+async function postJson(url, data = {}) {
+  const response = await fetch(url, {
+    method: "POST",
+    credentials: "same-origin",
+    headers: {
+      "X-CSRFToken": document.querySelector("[name=csrfmiddlewaretoken]").value,
+    },
+    body: new URLSearchParams(data),
+  });
+  const json = await response.json();
+  if (!response.ok) {
+    throw new Error(Object.values(json.errors).flat().join(" "));
+  }
+  return json;
+}
+
+/**
+ * Updates the status counter cards of the dashboard, if shown.
+ *
+ * @param {Object} counts - The number of tasks in each status.
+ */
+function updateCounts(counts) {
+  for (const [status, count] of Object.entries(counts)) {
+    const counter = document.querySelector(`[data-count="${status}"]`);
+    if (counter) {
+      counter.textContent = `${count} tasks`;
+    }
+  }
+}
+
+/**
+ * Initializes deletion functionality for the delete buttons.
+ *
+ * Clicks are handled on the document so that rows loaded later with
+ * "Load more" are covered too. For each clicked delete button:
+ * - Retrieves the associated task and user IDs.
+ * - Updates the `deleteConfirm` link's href to point to the deletion endpoint for the specific task.
  * - Displays a confirmation modal (`deleteModal`) to prompt the user for confirmation before deletion.
  */
-for (let button of deleteButtons) {
-  button.addEventListener("click", (e) => {
-    let taskId = e.target.getAttribute("data-task-id");
-    let userId = e.target.getAttribute("data-user-id");
-    deleteConfirm.href = `/task-delete/${userId}/${taskId}/`;
-    deleteModal.show();
+document.addEventListener("click", (e) => {
+  const button = e.target.closest(".delete-btn");
+  if (!button) {
+    return;
+  }
+  let taskId = button.getAttribute("data-task-id");
+  let userId = button.getAttribute("data-user-id");
+  deleteConfirm.href = `/task-delete/${userId}/${taskId}/`;
+  deleteConfirm.setAttribute("data-url", button.getAttribute("data-url"));
+  deleteModal.show();
+});
+
+/**
+ * Deletes the task once confirmed, without leaving the page.
+ *
+ * The rows of the task and of its deleted subtasks are removed and the
+ * counters updated; if the request fails, the link is followed instead.
+ */
+deleteConfirm.addEventListener("click", async (e) => {
+  e.preventDefault();
+  try {
+    const result = await postJson(deleteConfirm.getAttribute("data-url"));
+    for (const taskId of result.deleted) {
+      document.querySelectorAll(`tr[data-task-id="${taskId}"]`).forEach((row) => row.remove());
+    }
+    updateCounts(result.counts);
+    deleteModal.hide();
+  } catch (error) {
+    console.error(error);
+    window.location.href = deleteConfirm.href;
+  }
+});
+
+/**
+ * Moves a task to the status picked in its row.
+ *
+ * The row is replaced by the re-rendered one and the counters updated.
+ * A refused transition restores the previous status and reports why.
+ */
+document.addEventListener("change", async (e) => {
+  const select = e.target.closest(".status-select");
+  if (!select) {
+    return;
+  }
+  select.disabled = true;
+  try {
+    const result = await postJson(select.getAttribute("data-url"), {
+      status: select.value,
+    });
+    select.closest("tr").outerHTML = result.row;
+    updateCounts(result.counts);
+  } catch (error) {
+    select.value = select.options[0].value;
+    select.disabled = false;
+    alert(error.message);
+  }
+});
+
+/**
+ * Fetches a page of task rows from the dashboard section endpoint.
+ *
+ * @param {string} url - The section page URL, including its cursor.
+ * @returns {Promise<string>} The table rows as HTML.
+ */
+async function fetchTaskRows(url) {
+  const response = await fetch(url, { credentials: "same-origin" });
+  if (!response.ok) {
+    throw new Error(`Could not load tasks (${response.status}).`);
+  }
+  return response.text();
+}
+
+/**
+ * Loads the next page of a section when a "Load more" button is clicked.
+ *
+ * The rows are appended to the button's table and the button's row is
+ * replaced by the next page's button, if there is one.
+ */
+document.addEventListener("click", async (e) => {
+  const button = e.target.closest(".load-more-btn");
+  if (!button) {
+    return;
+  }
+  button.disabled = true;
+  const row = button.closest("tr");
+  try {
+    const html = await fetchTaskRows(button.getAttribute("data-url"));
+    row.insertAdjacentHTML("beforebegin", html);
+    row.remove();
+  } catch (error) {
+    button.disabled = false;
+    console.error(error);
+  }
+});
+
+/**
+ * Expands the completed tasks section, loading its first page on demand.
+ */
+const showCompletedButton = document.querySelector(".show-completed-btn");
+if (showCompletedButton) {
+  showCompletedButton.addEventListener("click", async () => {
+    showCompletedButton.disabled = true;
+    const table = document.getElementById("completed-table");
+    try {
+      const html = await fetchTaskRows(showCompletedButton.getAttribute("data-url"));
+      table.querySelector("tbody").innerHTML = html;
+      table.classList.remove("d-none");
+      showCompletedButton.remove();
+    } catch (error) {
+      showCompletedButton.disabled = false;
+      console.error(error);
+    }
+  });
+}
+
+/**
+ * Applies the dashboard filters without reloading the page.
+ *
+ * Submitting the filter form, or changing one of its fields, fetches
+ * only the upcoming tasks table for the new filters and swaps it in;
+ * the counters and the other sections are left as they are. The page
+ * URL follows the filters, so reloading or sharing it keeps them.
+ */
+const filterForm = document.querySelector(".dashboard-filters");
+
+/**
+ * Swaps in the upcoming tasks table for the given filters.
+ *
+ * @param {string} params - The filters, as a query string.
+ * @param {boolean} updateHistory - Whether to add the filters to the history.
+ */
+async function applyFilters(params, updateHistory) {
+  const table = document.getElementById("upcoming-table");
+  table.setAttribute("aria-busy", "true");
+  try {
+    const html = await fetchTaskRows(`${filterForm.getAttribute("data-url")}?${params}`);
+    table.outerHTML = html;
+    document.getElementById("upcoming-heading").textContent =
+      document.getElementById("upcoming-table").getAttribute("data-heading");
+    if (updateHistory) {
+      history.pushState(null, "", `?${params}`);
+    }
+  } catch (error) {
+    // Fall back to reloading the whole dashboard
+    console.error(error);
+    window.location.search = params;
+  }
+}
+
+if (filterForm) {
+  filterForm.addEventListener("submit", (e) => {
+    e.preventDefault();
+    applyFilters(new URLSearchParams(new FormData(filterForm)).toString(), true);
+  });
+  filterForm.addEventListener("change", () => filterForm.requestSubmit());
+
+  // Back and forward restore the filters of that history entry
+  window.addEventListener("popstate", () => {
+    const params = new URLSearchParams(window.location.search);
+    for (const select of filterForm.querySelectorAll("select")) {
+      select.value = params.get(select.name) || select.options[0].value;
+    }
+    applyFilters(params.toString(), false);
+  });
+}
+
+/**
+ * Reloads the first page of the overdue tasks, showing the table only
+ * when there are some.
+ */
+async function refreshOverdue() {
+  const table = document.getElementById("overdue-table");
+  const html = await fetchTaskRows(table.getAttribute("data-url"));
+  table.querySelector("tbody").innerHTML = html;
+  const isEmpty = !table.querySelector("tbody tr");
+  table.classList.toggle("d-none", isEmpty);
+  document.getElementById("no-overdue-tasks").classList.toggle("d-none", !isEmpty);
+}
+
+/**
+ * Follows the changes made to the user's tasks in other tabs and
+ * devices, instead of polling the dashboard.
+ *
+ * Deleted tasks are removed right away; for other changes the overdue
+ * and upcoming tables are fetched again, once per burst of events. The
+ * counters are pushed along with the events. The browser reconnects
+ * on its own whenever the stream ends.
+ */
+const taskEvents = document.getElementById("task-events");
+if (taskEvents && window.EventSource) {
+  const source = new EventSource(taskEvents.getAttribute("data-url"));
+  let refreshTimer = null;
+
+  source.addEventListener("task", (e) => {
+    const event = JSON.parse(e.data);
+    if (event.type === "deleted" && event.ids) {
+      for (const taskId of event.ids) {
+        document.querySelectorAll(`tr[data-task-id="${taskId}"]`).forEach((row) => row.remove());
+      }
+      return;
+    }
+    clearTimeout(refreshTimer);
+    refreshTimer = setTimeout(() => {
+      refreshOverdue().catch((error) => console.error(error));
+      applyFilters(window.location.search.slice(1), false);
+    }, 500);
   });
-}
\ No newline at end of file
+  source.addEventListener("counts", (e) => updateCounts(JSON.parse(e.data)));
+}
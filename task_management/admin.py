@@ -1,8 +1,102 @@
-from django.contrib import admin
-from .models import Task
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin import helpers
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.template.response import TemplateResponse
+from django.utils.functional import cached_property
+from .bulk import bulk_change_tasks
+from .forms import BulkTaskChangeForm
+from .models import Task, TaskRecurrence
+from .recurrence import parse_rrule
+from .search import search_tasks
 
 # Register your models here.
 
+# Below this many rows the exact count is cheap enough to run
+ESTIMATED_COUNT_THRESHOLD = 100000
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator using PostgreSQL's row estimate for the whole table
+    instead of a `COUNT(*)` scan, once the table is large enough.
+
+    Filtered and searched lists, and other databases, still get an
+    exact count.
+    """
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor == 'postgresql' and not queryset.query.where:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class "
+                    "WHERE oid = %s::regclass",
+                    [queryset.model._meta.db_table])
+                row = cursor.fetchone()
+            # reltuples is -1 (or 0) until the table is analyzed
+            if row and row[0] >= ESTIMATED_COUNT_THRESHOLD:
+                return row[0]
+        return super().count
+
+
+class UserAutocompleteFilter(admin.SimpleListFilter):
+    """
+    Filter the tasks by user through an autocomplete box, searching the
+    accounts as the admin types instead of listing every one of them.
+    """
+    title = 'user'
+    parameter_name = 'user'
+    template = 'admin/task_management/autocomplete_filter.html'
+
+    def __init__(self, request, params, model, model_admin):
+        super().__init__(request, params, model, model_admin)
+        user_field = model._meta.get_field('user')
+        self.widget = user_field.formfield(
+            required=False,
+            widget=AutocompleteSelect(
+                user_field, model_admin.admin_site,
+                attrs={'data-width': '100%',
+                       'onchange': 'this.form.submit()'}),
+        ).widget
+
+    def lookups(self, request, model_admin):
+        return ()
+
+    def has_output(self):
+        return True
+
+    def user_id(self):
+        """
+        Return the id of the selected user, or None when there is none
+        or the value isn't an id (it is then ignored).
+        """
+        try:
+            return int(self.value())
+        except (TypeError, ValueError):
+            return None
+
+    def queryset(self, request, queryset):
+        user_id = self.user_id()
+        if user_id is not None:
+            return queryset.filter(user_id=user_id)
+        return queryset
+
+    def choices(self, changelist):
+        # The other filters, search and ordering are kept as hidden
+        # inputs of the filter form
+        yield {
+            'params': [
+                (name, value) for name, value in changelist.params.items()
+                if name != self.parameter_name
+            ],
+            'widget': self.widget.render(self.parameter_name, self.user_id()),
+        }
+
 
 @admin.register(Task)
 class TaskAdmin(admin.ModelAdmin):
@@ -24,11 +118,132 @@ class TaskAdmin(admin.ModelAdmin):
         'status',
         'category',
         'due_date',
-        'user'
+        UserAutocompleteFilter
     )
 
+    # Load the users of the listed tasks in the same query
+    list_select_related = ('user',)
+
+    # Pick the user by searching rather than from a list of every account
+    autocomplete_fields = ('user',)
+
+    # Pick the parent of a subtask by id rather than from every task
+    raw_id_fields = ('parent',)
+
+    date_hierarchy = 'due_date'
+
+    # Only count the filtered rows, and estimate the size of the whole
+    # table, instead of running COUNT(*) over it on every page
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+
+    actions = ['change_tasks']
+
     # Fields to search for
     search_fields = ('title', 'description', 'user__username')
 
     # Default ordering
     ordering = ('-created_at', 'due_date')
+
+    @property
+    def media(self):
+        # Scripts and styles of the user filter's autocomplete box
+        return super().media + AutocompleteSelect(
+            Task._meta.get_field('user'), self.admin_site).media
+
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Search titles and descriptions through the full-text index
+        instead of scanning the table, and usernames exactly.
+        """
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+
+        matches = search_tasks(Task.objects.all(), search_term)
+        return queryset.filter(
+            Q(pk__in=matches.values('pk'))
+            | Q(user__username=search_term)
+        ), False
+
+    @admin.action(
+        description="Change status, priority, category or due date",
+        permissions=['change'],
+    )
+    def change_tasks(self, request, queryset):
+        """
+        Change the selected tasks with a single `UPDATE`, after asking
+        for the new values on an intermediate page.
+        """
+        form = BulkTaskChangeForm(
+            request.POST if 'apply' in request.POST else None)
+        if form.is_valid():
+            result = bulk_change_tasks(queryset, form.cleaned_data)
+            self.message_user(
+                request, "Changed %d task(s)." % result['updated'],
+                messages.SUCCESS)
+            for status, count, reason in result['rejected']:
+                self.message_user(
+                    request, "Left %d '%s' task(s) unchanged: %s" % (
+                        count, status, reason),
+                    messages.WARNING)
+            return None
+
+        # The form posts the selection back to the changelist, which
+        # rebuilds the queryset (the filtered list with "select all")
+        context = {
+            **self.admin_site.each_context(request),
+            'title': "Change tasks",
+            'opts': self.model._meta,
+            'form': form,
+            'task_count': queryset.count(),
+            'select_across': request.POST.get('select_across') == '1',
+            'selected': request.POST.getlist(helpers.ACTION_CHECKBOX_NAME),
+            'action_checkbox_name': helpers.ACTION_CHECKBOX_NAME,
+        }
+        return TemplateResponse(
+            request, 'admin/task_management/task/change_tasks.html', context)
+
+
+class TaskRecurrenceAdminForm(forms.ModelForm):
+    """
+    Edit a series' recurrence as an RRULE rather than field by field.
+    """
+    rule = forms.CharField(
+        help_text="e.g. FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,TH;COUNT=10")
+
+    class Meta:
+        model = TaskRecurrence
+        fields = ['user', 'title', 'description', 'priority', 'category',
+                  'active']
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.pk:
+            self.fields['rule'].initial = self.instance.rule
+
+    def clean_rule(self):
+        rule = parse_rrule(self.cleaned_data['rule'])
+        for field, value in rule.items():
+            setattr(self.instance, field, value)
+        return rule
+
+
+@admin.register(TaskRecurrence)
+class TaskRecurrenceAdmin(admin.ModelAdmin):
+    """
+    Series are created from the add task form, where the first
+    occurrence is the new task; they can be reviewed, edited, ended or
+    deleted here. Changes apply to the occurrences not generated yet.
+    """
+    form = TaskRecurrenceAdminForm
+    list_display = ('title', 'user', 'rule', 'start_date', 'last_date',
+                    'active')
+    list_filter = ('active', 'frequency')
+    list_select_related = ('user',)
+    search_fields = ('title', 'user__username')
+    autocomplete_fields = ('user',)
+    readonly_fields = ('start_date', 'last_date', 'generated_count')
+
+    def has_add_permission(self, request):
+        return False
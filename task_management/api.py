@@ -0,0 +1,344 @@
+import json
+from functools import wraps
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.http import HttpResponse, JsonResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.views.decorators.http import require_http_methods
+
+from .cache import invalidate_dashboard_cache_on_commit
+from .conditional import conditional_task_page
+from .events import publish_task_event
+from .dashboard import decode_cursor, encode_cursor
+from .forms import TaskForm
+from .models import Task, TaskStats
+from .recurrence import OCCURRENCE_DATE_TAKEN_MESSAGE
+from .signals import deleting_tasks
+from .stats import created_changes
+
+
+# Fields clients can read and write
+TASK_FIELDS = TaskForm.Meta.fields
+
+# Default and maximum number of tasks returned by the list endpoint
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+
+def api_login_required(view):
+    """
+    Like `login_required`, but answers anonymous requests with a JSON
+    401 instead of redirecting to the login page.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return error_response("Authentication required.", status=401)
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+def error_response(errors, status=400):
+    """
+    Return a JSON error response.
+    """
+    return JsonResponse({'errors': errors}, status=status)
+
+
+def serialize_task(task):
+    """
+    Convert a task into a JSON-serializable dict.
+    """
+    data = {'id': task.pk}
+    for field in TASK_FIELDS:
+        data[field] = getattr(task, field)
+    data['due_date'] = task.due_date.isoformat()
+    data['created_at'] = task.created_at.isoformat()
+    data['updated_at'] = task.updated_at.isoformat()
+    return data
+
+
+def parse_json(request):
+    """
+    Decode the JSON request body. Raises `ValueError` if it isn't valid
+    JSON.
+    """
+    return json.loads(request.body or b'null')
+
+
+def validate_task(data, instance=None):
+    """
+    Validate task data through `TaskForm`, so the API applies exactly
+    the same rules as the HTML forms.
+
+    For an existing task, fields missing from `data` keep their current
+    value. Returns the validated (unsaved) task and the form errors.
+    """
+    if instance is not None:
+        current = {field: getattr(instance, field) for field in TASK_FIELDS}
+        data = dict(current, **data)
+
+    task_form = TaskForm(data=data, instance=instance)
+    if not task_form.is_valid():
+        return None, task_form.errors.get_json_data()
+    return task_form.instance, None
+
+
+def get_user_task(request, task_id):
+    """
+    Return the logged-in user's task with the given id, or `None`.
+    """
+    return Task.objects.filter(pk=task_id, user=request.user).first()
+
+
+@api_login_required
+@require_http_methods(['GET', 'POST'])
+@conditional_task_page
+def task_list(request):
+    """
+    API endpoint listing the user's tasks, or creating a task.
+
+    **GET:**
+    - Filter with `status`, `priority` and `category`.
+    - Paginated on `(due_date, id)`: pass the `next` URL's `after`
+    cursor to get the following page. `limit` sets the page size.
+
+    **POST:**
+    - Create a task from a JSON object.
+    """
+    if request.method == 'POST':
+        try:
+            data = parse_json(request)
+        except ValueError:
+            return error_response("Invalid JSON.")
+        if not isinstance(data, dict):
+            return error_response("Expected a JSON object.")
+
+        task, errors = validate_task(data)
+        if errors:
+            return error_response(errors)
+        task.user = request.user
+        task.save()
+        return JsonResponse(serialize_task(task), status=201)
+
+    tasks = Task.objects.filter(user=request.user).order_by('due_date', 'pk')
+    for field in ('status', 'priority', 'category'):
+        if request.GET.get(field):
+            tasks = tasks.filter(**{field: request.GET[field]})
+
+    try:
+        limit = min(int(request.GET.get('limit', DEFAULT_LIMIT)), MAX_LIMIT)
+        if request.GET.get('after'):
+            due_date, pk = decode_cursor(request.GET['after'])
+            tasks = tasks.filter(
+                Q(due_date__gt=due_date) | Q(due_date=due_date, pk__gt=pk))
+    except ValueError:
+        return error_response("Invalid limit or cursor.")
+    if limit < 1:
+        return error_response("Invalid limit or cursor.")
+
+    rows = list(tasks[:limit + 1])
+    next_url = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        params = request.GET.copy()
+        params['after'] = encode_cursor(rows[-1])
+        next_url = '%s?%s' % (reverse('api_task_list'), params.urlencode())
+
+    return JsonResponse({
+        'results': [serialize_task(task) for task in rows],
+        'next': next_url,
+    })
+
+
+@api_login_required
+@require_http_methods(['GET', 'PATCH', 'DELETE'])
+@conditional_task_page
+def task_detail(request, task_id):
+    """
+    API endpoint to retrieve, partially update or delete one of the
+    user's tasks.
+    """
+    task = get_user_task(request, task_id)
+    if task is None:
+        return error_response("Task not found.", status=404)
+
+    if request.method == 'DELETE':
+        task.delete()
+        return HttpResponse(status=204)
+
+    if request.method == 'PATCH':
+        try:
+            data = parse_json(request)
+        except ValueError:
+            return error_response("Invalid JSON.")
+        if not isinstance(data, dict):
+            return error_response("Expected a JSON object.")
+
+        task, errors = validate_task(data, instance=task)
+        if errors:
+            return error_response(errors)
+        task.save()
+
+    return JsonResponse(serialize_task(task))
+
+
+@api_login_required
+@require_http_methods(['POST', 'PATCH', 'DELETE'])
+def task_bulk(request):
+    """
+    API endpoint to create, update or delete many tasks in one
+    transaction.
+
+    - **POST** `{"tasks": [{...}, ...]}` creates tasks.
+    - **PATCH** `{"tasks": [{"id": 1, ...}, ...]}` partially updates tasks.
+    - **DELETE** `{"ids": [1, 2, ...]}` deletes tasks.
+
+    Every task is validated like a `TaskForm` submission. Nothing is
+    written unless all of them are valid; errors are reported by
+    position in the request.
+    """
+    try:
+        data = parse_json(request)
+    except ValueError:
+        return error_response("Invalid JSON.")
+
+    key = 'ids' if request.method == 'DELETE' else 'tasks'
+    items = data.get(key) if isinstance(data, dict) else None
+    if not isinstance(items, list):
+        return error_response("Expected a JSON object with a '%s' list." % key)
+    if len(items) > settings.TASK_API_MAX_BULK_SIZE:
+        return error_response(
+            "At most %d tasks can be sent at once."
+            % settings.TASK_API_MAX_BULK_SIZE)
+
+    if request.method == 'DELETE':
+        return bulk_delete(request, items)
+    if request.method == 'PATCH':
+        return bulk_update(request, items)
+    return bulk_create(request, items)
+
+
+def bulk_create(request, items):
+    """
+    Validate and insert new tasks with `bulk_create`.
+    """
+    tasks = []
+    errors = {}
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            errors[index] = "Expected a JSON object."
+            continue
+        task, item_errors = validate_task(item)
+        if item_errors:
+            errors[index] = item_errors
+            continue
+        task.user = request.user
+        tasks.append(task)
+
+    if errors:
+        return error_response(errors)
+
+    with transaction.atomic():
+        created = Task.objects.bulk_create(
+            tasks, batch_size=settings.TASK_BULK_BATCH_SIZE)
+        TaskStats.record(created_changes(created))
+        invalidate_dashboard_cache_on_commit(request.user.id)
+        publish_task_event(
+            request.user.id, 'created', [task.pk for task in created])
+
+    return JsonResponse(
+        {'results': [serialize_task(task) for task in created]},
+        status=201,
+    )
+
+
+def bulk_update(request, items):
+    """
+    Validate and save changes to existing tasks with `bulk_update`.
+    """
+    ids = [item.get('id') for item in items if isinstance(item, dict)]
+    ids = [pk for pk in ids if isinstance(pk, int)]
+    existing = Task.objects.filter(user=request.user).in_bulk(ids)
+
+    tasks = []
+    fields = set()
+    errors = {}
+    # (series, due date) of the occurrences saved so far, which are
+    # unique; `TaskForm` only checks them against the database
+    occurrences = set()
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            errors[index] = "Expected a JSON object."
+            continue
+        pk = item.get('id')
+        instance = existing.get(pk) if isinstance(pk, int) else None
+        if instance is None:
+            errors[index] = "Task not found."
+            continue
+        changes = {
+            field: value for field, value in item.items() if field != 'id'
+        }
+        task, item_errors = validate_task(changes, instance=instance)
+        if item_errors:
+            errors[index] = item_errors
+            continue
+        if task.recurrence_id:
+            occurrence = (task.recurrence_id, task.due_date)
+            if occurrence in occurrences:
+                errors[index] = {'due_date': [
+                    {'message': OCCURRENCE_DATE_TAKEN_MESSAGE,
+                     'code': 'unique'}]}
+                continue
+            occurrences.add(occurrence)
+        tasks.append(task)
+        fields.update(field for field in changes if field in TASK_FIELDS)
+
+    if errors:
+        return error_response(errors)
+
+    # `bulk_update` bypasses `save()`, so maintain `updated_at` here
+    now = timezone.now()
+    for task in tasks:
+        task.updated_at = now
+
+    with transaction.atomic():
+        Task.objects.bulk_update(
+            tasks,
+            sorted(fields) + ['updated_at'],
+            batch_size=settings.TASK_BULK_BATCH_SIZE,
+        )
+        # Recount the subtasks of the parents whose children changed
+        # status, as `bulk_update` doesn't go through `save()`
+        if 'status' in fields:
+            Task.refresh_subtask_counts({
+                task.parent_id for task in tasks
+                if task.parent_id and task.status != task.original_status
+            })
+        TaskStats.record([
+            (task.user_id, task.original_status, task.status,
+             task.due_date, 1)
+            for task in tasks
+        ])
+        invalidate_dashboard_cache_on_commit(request.user.id)
+        publish_task_event(
+            request.user.id, 'updated', [task.pk for task in tasks])
+
+    return JsonResponse(
+        {'results': [serialize_task(task) for task in tasks]})
+
+
+def bulk_delete(request, ids):
+    """
+    Delete the user's tasks with the given ids.
+    """
+    ids = [pk for pk in ids if isinstance(pk, int)]
+
+    with transaction.atomic(), deleting_tasks():
+        deleted, _ = Task.objects.filter(
+            user=request.user, pk__in=ids).delete()
+
+    return JsonResponse({'deleted': deleted})
@@ -1,6 +1,17 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class TaskManagementConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'task_management'
+
+    def ready(self):
+        # Connect the model signal handlers
+        from . import signals  # noqa: F401
+        # Register the system checks
+        from . import checks  # noqa: F401
+        from .search import install_search_index
+
+        # The full-text index is managed outside of the migrations
+        post_migrate.connect(install_search_index, sender=self)
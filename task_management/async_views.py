@@ -0,0 +1,132 @@
+import asyncio
+import json
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.views import redirect_to_login
+from django.db import connection
+from django.http import HttpResponseForbidden, StreamingHttpResponse
+from django.utils import timezone
+
+from .dashboard import aget_task_counts
+from .events import get_broker
+
+# The task event streams, only served by the ASGI app (TASK_ASYNC_VIEWS),
+# where an open stream waits on the event loop instead of holding a
+# worker thread. Every other page is served by the sync views, which
+# the ASGI app runs in its thread pool like the WSGI app would.
+#
+# The middleware stack is sync-only (WhiteNoise, allauth and the request
+# metrics), so opening a stream still takes a thread until its response
+# is returned; the events are then sent from an async iterator, without
+# one.
+
+# Seconds between the comments keeping an idle event stream open
+EVENTS_KEEPALIVE_INTERVAL = 15
+
+
+def async_login_required(view):
+    """
+    Async equivalent of `login_required(login_url='/accounts/login/')`,
+    which only supports sync views in this Django version.
+    """
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        # Resolving the lazy user loads the session and the user from
+        # the database, so it must run outside of the event loop
+        is_authenticated = await sync_to_async(
+            lambda: request.user.is_authenticated)()
+        if not is_authenticated:
+            return redirect_to_login(
+                request.get_full_path(), '/accounts/login/')
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+def format_event(name, data):
+    """
+    Format a server-sent event named `name` carrying `data` as JSON.
+    """
+    return 'event: %s\ndata: %s\n\n' % (name, json.dumps(data))
+
+
+def close_connection():
+    """
+    Close the database connection of the current thread, so that open
+    event streams don't each hold one between reads. It is left open
+    within a transaction (e.g. in tests).
+    """
+    if not connection.in_atomic_block:
+        connection.close()
+
+
+async def aget_stream_counts(user):
+    """
+    Return the user's task counters for an event stream.
+    """
+    counts = await aget_task_counts(user, timezone.now().date())
+    await sync_to_async(close_connection)()
+    return counts
+
+
+async def stream_task_events(user):
+    """
+    Yield the user's task events as server-sent events until the stream
+    times out: the broker's events, each batch followed by the updated
+    counters, and keepalive comments while idle.
+    """
+    loop = asyncio.get_running_loop()
+    closes_at = loop.time() + settings.TASK_EVENTS_STREAM_TIMEOUT
+
+    async with get_broker().subscribe(user.id) as queue:
+        # Resynchronise the counters on every (re)connection
+        yield format_event('counts', await aget_stream_counts(user))
+
+        while True:
+            timeout = min(EVENTS_KEEPALIVE_INTERVAL, closes_at - loop.time())
+            if timeout <= 0:
+                return
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout)
+            except asyncio.TimeoutError:
+                yield ': keepalive\n\n'
+                continue
+
+            # Events published together (e.g. by the overdue sweep) share
+            # one read of the counters
+            events = [event]
+            while not queue.empty():
+                events.append(queue.get_nowait())
+            for event in events:
+                yield format_event('task', event)
+            yield format_event('counts', await aget_stream_counts(user))
+
+
+@async_login_required
+async def task_events(request, user_id):
+    """
+    Async view streaming the changes of the user's tasks to their open
+    dashboards, as server-sent events.
+
+    **Context:**
+    - Ensures that the logged-in user matches the user_id.
+    - Sends a `task` event whenever tasks are created, updated, deleted
+    or marked overdue (see :mod:`task_management.events`), then the
+    user's `counts`, so dashboards update without polling.
+    - Only served by the ASGI app: the stream ends after
+    TASK_EVENTS_STREAM_TIMEOUT seconds and the browser reconnects.
+
+    **Template:**
+    - None, responds with a `text/event-stream`.
+    """
+    # Ensure the logged-in user matches the user_id in the URL
+    if request.user.id != int(user_id):
+        return HttpResponseForbidden()
+
+    return StreamingHttpResponse(
+        stream_task_events(request.user),
+        content_type='text/event-stream',
+        # Don't let proxies buffer the events
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
@@ -0,0 +1,321 @@
+import math
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import timedelta
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.core.wsgi import get_wsgi_application
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.crypto import get_random_string
+
+from .cache import invalidate_dashboard_cache
+from .models import Task, TaskStats
+from .stats import created_changes
+from .transitions import PENDING_STATUSES
+
+# Helpers shared by the benchmark management commands. They drive the
+# real views against the configured database, either in-process with
+# the test client or over HTTP through a local threaded server.
+
+SESSION_TABLE = Session._meta.db_table
+
+# Hosts of the test client and of `live_server()`
+BENCHMARK_HOSTS = ['testserver', '127.0.0.1']
+
+BENCHMARK_VIEWS = ['task_dashboard', 'task_add', 'task_edit', 'task_delete']
+
+
+def percentile(values, pct):
+    """
+    Return the `pct` percentile of `values` (nearest-rank method).
+    """
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def summarize_timings(seconds):
+    """
+    Summarize request durations (in seconds) as milliseconds.
+    """
+    return {
+        'mean_ms': sum(seconds) / len(seconds) * 1000 if seconds else 0.0,
+        'p50_ms': percentile(seconds, 50) * 1000,
+        'p95_ms': percentile(seconds, 95) * 1000,
+        'p99_ms': percentile(seconds, 99) * 1000,
+    }
+
+
+def seed_tasks(user, count, today=None):
+    """
+    Give `user` `count` tasks spread over every status, priority and
+    category, due from two weeks ago to a month ahead. Past-due pending
+    tasks are marked 'Overdue', as the overdue sweep would have.
+    """
+    today = today or timezone.now().date()
+    rng = random.Random(user.pk)
+    statuses = [status for status, _ in Task.STATUS_CHOICES]
+    priorities = [priority for priority, _ in Task.PRIORITY_CHOICES]
+    categories = [category for category, _ in Task.CATEGORY_CHOICES]
+    tasks = []
+    for i in range(count):
+        status = rng.choice(statuses)
+        due_date = today + timedelta(days=rng.randint(-14, 30))
+        if due_date < today and status in PENDING_STATUSES:
+            status = Task.OVERDUE
+        tasks.append(Task(
+            user=user,
+            title="Benchmark task %d" % i,
+            description="Generated for benchmarking. " * 10,
+            status=status,
+            priority=rng.choice(priorities),
+            category=rng.choice(categories),
+            due_date=due_date,
+        ))
+    Task.objects.bulk_create(tasks, batch_size=500)
+    TaskStats.record(created_changes(tasks))
+
+
+@contextmanager
+def benchmark_environment():
+    """
+    Run the enclosed benchmark in a transaction that is rolled back on
+    exit, with the test client's host allowed.
+    """
+    with override_settings(ALLOWED_HOSTS=BENCHMARK_HOSTS):
+        with transaction.atomic():
+            yield
+            transaction.set_rollback(True)
+
+
+def create_benchmark_user(tasks=0):
+    """
+    Create a throwaway user with `tasks` generated tasks. Outside of
+    `benchmark_environment()`, remove it with `delete_benchmark_user()`.
+    """
+    user = User.objects.create_user(
+        username='benchmark-%s' % uuid.uuid4().hex[:12])
+    seed_tasks(user, tasks)
+    # User ids can be reused once the transaction is rolled back
+    invalidate_dashboard_cache(user.pk)
+    return user
+
+
+def delete_benchmark_user(user):
+    """
+    Delete a benchmark user and their tasks.
+    """
+    Task.objects.filter(user=user).delete()
+    user.delete()
+    invalidate_dashboard_cache(user.pk)
+
+
+def build_requests(view, user, count):
+    """
+    Return `count` requests to `view` as `user`, each one a tuple of
+    `(method, path, data, expected_status)`, creating the tasks they
+    edit or delete.
+    """
+    due_date = timezone.now().date() + timedelta(days=3)
+    data = {
+        'title': "Benchmark task",
+        'description': "Submitted by the benchmark.",
+        'priority': Task.MEDIUM,
+        'status': Task.IN_PROGRESS,
+        'category': Task.WORK,
+        'due_date': due_date.isoformat(),
+    }
+
+    if view == 'task_dashboard':
+        path = reverse('task_dashboard', args=[user.pk])
+        return [('get', path, None, 200)] * count
+    if view == 'task_add':
+        path = reverse('task_add', args=[user.pk])
+        return [('post', path, data, 302)] * count
+    if view == 'task_edit':
+        task = Task.objects.create(user=user, **dict(data, due_date=due_date))
+        path = reverse('task_edit', args=[user.pk, task.pk])
+        return [('post', path, data, 302)] * count
+    if view == 'task_delete':
+        tasks = Task.objects.bulk_create([
+            Task(user=user, **dict(data, due_date=due_date))
+            for _ in range(count)
+        ])
+        TaskStats.record(created_changes(tasks))
+        return [
+            ('get', reverse('task_delete', args=[user.pk, task.pk]), None,
+             302)
+            for task in tasks
+        ]
+    raise ValueError("Unknown view '%s'." % view)
+
+
+def time_requests(client, url, requests):
+    """
+    GET `url` `requests` times with `client`.
+
+    Return the duration of each request, the mean number of queries per
+    request and the mean number of those touching the session table.
+    """
+    run = run_client_requests(client, [('get', url, None, 200)] * requests)
+    if run['errors']:
+        raise RuntimeError("GET %s failed %d time(s)." % (url, run['errors']))
+    return run
+
+
+def run_client_requests(client, requests, before=None):
+    """
+    Send `requests`, a list of `(method, path, data, expected_status)`,
+    one after the other with the test client.
+
+    `before()` is called ahead of each request, outside of the timings.
+    Return the duration of each request, the number of responses with
+    an unexpected status, the wall-clock duration and the mean number of
+    queries (in total and on the session table) per request.
+    """
+    timings = []
+    errors = queries = session_queries = 0
+    started_all = time.perf_counter()
+    for method, path, data, expected_status in requests:
+        if before:
+            before()
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = getattr(client, method)(path, data)
+            timings.append(time.perf_counter() - started)
+        # Don't let unread flash messages pile up in the cookies
+        client.cookies.pop('messages', None)
+        errors += response.status_code != expected_status
+        queries += len(captured)
+        session_queries += sum(
+            SESSION_TABLE in query['sql'] for query in captured)
+    return {
+        'timings': timings,
+        'errors': errors,
+        'elapsed': time.perf_counter() - started_all,
+        'queries': queries / len(requests),
+        'session_queries': session_queries / len(requests),
+    }
+
+
+class QuietWSGIRequestHandler(WSGIRequestHandler):
+    """
+    Request handler that doesn't log every request.
+    """
+    def log_message(self, format, *args):
+        pass
+
+
+@contextmanager
+def live_server():
+    """
+    Serve the project on a free local port from background threads,
+    one per connection, and yield its base URL.
+    """
+    server = ThreadedWSGIServer(
+        ('127.0.0.1', 0), QuietWSGIRequestHandler, allow_reuse_address=False)
+    server.set_app(get_wsgi_application())
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield 'http://127.0.0.1:%d' % server.server_port
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+class NoRedirectHandler(urllib.request.HTTPRedirectHandler):
+    """
+    Report redirects as responses instead of following them.
+    """
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+def http_cookies(client):
+    """
+    Return a `Cookie` header with the session of a logged-in `client`
+    and a CSRF token, and the token to send along with POST data.
+    """
+    csrf_token = get_random_string(32)
+    header = '%s=%s; %s=%s' % (
+        settings.SESSION_COOKIE_NAME,
+        client.cookies[settings.SESSION_COOKIE_NAME].value,
+        settings.CSRF_COOKIE_NAME, csrf_token)
+    return header, csrf_token
+
+
+def run_http_requests(base_url, user, requests, concurrency, before=None):
+    """
+    Send `requests`, a list of `(method, path, data, expected_status)`,
+    over HTTP from `concurrency` threads as `user`.
+
+    `before()` is called ahead of each request, outside of the timings.
+    Return the duration of each request, the number of failed requests
+    or responses with an unexpected status and the wall-clock duration.
+    The session they share is deleted afterwards.
+    """
+    client = logged_in_client(user)
+    cookie, csrf_token = http_cookies(client)
+    opener = urllib.request.build_opener(NoRedirectHandler)
+
+    def send(request):
+        method, path, data, expected_status = request
+        body = None
+        if method == 'post':
+            body = urlencode(
+                dict(data, csrfmiddlewaretoken=csrf_token)).encode()
+        http_request = urllib.request.Request(
+            base_url + path, data=body, method=method.upper(),
+            headers={'Cookie': cookie})
+        if before:
+            before()
+        started = time.perf_counter()
+        try:
+            with opener.open(http_request) as response:
+                response.read()
+                status = response.status
+        except urllib.error.HTTPError as error:
+            status = error.code
+        except OSError:
+            status = None
+        return time.perf_counter() - started, status == expected_status
+
+    started_all = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(send, requests))
+    finally:
+        client.logout()
+    return {
+        'timings': [elapsed for elapsed, _ in results],
+        'errors': sum(not ok for _, ok in results),
+        'elapsed': time.perf_counter() - started_all,
+    }
+
+
+def logged_in_client(user):
+    """
+    Return a test client logged in as `user` with the current
+    SESSION_ENGINE.
+    """
+    client = Client()
+    client.force_login(user)
+    return client
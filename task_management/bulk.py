@@ -0,0 +1,129 @@
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .cache import invalidate_dashboard_cache_on_commit
+from .events import publish_task_event
+from .models import Task, TaskStats
+from .recurrence import OCCURRENCE_DATE_TAKEN_MESSAGE
+from .stats import stats_changes
+from .transitions import (
+    PAST_DUE_MESSAGE,
+    PENDING_STATUSES,
+    allowed_previous_statuses,
+    validate_status_transition,
+)
+
+
+# Fields that can be changed in bulk
+BULK_CHANGE_FIELDS = ['status', 'priority', 'category', 'due_date']
+
+
+def bulk_change_tasks(queryset, changes):
+    """
+    Apply `changes`, a dict mapping some of `BULK_CHANGE_FIELDS` to their
+    new value, to every task of `queryset` in a single `UPDATE`.
+
+    A status change follows the same transition rules as the model,
+    checked on the whole set at once: tasks whose current status may
+    not move to the new one are left untouched, as are past due tasks
+    when the new status is a pending one and their due date is kept
+    (see `Task.next_statuses`). A due date change leaves out the
+    occurrences of a series that would share the new date with another
+    occurrence. The values themselves
+    (choices, due date not in the past) are validated by the caller,
+    e.g. with `BulkTaskChangeForm`.
+
+    Returns a dict with the number of tasks `updated` and the
+    `rejected` ones as a list of `(status, count, reason)` tuples, one
+    per current status that may not be changed.
+    """
+    changes = {
+        field: value for field, value in changes.items()
+        if field in BULK_CHANGE_FIELDS and value not in (None, '')
+    }
+    if not changes:
+        return {'updated': 0, 'rejected': []}
+
+    queryset = queryset.order_by()
+    accepted = queryset
+    rejected = []
+
+    with transaction.atomic():
+        status = changes.get('status')
+        if status:
+            allowed = allowed_previous_statuses(status)
+            accepted = queryset.filter(status__in=allowed)
+            for previous, count in (
+                    queryset.exclude(status__in=allowed)
+                    .values_list('status').annotate(Count('pk'))
+                    .order_by('status')):
+                try:
+                    validate_status_transition(previous, status)
+                    reason = ''
+                except ValidationError as error:
+                    reason = ' '.join(' '.join(error.messages).split())
+                rejected.append((previous, count, reason))
+
+            # Saving them would mark them 'Overdue' again, but the
+            # UPDATE bypasses `save()`
+            if status in PENDING_STATUSES and 'due_date' not in changes:
+                past_due = Q(due_date__lt=timezone.now().date())
+                for previous, count in (
+                        accepted.filter(past_due)
+                        .values_list('status').annotate(Count('pk'))
+                        .order_by('status')):
+                    rejected.append((previous, count, PAST_DUE_MESSAGE))
+                accepted = accepted.exclude(past_due)
+
+        # Occurrences of a series are unique per due date: leave out
+        # those that would join another occurrence on the new date
+        due_date = changes.get('due_date')
+        if due_date:
+            shared_dates = (
+                Task.objects.filter(
+                    Q(pk__in=accepted.values('pk')) | Q(due_date=due_date),
+                    recurrence__in=accepted.values('recurrence'))
+                .order_by().values('recurrence')
+                .annotate(count=Count('pk')).filter(count__gt=1)
+                .values('recurrence')
+            )
+            moved = accepted.filter(recurrence__in=shared_dates).exclude(
+                due_date=due_date)
+            for previous, count in (
+                    moved.values_list('status').annotate(Count('pk'))
+                    .order_by('status')):
+                rejected.append(
+                    (previous, count, OCCURRENCE_DATE_TAKEN_MESSAGE))
+            accepted = accepted.exclude(pk__in=moved.values('pk'))
+
+        user_ids = set(
+            accepted.values_list('user_id', flat=True).distinct())
+        parent_ids = set(
+            accepted.filter(parent__isnull=False)
+            .values_list('parent_id', flat=True).distinct()
+        ) if status else set()
+        if status or 'due_date' in changes:
+            counted = stats_changes(accepted, status)
+            if 'due_date' in changes:
+                counted = [
+                    (user_id, previous, new, changes['due_date'], count)
+                    for user_id, previous, new, due_date, count in counted
+                ]
+        else:
+            counted = []
+        # The status and due date filters are part of the UPDATE, so
+        # rows changed since the checks above still follow the rules
+        updated = accepted.update(updated_at=timezone.now(), **changes)
+        TaskStats.record(counted)
+        if parent_ids:
+            Task.refresh_subtask_counts(parent_ids)
+
+    # Bulk updates don't send model signals, so invalidate the cached
+    # dashboards of the affected users and notify them explicitly
+    for user_id in user_ids:
+        invalidate_dashboard_cache_on_commit(user_id)
+        publish_task_event(user_id, 'updated')
+
+    return {'updated': updated, 'rejected': rejected}
@@ -0,0 +1,92 @@
+import hashlib
+import uuid
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+# Cache backends the dashboards are not cached in: the dummy cache keeps
+# nothing, and reading the database cache takes more queries than
+# computing the dashboard data it would hold.
+UNCACHED_BACKENDS = {
+    'django.core.cache.backends.db.DatabaseCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+def dashboard_cache_enabled():
+    """
+    Whether the dashboards are cached, which takes a cache faster than
+    the queries it saves.
+    """
+    return settings.CACHES['default']['BACKEND'] not in UNCACHED_BACKENDS
+
+
+def _generation_key(user_id):
+    return 'task_dashboard:generation:%s' % user_id
+
+
+def get_dashboard_generation(user_id):
+    """
+    Return the token identifying the current generation of a user's
+    cached dashboard data.
+
+    A fresh random token is used whenever the previous one is missing
+    (never set, evicted or invalidated), so entries cached under an
+    older generation can never be served again.
+    """
+    key = _generation_key(user_id)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, uuid.uuid4().hex, None)
+        generation = cache.get(key)
+    return generation
+
+
+def invalidate_dashboard_cache(user_id):
+    """
+    Drop every cached dashboard entry of the given user.
+    """
+    if not dashboard_cache_enabled():
+        return
+    cache.set(_generation_key(user_id), uuid.uuid4().hex, None)
+
+
+def invalidate_dashboard_cache_on_commit(user_id):
+    """
+    Drop the user's cached dashboard once the current transaction
+    commits (right away outside of one). Invalidating before the commit
+    would let a concurrent request cache the old data again under the
+    new generation.
+    """
+    transaction.on_commit(lambda: invalidate_dashboard_cache(user_id))
+
+
+def dashboard_cache_key(user_id, generation, name, today, params=None):
+    """
+    Build the cache key of a piece of dashboard data for a user, cache
+    generation, date and set of parameters (filters, cursor...).
+    """
+    params_hash = hashlib.md5(
+        urlencode(sorted((params or {}).items())).encode()
+    ).hexdigest()
+    return 'task_dashboard:%s:%s:%s:%s:%s' % (
+        user_id, generation, today.isoformat(), name, params_hash)
+
+
+def get_cached_dashboard_data(user_id, name, today, params, compute):
+    """
+    Return a piece of dashboard data from the cache, computing and
+    storing it with `compute()` on a miss. Without a dashboard cache
+    (see `dashboard_cache_enabled`), it is always computed.
+    """
+    if not dashboard_cache_enabled():
+        return compute()
+    key = dashboard_cache_key(
+        user_id, get_dashboard_generation(user_id), name, today, params)
+    data = cache.get(key)
+    if data is None:
+        data = compute()
+        cache.set(key, data, settings.TASK_DASHBOARD_CACHE_TIMEOUT)
+    return data
@@ -0,0 +1,56 @@
+from django.conf import settings
+from django.core.checks import Error, register
+
+# Cache backends keeping their entries in each process
+PROCESS_LOCAL_CACHES = {
+    'django.core.cache.backends.locmem.LocMemCache',
+}
+
+# Task event brokers only reaching the streams of their own process
+PROCESS_LOCAL_BROKERS = {
+    'task_management.events.InProcessBroker',
+}
+
+
+@register()
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Refuse a per-process cache when several workers serve requests: the
+    dashboards they cache would not be invalidated by changes handled
+    by the other workers.
+    """
+    backend = settings.CACHES['default']['BACKEND']
+    if settings.WEB_CONCURRENCY > 1 and backend in PROCESS_LOCAL_CACHES:
+        return [Error(
+            "WEB_CONCURRENCY is %d but the cache backend %s is not "
+            "shared between the worker processes."
+            % (settings.WEB_CONCURRENCY, backend),
+            hint="Set CACHE_BACKEND to a shared backend, e.g. "
+                 "django.core.cache.backends.redis.RedisCache or "
+                 "django.core.cache.backends.memcached.PyMemcacheCache.",
+            id='task_management.E001',
+        )]
+    return []
+
+
+@register()
+def check_shared_broker(app_configs, **kwargs):
+    """
+    Refuse a per-process task event broker when several workers serve
+    the event streams (TASK_ASYNC_VIEWS): the events of changes handled
+    by one worker would never reach the streams open on the others.
+    Deployments without the streams don't use the broker.
+    """
+    broker = settings.TASK_EVENTS_BROKER
+    if (settings.TASK_ASYNC_VIEWS and settings.WEB_CONCURRENCY > 1
+            and broker in PROCESS_LOCAL_BROKERS):
+        return [Error(
+            "WEB_CONCURRENCY is %d but the task events broker %s is not "
+            "shared between the worker processes."
+            % (settings.WEB_CONCURRENCY, broker),
+            hint="Use PostgreSQL and set TASK_EVENTS_BROKER to "
+                 "task_management.events.PostgresBroker, or run a "
+                 "single worker.",
+            id='task_management.E002',
+        )]
+    return []
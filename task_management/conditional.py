@@ -0,0 +1,110 @@
+import hashlib
+from functools import wraps
+
+from django.contrib.messages import get_messages
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+
+from .models import Task
+
+# Conditional GET for the pages listing a user's tasks. Their ETag is
+# derived from a summary of all of the user's tasks: every save bumps
+# the latest `updated_at` (bulk updates set it too), and every insert
+# or delete changes the count. No `Last-Modified` is sent, since
+# deletes don't move the latest `updated_at` forward. The summary is
+# read from the database on every request, with one aggregate answered
+# from an index, rather than from the dashboard cache: a cache that
+# isn't shared by every process (or invalidated after another process
+# answered) would validate stale pages.
+
+
+def task_state_aggregates():
+    """
+    Aggregates summarising a user's tasks, answered from the
+    `(user, updated_at)` index alone.
+    """
+    return {'count': Count('pk'), 'latest': Max('updated_at')}
+
+
+def get_task_state(user_id):
+    """
+    Return the summary of the user's tasks.
+    """
+    return Task.objects.filter(user_id=user_id).aggregate(
+        **task_state_aggregates())
+
+
+def get_task_etag(request, state, today):
+    """
+    Build the weak ETag of a page of the logged-in user's tasks from
+    their `state` (see `task_state_aggregates`).
+
+    The current date is part of it as tasks move between the dashboard
+    sections when it changes, the CSRF secret so pages embedding a
+    token are rendered again once it is rotated (e.g. on login), and
+    the static files manifest so pages follow deployed assets.
+
+    Build it again after the view ran, as rendering a token sets the
+    secret of clients that had none yet.
+    """
+    latest = state['latest']
+    parts = [
+        request.user.pk,
+        state['count'],
+        latest.isoformat() if latest else '',
+        today.isoformat(),
+        request.META.get('CSRF_COOKIE', ''),
+        getattr(staticfiles_storage, 'manifest_hash', ''),
+    ]
+    digest = hashlib.md5(':'.join(map(str, parts)).encode()).hexdigest()
+    return 'W/"%s"' % digest
+
+
+def is_conditional(request, kwargs):
+    """
+    Whether the response to `request` may be validated with an ETag:
+    only safe requests by the owner of the URL's `user_id`, if any, and
+    with no pending messages, which the page has to render.
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    user_id = kwargs.get('user_id')
+    if user_id is not None and request.user.id != int(user_id):
+        return False
+    return not len(get_messages(request))
+
+
+def finish_response(response, etag):
+    """
+    Mark the response as private and to be revalidated on every use,
+    with its ETag when it can be validated.
+    """
+    if etag and response.status_code in (200, 304):
+        response.headers.setdefault('ETag', etag)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def conditional_task_page(view):
+    """
+    Decorate a view of the logged-in user's tasks to answer `304 Not
+    Modified` when the client's ETag is still current, without running
+    the view. That costs a single aggregate query.
+
+    Apply it below the login decorator.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not is_conditional(request, kwargs):
+            return finish_response(view(request, *args, **kwargs), None)
+        today = timezone.now().date()
+        state = get_task_state(request.user.pk)
+        response = get_conditional_response(
+            request, etag=get_task_etag(request, state, today))
+        if response is None:
+            response = view(request, *args, **kwargs)
+        return finish_response(
+            response, get_task_etag(request, state, today))
+    return wrapper
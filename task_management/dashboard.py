@@ -0,0 +1,268 @@
+from datetime import date
+
+from asgiref.sync import sync_to_async
+from django.db.models import Count, Q
+from django.db.models.functions import Substr
+from django.utils import timezone
+
+from .models import Task, TaskStats
+from .stats import rebuild_task_stats
+from .transitions import PENDING_STATUSES
+
+
+# Number of days covered by each visibility option on the dashboard.
+# Other options (e.g. 'all') have no upper bound on the due date.
+VISIBILITY_WINDOWS = {
+    '7_days': 7,
+    '2_weeks': 14,
+    '1_month': 28,
+}
+
+# Heading of the upcoming section for each visibility option
+VISIBILITY_HEADINGS = {
+    '7_days': "Tasks Due in the Next 7 Days",
+    '2_weeks': "Tasks Due in the Next 2 Weeks",
+    '1_month': "Tasks Due in the Next Month",
+    'all': "All Upcoming Tasks",
+}
+
+# Number of tasks rendered per section before "Load more"
+PAGE_SIZE = 25
+
+# Number of description characters shown in the task tables
+DESCRIPTION_PREVIEW_LENGTH = 150
+
+
+def get_dashboard_filters(request):
+    """
+    Extract the dashboard filters from the GET request parameters.
+    """
+    return {
+        'status': request.GET.get('status', ''),
+        'priority': request.GET.get('priority', ''),
+        'category': request.GET.get('category', ''),
+        'visibility': request.GET.get('visibility', '7_days')
+    }
+
+
+def get_visibility_end(visibility, today):
+    """
+    Return the last due date shown for the given visibility option,
+    or `None` if the upcoming section is unbounded.
+    """
+    days = VISIBILITY_WINDOWS.get(visibility)
+    if days is None:
+        return None
+    return today + timezone.timedelta(days=days)
+
+
+def get_upcoming_heading(visibility):
+    """
+    Return the heading of the upcoming section for a visibility option.
+    """
+    return VISIBILITY_HEADINGS.get(visibility, VISIBILITY_HEADINGS['7_days'])
+
+
+def overdue_q(today):
+    """
+    Condition matching overdue tasks.
+
+    The status is materialized by the `mark_overdue` command; pending
+    tasks that fell due since its last run are matched by date so the
+    dashboard never lags behind it.
+    """
+    return (
+        Q(status=Task.OVERDUE)
+        | Q(status__in=PENDING_STATUSES, due_date__lt=today)
+    )
+
+
+def upcoming_q(filters, today):
+    """
+    Condition matching the tasks shown in the upcoming section, taking
+    the visibility window and the status/priority/category filters
+    into account.
+    """
+    condition = Q(due_date__gte=today)
+
+    visibility_end = get_visibility_end(filters['visibility'], today)
+    if visibility_end is not None:
+        condition &= Q(due_date__lte=visibility_end)
+
+    # Apply additional filters (status, priority, category)
+    for field in ('status', 'priority', 'category'):
+        if filters[field]:
+            condition &= Q(**{field: filters[field]})
+
+    return condition
+
+
+def completed_q():
+    """
+    Condition matching the tasks shown in the completed section.
+    """
+    return Q(status=Task.COMPLETED)
+
+
+# Condition builders for each dashboard section, called with the
+# dashboard filters and the current date
+SECTIONS = {
+    'overdue': lambda filters, today: overdue_q(today),
+    'upcoming': upcoming_q,
+    'completed': lambda filters, today: completed_q(),
+}
+
+
+def get_task_section(task, today):
+    """
+    Name of the dashboard section a single task is listed in, ignoring
+    the filters of the upcoming section.
+    """
+    if task.status == Task.COMPLETED:
+        return 'completed'
+    if task.due_date < today:
+        return 'overdue'
+    return 'upcoming'
+
+
+def task_count_aggregates(today):
+    """
+    Conditional aggregates counting the tasks in each status.
+    """
+    return {
+        'to_do': Count(
+            'pk', filter=Q(status=Task.TO_DO, due_date__gte=today)),
+        'in_progress': Count(
+            'pk', filter=Q(status=Task.IN_PROGRESS, due_date__gte=today)),
+        'completed': Count('pk', filter=Q(status=Task.COMPLETED)),
+        'overdue': Count('pk', filter=overdue_q(today)),
+    }
+
+
+def get_task_counts(user, today):
+    """
+    Count the user's tasks in each status.
+
+    The counters are read from the user's `TaskStats` row with a single
+    primary-key lookup. Only when pending tasks may have fallen due
+    since the last overdue sweep are the tasks counted with a
+    conditional-aggregation query instead.
+    """
+    try:
+        stats = TaskStats.objects.get(pk=user.pk)
+    except TaskStats.DoesNotExist:
+        # Rows are created along with users, rebuild any missing one
+        rebuild_task_stats([user.pk])
+        stats = TaskStats.objects.get(pk=user.pk)
+
+    if stats.is_current(today):
+        return stats.counts()
+    return Task.objects.filter(user=user).aggregate(
+        **task_count_aggregates(today))
+
+
+async def aget_task_counts(user, today):
+    """
+    Async version of `get_task_counts`.
+    """
+    try:
+        stats = await TaskStats.objects.aget(pk=user.pk)
+    except TaskStats.DoesNotExist:
+        await sync_to_async(rebuild_task_stats)([user.pk])
+        stats = await TaskStats.objects.aget(pk=user.pk)
+
+    if stats.is_current(today):
+        return stats.counts()
+    return await Task.objects.filter(user=user).aaggregate(
+        **task_count_aggregates(today))
+
+
+def section_queryset(user, section, filters, today):
+    """
+    Queryset of the tasks in one dashboard section, ordered for keyset
+    pagination on `(due_date, id)`.
+
+    Only a preview of the description is fetched, so long descriptions
+    don't inflate the page.
+    """
+    condition = SECTIONS[section](filters, today)
+    return Task.objects.filter(Q(user=user) & condition).annotate(
+        description_preview=Substr(
+            'description', 1, DESCRIPTION_PREVIEW_LENGTH + 1),
+    ).defer('description').order_by('due_date', 'pk')
+
+
+def serialize_task_row(task):
+    """
+    Convert a task of a section page into the JSON-serializable dict of
+    a table row, with the description preview instead of the full text.
+    """
+    description = task.description_preview
+    if len(description) > DESCRIPTION_PREVIEW_LENGTH:
+        description = description[:DESCRIPTION_PREVIEW_LENGTH - 1] + '…'
+    return {
+        'id': task.pk,
+        'title': task.title,
+        'description': description,
+        'priority': task.priority,
+        'status': task.status,
+        'category': task.category,
+        'due_date': task.due_date.isoformat(),
+        'subtask_count': task.subtask_count,
+        'completed_subtask_count': task.completed_subtask_count,
+    }
+
+
+def encode_cursor(task):
+    """
+    Encode the keyset position just after `task`.
+    """
+    return '%s_%d' % (task.due_date.isoformat(), task.pk)
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor created by `encode_cursor` into a `(due_date, id)`
+    tuple. Raises `ValueError` if the cursor is malformed.
+    """
+    due_date, pk = cursor.split('_')
+    return date.fromisoformat(due_date), int(pk)
+
+
+def section_page_queryset(user, section, filters, today, after, page_size):
+    """
+    Queryset of one page of a dashboard section, with one extra row to
+    find out whether there is a next page.
+    """
+    tasks = section_queryset(user, section, filters, today)
+
+    if after:
+        due_date, pk = decode_cursor(after)
+        tasks = tasks.filter(
+            Q(due_date__gt=due_date) | Q(due_date=due_date, pk__gt=pk))
+
+    return tasks[:page_size + 1]
+
+
+def split_page(rows, page_size):
+    """
+    Split the rows fetched for a page into the page itself and the
+    cursor of the next page, or `None` if this is the last page.
+    """
+    if len(rows) > page_size:
+        return rows[:page_size], encode_cursor(rows[page_size - 1])
+    return rows, None
+
+
+def get_section_page(user, section, filters, today, after=None,
+                     page_size=None):
+    """
+    Fetch one page of a dashboard section with a single query.
+
+    Returns the tasks on the page and the cursor of the next page, or
+    `None` if this is the last page.
+    """
+    page_size = page_size or PAGE_SIZE
+    rows = list(section_page_queryset(
+        user, section, filters, today, after, page_size))
+    return split_page(rows, page_size)
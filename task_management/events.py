@@ -0,0 +1,302 @@
+import asyncio
+import functools
+import json
+import logging
+import select
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# Real-time task events, pushed to the users' open dashboards over
+# server-sent events (see `async_views.task_events`). Each event is a
+# dict with a `type` ('created', 'updated', 'deleted' or 'overdue')
+# and, when they are known, the `ids` of the tasks concerned. The events
+# of a transaction are sent together once it commits, those of each
+# type merged into one (see `EventBatch`).
+
+# Events kept for a subscriber that doesn't read them; the oldest are
+# dropped beyond that
+MAX_QUEUED_EVENTS = 100
+
+# PostgreSQL notification channel of the task events, and the longest
+# payload it accepts, in bytes
+NOTIFY_CHANNEL = 'task_events'
+MAX_NOTIFY_PAYLOAD = 7999
+
+# Seconds between the listener's checks of its connection, and before
+# it connects again after losing it
+LISTEN_POLL_INTERVAL = 5
+LISTEN_RETRY_INTERVAL = 5
+
+
+class InProcessBroker:
+    """
+    Fan task events out to the subscribers of the current process.
+
+    `publish` may be called from any thread (views, signals, management
+    commands) with a list of events; each subscriber receives them one
+    by one on its own event loop. Events published by other processes
+    are never seen, so it only suits a single process serving every
+    request, e.g. in development: other deployments need a broker
+    shared between processes, such as `PostgresBroker`. Any class with the same
+    `publish` and `subscribe` methods can be configured with the
+    TASK_EVENTS_BROKER setting.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+
+    def publish(self, user_id, events):
+        """
+        Send the `events` to the subscribers of the user.
+        """
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._deliver, queue, events)
+            except RuntimeError:
+                # The subscriber's loop is closed, it is going away
+                pass
+
+    @staticmethod
+    def _deliver(queue, events):
+        for event in events:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    def subscribe(self, user_id):
+        """
+        Subscribe to the events of the user for the duration of an
+        `async with` block, which yields the `asyncio.Queue` they are
+        delivered to.
+        """
+        return Subscription(self, user_id)
+
+    def _add(self, user_id, subscriber):
+        with self._lock:
+            self._subscribers[user_id].add(subscriber)
+
+    def _remove(self, user_id, subscriber):
+        with self._lock:
+            self._subscribers[user_id].discard(subscriber)
+            if not self._subscribers[user_id]:
+                del self._subscribers[user_id]
+
+
+def notify_payload(user_id, events):
+    """
+    Encode events of the user as a PostgreSQL notification payload.
+    The task ids are left out of events too large to be sent, which then
+    only tell the dashboards to refresh their counters.
+    """
+    payload = json.dumps({'user_id': user_id, 'events': events})
+    if len(payload.encode()) > MAX_NOTIFY_PAYLOAD:
+        events = [{'type': event['type']} for event in events]
+        payload = json.dumps({'user_id': user_id, 'events': events})
+    return payload
+
+
+class PostgresBroker(InProcessBroker):
+    """
+    Fan task events out to the subscribers of every process using the
+    PostgreSQL database, with LISTEN/NOTIFY.
+
+    `publish` sends a notification from the current database connection,
+    so events reach the streams whichever process changed the tasks:
+    ASGI or WSGI workers, or management commands. Each process with
+    subscribers receives them in a listener thread, started by the
+    first subscription, on a connection of its own, then delivers them
+    like `InProcessBroker`.
+
+    LISTEN needs a session of its own: behind a pooler in transaction
+    mode (see DB_POOLER), set TASK_EVENTS_DATABASE_URL to connect the
+    listener to the database directly.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._listener = None
+        self.listening = threading.Event()
+
+    def publish(self, user_id, events):
+        """
+        Notify every process of the `events`, with a single notification.
+        """
+        with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+            cursor.execute(
+                "SELECT pg_notify(%s, %s)",
+                [NOTIFY_CHANNEL, notify_payload(user_id, events)])
+
+    def _add(self, user_id, subscriber):
+        super()._add(user_id, subscriber)
+        with self._lock:
+            if self._listener is None:
+                self._listener = threading.Thread(
+                    target=self._listen, name='task-events-listener',
+                    daemon=True)
+                self._listener.start()
+
+    def _connect(self):
+        """
+        Open the listener's connection, outside of Django's connection
+        handling as it is held for the lifetime of the process.
+        """
+        database = connections[DEFAULT_DB_ALIAS]
+        url = settings.TASK_EVENTS_DATABASE_URL
+        if url:
+            listener = database.Database.connect(url)
+        else:
+            listener = database.Database.connect(
+                **database.get_connection_params())
+        listener.autocommit = True
+        return listener
+
+    def _listen(self):
+        while True:
+            try:
+                listener = self._connect()
+                try:
+                    with listener.cursor() as cursor:
+                        cursor.execute("LISTEN %s" % NOTIFY_CHANNEL)
+                    self.listening.set()
+                    while True:
+                        readable, _, _ = select.select(
+                            [listener], [], [], LISTEN_POLL_INTERVAL)
+                        if readable:
+                            listener.poll()
+                            while listener.notifies:
+                                self._receive(listener.notifies.pop(0))
+                finally:
+                    self.listening.clear()
+                    listener.close()
+            except Exception:
+                # Events sent until the listener is back are lost, the
+                # counters are resynchronised when the streams reconnect
+                logger.exception("Task events listener disconnected.")
+                time.sleep(LISTEN_RETRY_INTERVAL)
+
+    def _receive(self, notification):
+        data = json.loads(notification.payload)
+        super().publish(data['user_id'], data['events'])
+
+
+class Subscription:
+    """
+    Async context manager registering a queue with an `InProcessBroker`
+    (or `PostgresBroker`) on the running event loop.
+
+    It is a plain class rather than an `asynccontextmanager` generator,
+    so that a stream finalized while suspended inside it (e.g. by the
+    garbage collector) always unsubscribes: a generator-based context
+    manager may have been finalized first.
+    """
+
+    def __init__(self, broker, user_id):
+        self.broker = broker
+        self.user_id = user_id
+        self.subscriber = None
+
+    async def __aenter__(self):
+        queue = asyncio.Queue(MAX_QUEUED_EVENTS)
+        self.subscriber = (asyncio.get_running_loop(), queue)
+        self.broker._add(self.user_id, self.subscriber)
+        return queue
+
+    async def __aexit__(self, *exc_info):
+        self.broker._remove(self.user_id, self.subscriber)
+
+
+@functools.cache
+def get_broker():
+    """
+    Return the broker configured with the TASK_EVENTS_BROKER setting,
+    shared by the whole process.
+    """
+    return import_string(settings.TASK_EVENTS_BROKER)()
+
+
+def merge_events(events):
+    """
+    Merge the events of each type into one, in the order the types first
+    appear. The merged event has the ids of all of them, or none if one
+    of them had none.
+    """
+    merged = {}
+    for event in events:
+        ids = merged.setdefault(event['type'], {})
+        if ids is None or 'ids' not in event:
+            merged[event['type']] = None
+        else:
+            ids.update(dict.fromkeys(event['ids']))
+    return [
+        {'type': kind} if ids is None else {'type': kind, 'ids': list(ids)}
+        for kind, ids in merged.items()
+    ]
+
+
+class EventBatch:
+    """
+    The task events published in a transaction, sent once it commits
+    with one `publish` per user (a single notification with
+    `PostgresBroker`) rather than one per saved or deleted task.
+    """
+
+    def __init__(self):
+        self.events = defaultdict(list)
+
+    def add(self, user_id, event):
+        self.events[user_id].append(event)
+
+    def send(self):
+        if getattr(_pending, 'batch', None) is self:
+            _pending.batch = None
+        broker = get_broker()
+        for user_id, events in self.events.items():
+            broker.publish(user_id, merge_events(events))
+
+
+# The batch of the transaction running in the current thread
+_pending = threading.local()
+
+
+def get_event_batch():
+    """
+    Return the batch of events of the current transaction, starting one
+    to be sent once it commits if needed.
+
+    A batch whose `send` is no longer among the transaction's commit
+    callbacks was discarded by a rollback (or already sent), so a new
+    one is started. Events of a savepoint rolled back after the batch
+    was started are still sent; subscribers only refresh the tasks.
+    """
+    connection = transaction.get_connection()
+    batch = getattr(_pending, 'batch', None)
+    if batch is None or not any(
+            func == batch.send for _, func, _ in connection.run_on_commit):
+        batch = _pending.batch = EventBatch()
+        transaction.on_commit(batch.send)
+    return batch
+
+
+def publish_task_event(user_id, kind, ids=None):
+    """
+    Publish a task event to the user's subscribers once the current
+    transaction commits, so they never see changes that are rolled
+    back; right away outside of a transaction.
+    """
+    event = {'type': kind}
+    if ids is not None:
+        event['ids'] = list(ids)
+    if transaction.get_connection().in_atomic_block:
+        get_event_batch().add(user_id, event)
+    else:
+        get_broker().publish(user_id, [event])
@@ -0,0 +1,172 @@
+import csv
+import itertools
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+from .dashboard import upcoming_q
+from .models import Task
+
+
+# Columns written for each task, in order
+EXPORT_FIELDS = [
+    'id', 'title', 'description', 'priority', 'status', 'category',
+    'due_date', 'created_at', 'updated_at',
+]
+
+# Supported export formats and their content types
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+# Number of rows fetched from the database at a time
+EXPORT_CHUNK_SIZE = 2000
+
+
+class Echo:
+    """
+    File-like object whose `write()` returns the written value instead
+    of storing it, so `csv.writer` can be used to produce lines lazily.
+    """
+    def write(self, value):
+        return value
+
+
+def get_export_filters(params):
+    """
+    Extract the dashboard filters from a dict-like object (GET
+    parameters or command options).
+
+    Unlike the dashboard, a missing visibility means the whole account
+    is exported rather than the next 7 days.
+    """
+    return {
+        field: params.get(field) or ''
+        for field in ('status', 'priority', 'category', 'visibility')
+    }
+
+
+def export_queryset(user, filters, today):
+    """
+    Rows of the user's tasks matching the filters, as tuples of
+    `EXPORT_FIELDS`.
+
+    With a visibility option, the export matches the dashboard's
+    upcoming section exactly.
+    """
+    if filters['visibility']:
+        condition = upcoming_q(filters, today)
+    else:
+        condition = Q()
+        for field in ('status', 'priority', 'category'):
+            if filters[field]:
+                condition &= Q(**{field: filters[field]})
+
+    return Task.objects.filter(Q(user=user) & condition).order_by(
+        'pk').values_list(*EXPORT_FIELDS)
+
+
+def chunk_after(queryset, last_pk, chunk_size):
+    """
+    The next chunk of an export queryset, after the row with the primary
+    key `last_pk` (None for the first chunk).
+    """
+    if last_pk is not None:
+        queryset = queryset.filter(pk__gt=last_pk)
+    return queryset[:chunk_size]
+
+
+def iter_chunks(queryset, chunk_size):
+    """
+    Yield the rows of an export queryset as lists of up to `chunk_size`
+    rows, fetching each with its own query. The first one is yielded
+    even when empty.
+
+    Each query resumes after the last primary key seen (keyset
+    pagination) rather than reading from a server-side cursor, which
+    poolers in transaction mode don't support (see DB_POOLER in the
+    settings), so memory stays bounded on every database setup.
+    """
+    last_pk = None
+    while True:
+        rows = list(chunk_after(queryset, last_pk, chunk_size))
+        yield rows
+        if len(rows) < chunk_size:
+            return
+        # The primary key is the first of the EXPORT_FIELDS
+        last_pk = rows[-1][0]
+
+
+async def aiter_chunks(queryset, chunk_size):
+    """
+    Async version of `iter_chunks`.
+    """
+    last_pk = None
+    while True:
+        rows = [row async for row in chunk_after(
+            queryset, last_pk, chunk_size)]
+        yield rows
+        if len(rows) < chunk_size:
+            return
+        last_pk = rows[-1][0]
+
+
+def iter_csv(rows, header=True):
+    """
+    Yield the header, unless `header` is false, and each row as CSV
+    lines.
+    """
+    writer = csv.writer(Echo())
+    if header:
+        yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def iter_jsonl(rows, header=True):
+    """
+    Yield each row as a JSON object on its own line. JSON Lines have no
+    header, `header` is ignored.
+    """
+    for row in rows:
+        yield json.dumps(
+            dict(zip(EXPORT_FIELDS, row)), cls=DjangoJSONEncoder) + '\n'
+
+
+# Line writers of the export formats
+EXPORT_WRITERS = {
+    'csv': iter_csv,
+    'jsonl': iter_jsonl,
+}
+
+
+def iter_export(user, filters, today, export_format,
+                chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yield the user's tasks in the given format, one line at a time.
+
+    Rows are fetched from the database in chunks (see `iter_chunks`), so
+    memory use doesn't grow with the number of tasks.
+    """
+    chunks = iter_chunks(
+        export_queryset(user, filters, today), chunk_size)
+    return EXPORT_WRITERS[export_format](itertools.chain.from_iterable(chunks))
+
+
+async def aiter_export(user, filters, today, export_format,
+                       chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Async version of `iter_export`, yielding the lines of each chunk of
+    rows together.
+
+    Served by the ASGI app, where a sync iterator would be consumed in a
+    thread and the whole file buffered before it is sent.
+    """
+    write_lines = EXPORT_WRITERS[export_format]
+    header = True
+    async for rows in aiter_chunks(
+            export_queryset(user, filters, today), chunk_size):
+        yield ''.join(write_lines(rows, header=header))
+        header = False
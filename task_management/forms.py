@@ -2,7 +2,9 @@ from django import forms
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 from datetime import timedelta
-from .models import Task
+from .models import Task, TaskRecurrence
+from .recurrence import OCCURRENCE_DATE_TAKEN_MESSAGE, occurrence_date_taken
+from .transitions import validate_status_transition
 
 
 class TaskForm(forms.ModelForm):
@@ -58,40 +60,103 @@ class TaskForm(forms.ModelForm):
     def clean(self):
         """
         Custom validation for status transitions and other conditions.
+
+        The previous status is the one `self.instance` was loaded with,
+        so no extra query is needed. An occurrence of a series can't be
+        moved onto the due date of another one.
         """
         cleaned_data = super().clean()
         status = cleaned_data.get('status')
-        previous_status = None
-
-        if self.instance.pk:
-            previous_status = Task.objects.get(pk=self.instance.pk).status
-
-        # Ensure that 'Overdue' is not set manually
-        if status == Task.OVERDUE:
-            raise ValidationError(
-                "The status 'Overdue' is automatically set by the system and \
-                cannot be assigned manually.")
-
-        # Only allow status change to 'Completed' if previously 'In Progress'
-        if status == Task.COMPLETED:
-            if not self.instance.pk:  # New task, cannot be 'Completed'
-                raise ValidationError(
-                    "A new task cannot be marked as 'Completed'.")
-            if previous_status != Task.IN_PROGRESS:
-                raise ValidationError(
-                    "A task can only be marked as 'Completed' after being \
-                    'In Progress'.")
-
-        # Ensure a 'Completed' task cannot be changed back to 'In Progress'
-        if status == Task.IN_PROGRESS and previous_status == Task.COMPLETED:
-            raise ValidationError(
-                "A task marked as 'Completed' cannot be changed back to \
-                'In Progress'.")
-
-        # Ensure a 'Completed' task cannot be changed back to 'To Do'
-        if status == Task.TO_DO and previous_status == Task.COMPLETED:
-            raise ValidationError(
-                "A task marked as 'Completed' cannot be changed back to \
-                'To Do'.")
+        due_date = cleaned_data.get('due_date')
+
+        if status:
+            validate_status_transition(
+                self.instance.original_status, status)
+
+        if (due_date and due_date != self.instance.original_due_date
+                and occurrence_date_taken(self.instance, due_date)):
+            self.add_error('due_date', ValidationError(
+                OCCURRENCE_DATE_TAKEN_MESSAGE, code='unique'))
 
         return cleaned_data
+
+
+class BulkTaskChangeForm(forms.Form):
+    """
+    A form for changing several tasks at once from the admin.
+
+    Every field is optional and left empty to keep the current values.
+    'Overdue' is not offered since it can't be assigned manually.
+    """
+    status = forms.ChoiceField(
+        choices=[('', 'Unchanged')] + [
+            choice for choice in Task.STATUS_CHOICES
+            if choice[0] != Task.OVERDUE
+        ],
+        required=False,
+    )
+    priority = forms.ChoiceField(
+        choices=[('', 'Unchanged')] + Task.PRIORITY_CHOICES,
+        required=False,
+    )
+    category = forms.ChoiceField(
+        choices=[('', 'Unchanged')] + Task.CATEGORY_CHOICES,
+        required=False,
+    )
+    due_date = forms.DateField(
+        required=False,
+        widget=forms.DateInput(format='%Y-%m-%d', attrs={'type': 'date'}),
+    )
+
+    def clean_due_date(self):
+        """
+        Ensure the new due date, if any, is not in the past.
+        """
+        due_date = self.cleaned_data.get('due_date')
+        if due_date and due_date < timezone.now().date():
+            raise ValidationError("Due date cannot be in the past.")
+        return due_date
+
+    def clean(self):
+        """
+        Ensure at least one field is changed.
+        """
+        cleaned_data = super().clean()
+        if not self.errors and not any(cleaned_data.values()):
+            raise ValidationError("Choose at least one change to apply.")
+        return cleaned_data
+
+
+class RecurrenceForm(forms.Form):
+    """
+    A form for making a new task repeat.
+
+    It includes:
+    - **repeat**: How often the task repeats, if at all.
+    - **repeat_until**: The date of the last possible occurrence.
+    """
+    repeat = forms.ChoiceField(
+        choices=[('', 'Does not repeat')] + TaskRecurrence.FREQUENCY_CHOICES,
+        required=False,
+        widget=forms.Select(attrs={'class': 'form-control'}),
+    )
+    repeat_until = forms.DateField(
+        required=False,
+        widget=forms.DateInput(
+            format='%Y-%m-%d',
+            attrs={'type': 'date', 'class': 'form-control'},
+        ),
+    )
+
+    def get_rule(self):
+        """
+        Return the chosen recurrence as an RRULE, or `None`.
+        """
+        frequency = self.cleaned_data.get('repeat')
+        if not frequency:
+            return None
+        rule = 'FREQ=%s' % frequency
+        until = self.cleaned_data.get('repeat_until')
+        if until:
+            rule += ';UNTIL=%s' % until.strftime('%Y%m%d')
+        return rule
@@ -0,0 +1,205 @@
+import codecs
+import csv
+import json
+from datetime import date
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import invalidate_dashboard_cache_on_commit
+from .events import publish_task_event
+from .models import Task, TaskStats
+from .stats import created_changes
+from .transitions import ALLOWED_PREVIOUS_STATUSES
+
+
+# Supported import formats
+IMPORT_FORMATS = ['csv', 'jsonl']
+
+# Encoding of the imported files; spreadsheet exports often start with
+# a byte order mark, which would otherwise end up in the first header
+IMPORT_ENCODING = 'utf-8-sig'
+
+# Fields read from each record; other keys (e.g. `id` in an export)
+# are ignored
+IMPORT_FIELDS = [
+    'title', 'description', 'priority', 'status', 'category', 'due_date',
+]
+
+# Valid values of the choice fields, and their defaults when missing
+CHOICES = {
+    'priority': {value for value, label in Task.PRIORITY_CHOICES},
+    'status': {value for value, label in Task.STATUS_CHOICES},
+    'category': {value for value, label in Task.CATEGORY_CHOICES},
+}
+DEFAULTS = {
+    'priority': Task.MEDIUM,
+    'status': Task.TO_DO,
+    'category': Task.WORK,
+}
+
+# Statuses a new task may be created with
+NEW_TASK_STATUSES = {
+    status for status, previous in ALLOWED_PREVIOUS_STATUSES.items()
+    if None in previous
+}
+
+TITLE_MAX_LENGTH = Task._meta.get_field('title').max_length
+
+
+def check_encoding(file, chunk_size=64 * 1024):
+    """
+    Decode the whole binary `file` as `IMPORT_ENCODING`, a chunk at a
+    time without keeping it, then rewind it.
+
+    Raises `UnicodeDecodeError` for a malformed file, before any record
+    is imported: `import_tasks` commits chunk by chunk, so failing
+    halfway through would leave the first records imported.
+    """
+    decoder = codecs.getincrementaldecoder(IMPORT_ENCODING)()
+    for data in iter(lambda: file.read(chunk_size), b''):
+        decoder.decode(data)
+    decoder.decode(b'', final=True)
+    file.seek(0)
+
+
+def iter_records(stream, import_format):
+    """
+    Yield `(line_number, record, error)` for each record of a CSV or
+    JSON Lines text stream, without reading the whole stream at once.
+    """
+    if import_format == 'csv':
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record, None
+        return
+
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield line_number, None, "Invalid JSON."
+            continue
+        if not isinstance(record, dict):
+            yield line_number, None, "Expected a JSON object."
+            continue
+        yield line_number, record, None
+
+
+def validate_chunk(chunk, today):
+    """
+    Validate a chunk of `(line_number, record, error)` tuples.
+
+    Each rule is applied column by column over the whole chunk, mirroring
+    `TaskForm` and `Task.clean`: required fields, choices, due dates not
+    in the past and the statuses a new task may have.
+
+    Returns the valid `Task` instances (without a user) and a list of
+    `(line_number, errors)` for the invalid records.
+    """
+    rows = []
+    errors = {}
+    for line_number, record, error in chunk:
+        if error:
+            errors[line_number] = [error]
+        else:
+            rows.append((line_number, record))
+
+    def add_error(line_number, message):
+        errors.setdefault(line_number, []).append(message)
+
+    # Normalise every column first
+    columns = {
+        field: [str(record.get(field) or '').strip() for _, record in rows]
+        for field in IMPORT_FIELDS
+    }
+    for field, default in DEFAULTS.items():
+        columns[field] = [value or default for value in columns[field]]
+    line_numbers = [line_number for line_number, _ in rows]
+
+    for field in ('title', 'description'):
+        for line_number, value in zip(line_numbers, columns[field]):
+            if not value:
+                add_error(line_number, "%s: This field is required." % field)
+
+    for line_number, value in zip(line_numbers, columns['title']):
+        if len(value) > TITLE_MAX_LENGTH:
+            add_error(line_number, "title: Ensure this value has at most "
+                                   "%d characters." % TITLE_MAX_LENGTH)
+
+    for field, choices in CHOICES.items():
+        for line_number, value in zip(line_numbers, columns[field]):
+            if value not in choices:
+                add_error(line_number, "%s: '%s' is not a valid choice."
+                                       % (field, value))
+
+    for line_number, value in zip(line_numbers, columns['status']):
+        if value in CHOICES['status'] and value not in NEW_TASK_STATUSES:
+            add_error(line_number, "status: A new task cannot be "
+                                   "'%s'." % value)
+
+    due_dates = []
+    for line_number, value in zip(line_numbers, columns['due_date']):
+        try:
+            due_date = date.fromisoformat(value)
+        except ValueError:
+            add_error(line_number, "due_date: Enter a valid date.")
+            due_date = None
+        else:
+            if due_date < today:
+                add_error(line_number,
+                          "due_date: Due date cannot be in the past.")
+        due_dates.append(due_date)
+    columns['due_date'] = due_dates
+
+    tasks = [
+        Task(**{field: columns[field][index] for field in IMPORT_FIELDS})
+        for index, line_number in enumerate(line_numbers)
+        if line_number not in errors
+    ]
+    return tasks, sorted(errors.items())
+
+
+def import_tasks(user, stream, import_format, batch_size=None):
+    """
+    Import tasks for `user` from a CSV or JSON Lines text stream.
+
+    Records are read and validated `batch_size` at a time, and the
+    valid ones of each chunk are inserted with a single `bulk_create`
+    in its own transaction. Invalid records are skipped and reported.
+
+    Returns a dict with the number of tasks `created` and the list of
+    `(line_number, errors)` for the rejected records.
+    """
+    batch_size = batch_size or settings.TASK_BULK_BATCH_SIZE
+    today = timezone.now().date()
+    records = iter_records(stream, import_format)
+
+    created = 0
+    errors = []
+    try:
+        while True:
+            chunk = list(islice(records, batch_size))
+            if not chunk:
+                break
+
+            tasks, chunk_errors = validate_chunk(chunk, today)
+            errors.extend(chunk_errors)
+            for task in tasks:
+                task.user = user
+
+            with transaction.atomic():
+                Task.objects.bulk_create(tasks)
+                TaskStats.record(created_changes(tasks))
+            created += len(tasks)
+    finally:
+        # Bulk inserts don't send model signals
+        if created:
+            invalidate_dashboard_cache_on_commit(user.id)
+            publish_task_event(user.id, 'created')
+
+    return {'created': created, 'errors': errors}
@@ -0,0 +1,95 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from task_management.benchmarks import (
+    benchmark_environment,
+    create_benchmark_user,
+    logged_in_client,
+    summarize_timings,
+    time_requests,
+)
+
+
+class Command(BaseCommand):
+    """
+    Compare the session backends on the task dashboard: database queries
+    per request (in total and on the session table) and latency, e.g.::
+
+        python manage.py benchmark_sessions --requests 500 --tasks 200
+
+    Runs in-process against the configured database and cache, inside a
+    transaction that is rolled back, so nothing is left behind.
+    """
+    help = "Benchmark task_dashboard under each session backend."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--backends',
+            nargs='+',
+            choices=list(settings.SESSION_ENGINES),
+            default=list(settings.SESSION_ENGINES),
+            help="Session backends to compare (default: all).",
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=200,
+            help="Number of timed requests per backend.",
+        )
+        parser.add_argument(
+            '--warmup',
+            type=int,
+            default=5,
+            help="Number of untimed requests per backend.",
+        )
+        parser.add_argument(
+            '--tasks',
+            type=int,
+            default=100,
+            help="Number of tasks of the benchmark user.",
+        )
+        parser.add_argument(
+            '--json',
+            action='store_true',
+            help="Print the results as JSON.",
+        )
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1:
+            raise CommandError("--requests must be at least 1.")
+
+        results = {}
+        with benchmark_environment():
+            user = create_benchmark_user(options['tasks'])
+            url = reverse('task_dashboard', args=[user.pk])
+            for backend in options['backends']:
+                engine = settings.SESSION_ENGINES[backend]
+                with override_settings(SESSION_ENGINE=engine):
+                    client = logged_in_client(user)
+                    if options['warmup']:
+                        time_requests(client, url, options['warmup'])
+                    run = time_requests(client, url, options['requests'])
+                    client.logout()
+                results[backend] = {
+                    'queries': run['queries'],
+                    'session_queries': run['session_queries'],
+                    **summarize_timings(run['timings']),
+                }
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        self.stdout.write(
+            "%-16s %9s %9s %9s %9s %9s" % (
+                'backend', 'queries', 'session', 'mean ms', 'p50 ms',
+                'p95 ms'))
+        for backend, result in results.items():
+            self.stdout.write(
+                "%-16s %9.2f %9.2f %9.2f %9.2f %9.2f" % (
+                    backend, result['queries'], result['session_queries'],
+                    result['mean_ms'], result['p50_ms'], result['p95_ms']))
@@ -0,0 +1,246 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from task_management.benchmarks import (
+    BENCHMARK_HOSTS,
+    BENCHMARK_VIEWS,
+    build_requests,
+    create_benchmark_user,
+    delete_benchmark_user,
+    live_server,
+    logged_in_client,
+    run_client_requests,
+    run_http_requests,
+    summarize_timings,
+)
+from task_management.cache import invalidate_dashboard_cache
+
+
+class Command(BaseCommand):
+    """
+    Benchmark the task views for users with different numbers of tasks,
+    through the test client, a concurrent local HTTP load generator or
+    both, e.g.::
+
+        python manage.py benchmark_views --tasks 100 10000 100000 \\
+            --mode both --concurrency 8 --output results.json
+
+    Save the results of a known good build and pass them as
+    `--baseline` to later runs: the command fails when the p95 latency
+    grows by more than `--tolerance` percent, or when the number of
+    queries per request or of failed requests grows.
+
+    The benchmark users, their tasks and sessions are committed to the
+    configured database while the benchmark runs, so the views' cache
+    invalidations on commit take effect as in production, and are
+    deleted afterwards: run it against a development database. On
+    SQLite, concurrent writes can fail with "database is locked"; they
+    are counted as failed requests.
+    """
+    help = "Benchmark the task dashboard, add, edit and delete views."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tasks',
+            type=int,
+            nargs='+',
+            default=[100],
+            help="Task counts of the benchmark users, one run each.",
+        )
+        parser.add_argument(
+            '--views',
+            nargs='+',
+            choices=BENCHMARK_VIEWS,
+            default=BENCHMARK_VIEWS,
+        )
+        parser.add_argument(
+            '--mode',
+            choices=['client', 'http', 'both'],
+            default='client',
+            help="Drive the views with the test client (with query "
+                 "counts), over HTTP, or both.",
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=100,
+            help="Number of timed requests per view.",
+        )
+        parser.add_argument(
+            '--warmup',
+            type=int,
+            default=5,
+            help="Number of untimed requests per view.",
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=4,
+            help="Number of concurrent HTTP clients.",
+        )
+        parser.add_argument(
+            '--cold-cache',
+            action='store_true',
+            help="Drop the user's cached dashboard data before each "
+                 "request.",
+        )
+        parser.add_argument(
+            '--output',
+            help="Write the results as JSON to this file.",
+        )
+        parser.add_argument(
+            '--json',
+            action='store_true',
+            help="Print the results as JSON.",
+        )
+        parser.add_argument(
+            '--baseline',
+            help="JSON results to compare against.",
+        )
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=20.0,
+            help="Allowed p95 latency increase over the baseline, in "
+                 "percent.",
+        )
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1:
+            raise CommandError("--requests must be at least 1.")
+        if options['concurrency'] < 1:
+            raise CommandError("--concurrency must be at least 1.")
+        if min(options['tasks']) < 0:
+            raise CommandError("--tasks must not be negative.")
+
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline'], encoding='utf-8') as stream:
+                baseline = json.load(stream)
+
+        modes = (['client', 'http'] if options['mode'] == 'both'
+                 else [options['mode']])
+        results = []
+        with override_settings(ALLOWED_HOSTS=BENCHMARK_HOSTS):
+            for tasks in options['tasks']:
+                user = create_benchmark_user(tasks)
+                try:
+                    for mode in modes:
+                        results.extend(
+                            self.run_mode(mode, user, tasks, options))
+                finally:
+                    delete_benchmark_user(user)
+
+        report = {'results': results}
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as stream:
+                json.dump(report, stream, indent=2)
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            self.print_table(results)
+
+        if baseline is not None:
+            regressions = self.compare(
+                results, baseline['results'], options['tolerance'])
+            if regressions:
+                raise CommandError(
+                    "Performance regressions:\n" + '\n'.join(regressions))
+            self.stdout.write(self.style.SUCCESS(
+                "No regressions against %s." % options['baseline']))
+
+    def run_mode(self, mode, user, tasks, options):
+        """
+        Benchmark every selected view in one mode.
+        """
+        # The cache is dropped right away: invalidations on commit only
+        # follow the views' own writes
+        def drop_cache():
+            invalidate_dashboard_cache(user.pk)
+        before = drop_cache if options['cold_cache'] else None
+
+        results = []
+        for view in options['views']:
+            requests = build_requests(
+                view, user, options['warmup'] + options['requests'])
+            warmup = requests[:options['warmup']]
+            timed = requests[options['warmup']:]
+
+            if mode == 'client':
+                client = logged_in_client(user)
+                try:
+                    if warmup:
+                        run_client_requests(client, warmup)
+                    run = run_client_requests(client, timed, before)
+                finally:
+                    client.logout()
+            else:
+                with live_server() as base_url:
+                    if warmup:
+                        run_http_requests(
+                            base_url, user, warmup, options['concurrency'])
+                    run = run_http_requests(
+                        base_url, user, timed, options['concurrency'],
+                        before)
+
+            results.append({
+                'view': view,
+                'mode': mode,
+                'tasks': tasks,
+                'requests': len(timed),
+                'errors': run['errors'],
+                'throughput_rps': len(timed) / run['elapsed'],
+                **summarize_timings(run['timings']),
+                'queries': run.get('queries'),
+            })
+        return results
+
+    def print_table(self, results):
+        self.stdout.write(
+            "%-15s %-6s %7s %9s %9s %9s %9s %8s %6s" % (
+                'view', 'mode', 'tasks', 'req/s', 'p50 ms', 'p95 ms',
+                'p99 ms', 'queries', 'errors'))
+        for result in results:
+            queries = result['queries']
+            self.stdout.write(
+                "%-15s %-6s %7d %9.1f %9.2f %9.2f %9.2f %8s %6d" % (
+                    result['view'], result['mode'], result['tasks'],
+                    result['throughput_rps'], result['p50_ms'],
+                    result['p95_ms'], result['p99_ms'],
+                    '-' if queries is None else '%.2f' % queries,
+                    result['errors']))
+
+    def compare(self, results, baseline, tolerance):
+        """
+        Return a description of every regression of `results` against
+        the `baseline` results for the same view, mode and task count.
+        """
+        def key(result):
+            return result['view'], result['mode'], result['tasks']
+
+        baseline = {key(result): result for result in baseline}
+        regressions = []
+        for result in results:
+            before = baseline.get(key(result))
+            if before is None:
+                continue
+            name = '%s (%s, %d tasks)' % key(result)
+            limit = before['p95_ms'] * (1 + tolerance / 100)
+            if result['p95_ms'] > limit:
+                regressions.append(
+                    "%s: p95 %.2f ms, baseline %.2f ms (+%g%% allowed)" % (
+                        name, result['p95_ms'], before['p95_ms'],
+                        tolerance))
+            if (result['queries'] is not None
+                    and before.get('queries') is not None
+                    and result['queries'] > before['queries']):
+                regressions.append(
+                    "%s: %.2f queries per request, baseline %.2f" % (
+                        name, result['queries'], before['queries']))
+            if result['errors'] > before['errors']:
+                regressions.append(
+                    "%s: %d failed requests, baseline %d" % (
+                        name, result['errors'], before['errors']))
+        return regressions
@@ -0,0 +1,77 @@
+import os
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.template import engines
+
+# `{% static 'path' %}` tags with a literal path
+STATIC_TAG = re.compile(r"""{%\s*static\s+(['"])(?P<path>[^'"]+)\1""")
+
+
+class Command(BaseCommand):
+    """
+    Check that the project's templates only link static files under
+    their fingerprinted names, so browsers can cache them for good.
+
+    Run it after `collectstatic`, e.g. in the release phase::
+
+        python manage.py collectstatic --noinput
+        python manage.py check_static_assets
+    """
+    help = "Fail if a template references an unhashed static file."
+
+    def handle(self, *args, **options):
+        static_url = re.compile(
+            r"""(?:src|href)\s*=\s*(['"])/?%s(?P<path>[^'"]+)\1"""
+            % re.escape(settings.STATIC_URL.strip('/') + '/'))
+
+        problems = []
+        checked = 0
+        for template_path in self.project_templates():
+            with open(template_path, encoding='utf-8') as template:
+                source = template.read()
+            name = os.path.relpath(template_path, settings.BASE_DIR)
+
+            # Hard-coded URLs bypass the manifest altogether
+            for match in static_url.finditer(source):
+                problems.append("%s: '%s' is linked without the static tag."
+                                % (name, match.group('path')))
+
+            for match in STATIC_TAG.finditer(source):
+                checked += 1
+                path = match.group('path')
+                try:
+                    stored_name = staticfiles_storage.stored_name(path)
+                except ValueError:
+                    # Missing from the collected manifest
+                    stored_name = path
+                if stored_name == path:
+                    problems.append(
+                        "%s: '%s' has no fingerprinted name." % (name, path))
+
+        if problems:
+            raise CommandError(
+                "Unhashed static assets (run collectstatic first):\n%s"
+                % '\n'.join(problems))
+
+        self.stdout.write(self.style.SUCCESS(
+            "All %d static reference(s) are fingerprinted." % checked))
+
+    def project_templates(self):
+        """
+        Yield the paths of the templates that belong to the project,
+        not to installed packages.
+        """
+        base_dir = str(settings.BASE_DIR)
+        for engine in engines.all():
+            for directory in engine.template_dirs:
+                directory = str(directory)
+                if (not directory.startswith(base_dir)
+                        or 'site-packages' in directory):
+                    continue
+                for root, dirs, files in os.walk(directory):
+                    for filename in sorted(files):
+                        if filename.endswith(('.html', '.txt')):
+                            yield os.path.join(root, filename)
@@ -0,0 +1,78 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from task_management.dashboard import (
+    PAGE_SIZE,
+    SECTIONS,
+    VISIBILITY_WINDOWS,
+    section_queryset,
+    task_count_aggregates,
+)
+from task_management.models import Task, TaskStats
+
+
+class Command(BaseCommand):
+    """
+    Print the database query plan for each task dashboard query.
+
+    Use it to check that the `Task` indexes are picked up for a given
+    user, e.g.::
+
+        python manage.py explain_dashboard alice --visibility all --analyze
+    """
+    help = "Print EXPLAIN output for the task dashboard queries."
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('--status', default='')
+        parser.add_argument('--priority', default='')
+        parser.add_argument('--category', default='')
+        parser.add_argument(
+            '--visibility',
+            default='7_days',
+            choices=list(VISIBILITY_WINDOWS) + ['all'],
+        )
+        parser.add_argument(
+            '--analyze',
+            action='store_true',
+            help="Run the queries and report actual timings "
+                 "(PostgreSQL only).",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(
+                "User '%s' does not exist." % options['username'])
+
+        today = timezone.now().date()
+        filters = {
+            'status': options['status'],
+            'priority': options['priority'],
+            'category': options['category'],
+            'visibility': options['visibility'],
+        }
+        explain_options = {'analyze': True} if options['analyze'] else {}
+
+        # `aggregate()` evaluates immediately, so explain the grouped
+        # equivalent of the fallback count, which scans the same rows
+        # with the same filters.
+        queries = [
+            ('Task counters', TaskStats.objects.filter(pk=user.pk)),
+            ('Task counts (before the overdue sweep)',
+             Task.objects.filter(user=user).values('user')
+             .annotate(**task_count_aggregates(today))),
+        ]
+        for section in SECTIONS:
+            queries.append((
+                'Section: %s (first page)' % section,
+                section_queryset(user, section, filters, today)[:PAGE_SIZE],
+            ))
+
+        for name, queryset in queries:
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            self.stdout.write(str(queryset.query))
+            self.stdout.write(queryset.explain(**explain_options))
+            self.stdout.write('')
@@ -0,0 +1,63 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from task_management.dashboard import VISIBILITY_WINDOWS
+from task_management.export import (
+    EXPORT_CHUNK_SIZE,
+    EXPORT_FORMATS,
+    get_export_filters,
+    iter_export,
+)
+
+
+class Command(BaseCommand):
+    """
+    Export a user's tasks as CSV or JSON Lines, e.g.::
+
+        python manage.py export_tasks alice --format jsonl -o alice.jsonl
+    """
+    help = "Stream a user's tasks to a CSV or JSON Lines file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument(
+            '--format', default='csv', choices=list(EXPORT_FORMATS))
+        parser.add_argument(
+            '-o', '--output',
+            help="File to write to (defaults to standard output).",
+        )
+        parser.add_argument('--status', default='')
+        parser.add_argument('--priority', default='')
+        parser.add_argument('--category', default='')
+        parser.add_argument(
+            '--visibility',
+            default='',
+            choices=[''] + list(VISIBILITY_WINDOWS) + ['all'],
+            help="Only export tasks in the dashboard's upcoming window.",
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(
+                "User '%s' does not exist." % options['username'])
+
+        lines = iter_export(
+            user,
+            get_export_filters(options),
+            timezone.now().date(),
+            options['format'],
+            chunk_size=options['chunk_size'],
+        )
+
+        if options['output']:
+            with open(options['output'], 'w', newline='',
+                      encoding='utf-8') as output:
+                output.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from task_management.recurrence import generate_due_occurrences
+
+
+class Command(BaseCommand):
+    """
+    Create the upcoming occurrences of the recurring tasks.
+
+    Occurrences are only generated TASK_RECURRENCE_HORIZON_DAYS ahead,
+    so run it once a day from a scheduler, e.g.::
+
+        python manage.py generate_occurrences --batch-size 1000
+    """
+    help = "Generate the upcoming occurrences of recurring tasks."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help="Number of series processed per batch.",
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+
+        started = time.monotonic()
+        result = generate_due_occurrences(batch_size=options['batch_size'])
+        elapsed = time.monotonic() - started
+
+        self.stdout.write(self.style.SUCCESS(
+            "Created %d occurrence(s) in %d batch(es) (%.3fs)." % (
+                result['created'], result['batches'], elapsed)
+        ))
@@ -0,0 +1,91 @@
+import csv
+import io
+import os
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from task_management.importer import (
+    IMPORT_ENCODING,
+    IMPORT_FORMATS,
+    check_encoding,
+    import_tasks,
+)
+
+
+class Command(BaseCommand):
+    """
+    Import tasks for a user from a CSV or JSON Lines file, e.g.::
+
+        python manage.py import_tasks alice backlog.csv --report errors.csv
+
+    The file uses the same columns as `export_tasks`. Invalid records are
+    skipped and listed in the report.
+    """
+    help = "Bulk import a user's tasks from a CSV or JSON Lines file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('path')
+        parser.add_argument(
+            '--format',
+            choices=IMPORT_FORMATS,
+            help="File format (defaults to the file extension).",
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.TASK_BULK_BATCH_SIZE,
+            help="Number of records validated and inserted at a time.",
+        )
+        parser.add_argument(
+            '--report',
+            help="CSV file listing the rejected records and their errors.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(
+                "User '%s' does not exist." % options['username'])
+
+        import_format = options['format'] or os.path.splitext(
+            options['path'])[1].lstrip('.').lower()
+        if import_format not in IMPORT_FORMATS:
+            raise CommandError(
+                "Unknown format '%s', use --format." % import_format)
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+
+        started = time.monotonic()
+        with open(options['path'], 'rb') as file:
+            try:
+                check_encoding(file)
+            except UnicodeDecodeError as e:
+                raise CommandError("The file must be UTF-8 encoded: %s." % e)
+            stream = io.TextIOWrapper(
+                file, encoding=IMPORT_ENCODING, newline='')
+            result = import_tasks(
+                user, stream, import_format,
+                batch_size=options['batch_size'])
+        elapsed = time.monotonic() - started
+
+        if options['report']:
+            with open(options['report'], 'w', newline='',
+                      encoding='utf-8') as report:
+                writer = csv.writer(report)
+                writer.writerow(['line', 'errors'])
+                for line_number, errors in result['errors']:
+                    writer.writerow([line_number, '; '.join(errors)])
+        else:
+            for line_number, errors in result['errors']:
+                self.stderr.write(
+                    "Line %d: %s" % (line_number, '; '.join(errors)))
+
+        self.stdout.write(self.style.SUCCESS(
+            "Imported %d task(s), rejected %d record(s) (%.3fs)." % (
+                result['created'], len(result['errors']), elapsed)
+        ))
@@ -0,0 +1,66 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from task_management.overdue import mark_overdue_tasks
+
+
+class Command(BaseCommand):
+    """
+    Mark every past-due 'To Do' and 'In Progress' task as 'Overdue'.
+
+    Run it once a day from a scheduler, or keep it running in-process
+    with `--interval`, e.g.::
+
+        python manage.py mark_overdue --interval 3600
+    """
+    help = "Move past-due pending tasks to 'Overdue' in batched updates."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help="Number of tasks updated per UPDATE statement.",
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=0,
+            help="Keep running and sweep again every INTERVAL seconds.",
+        )
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=0,
+            help="Stop after this many sweeps when using --interval "
+                 "(0 runs until interrupted).",
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+
+        iterations = 0
+        while True:
+            self.sweep(options['batch_size'])
+            iterations += 1
+
+            if not options['interval']:
+                break
+            if options['iterations'] and iterations >= options['iterations']:
+                break
+            time.sleep(options['interval'])
+
+    def sweep(self, batch_size):
+        """
+        Run a single sweep and report how many tasks were updated.
+        """
+        started = time.monotonic()
+        result = mark_overdue_tasks(batch_size=batch_size)
+        elapsed = time.monotonic() - started
+
+        self.stdout.write(self.style.SUCCESS(
+            "Marked %d task(s) as overdue in %d batch(es) (%.3fs)." % (
+                result['updated'], result['batches'], elapsed)
+        ))
@@ -0,0 +1,70 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from task_management.stats import rebuild_task_stats
+
+
+class Command(BaseCommand):
+    """
+    Recompute the per-user task counters shown on the dashboard from
+    the tasks themselves.
+
+    Use `--verify` to only report the users whose counters drifted,
+    e.g. after tasks were changed with raw SQL, and fail if any did::
+
+        python manage.py rebuild_task_stats --verify
+    """
+    help = "Rebuild or verify the per-user task counters."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'usernames',
+            nargs='*',
+            help="Only rebuild the counters of these users.",
+        )
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help="Report mismatching counters without fixing them.",
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help="Number of users counted per query.",
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+
+        user_ids = None
+        if options['usernames']:
+            users = dict(User.objects.filter(
+                username__in=options['usernames']).values_list(
+                'username', 'pk'))
+            missing = sorted(set(options['usernames']) - set(users))
+            if missing:
+                raise CommandError(
+                    "Unknown user(s): %s." % ', '.join(missing))
+            user_ids = list(users.values())
+
+        result = rebuild_task_stats(
+            user_ids, batch_size=options['batch_size'],
+            verify=options['verify'])
+        mismatched = result['mismatched']
+
+        if options['verify']:
+            if mismatched:
+                raise CommandError(
+                    "%d of %d user(s) have mismatching counters: %s." % (
+                        len(mismatched), result['checked'],
+                        ', '.join(map(str, mismatched))))
+            self.stdout.write(self.style.SUCCESS(
+                "The counters of %d user(s) are consistent."
+                % result['checked']))
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            "Checked %d user(s), rebuilt the counters of %d." % (
+                result['checked'], len(mismatched))))
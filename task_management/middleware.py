@@ -0,0 +1,168 @@
+import json
+import logging
+import time
+from collections import Counter
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.backends.django import DjangoTemplates
+
+logger = logging.getLogger('task_management.metrics')
+
+# Metrics of the request being handled in the current context
+current_metrics = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    """
+    Query, template and view timings collected for one request.
+    """
+    def __init__(self):
+        self.queries = Counter()
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+        self.view_started = None
+
+    @property
+    def query_count(self):
+        return sum(self.queries.values())
+
+    def __call__(self, execute, sql, params, many, context):
+        """
+        Database execute wrapper timing every query. Queries are grouped
+        by their SQL with placeholders, so the same statement run with
+        different parameters is counted together.
+        """
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += time.perf_counter() - started
+            self.queries[sql] += 1
+
+    def repeated_queries(self, threshold):
+        """
+        Return the statements run at least `threshold` times, the
+        signature of an N+1 pattern, most repeated first.
+        """
+        return [
+            {'sql': sql, 'count': count}
+            for sql, count in self.queries.most_common()
+            if count >= threshold
+        ]
+
+
+class TimedTemplate:
+    """
+    Template of the `TimedDjangoTemplates` backend, adding the time spent
+    rendering the outermost template (includes and extended templates
+    are part of it) to the metrics of the current request.
+    """
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        metrics = current_metrics.get()
+        if metrics is None or metrics.template_depth:
+            return self.template.render(context, request)
+        metrics.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return self.template.render(context, request)
+        finally:
+            metrics.template_time += time.perf_counter() - started
+            metrics.template_depth -= 1
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """
+    Django template backend timing renders for `RequestMetricsMiddleware`
+    (configured in TEMPLATES). Only the templates of this engine are
+    timed, outside of a request they render as usual.
+    """
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name))
+
+
+class RequestMetricsMiddleware:
+    """
+    Record the number of queries, SQL time, template render time and
+    view time of each request, without DEBUG.
+
+    Enabled with REQUEST_METRICS_ENABLED. The timings are logged as one
+    JSON line per request to the `task_management.metrics` logger, at
+    WARNING level when a statement runs at least
+    REQUEST_METRICS_N_PLUS_ONE_THRESHOLD times, and are sent in a
+    `Server-Timing` header when REQUEST_METRICS_SERVER_TIMING is set.
+    Template time is measured by the `TimedDjangoTemplates` backend.
+
+    It is sync-only: the database execute wrappers are installed on the
+    connections of the current thread. Under ASGI, Django runs it in the
+    thread of the request, where the async ORM also runs the request's
+    queries, so they are all recorded.
+    """
+    sync_capable = True
+    async_capable = False
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics))
+                response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        finished = time.perf_counter()
+
+        total_time = finished - started
+        view_time = (finished - metrics.view_started
+                     if metrics.view_started else 0.0)
+        repeated = metrics.repeated_queries(
+            settings.REQUEST_METRICS_N_PLUS_ONE_THRESHOLD)
+
+        if settings.REQUEST_METRICS_SERVER_TIMING:
+            response['Server-Timing'] = ', '.join([
+                'db;dur=%.1f;desc="%d queries"' % (
+                    metrics.sql_time * 1000, metrics.query_count),
+                'template;dur=%.1f' % (metrics.template_time * 1000),
+                'view;dur=%.1f' % (view_time * 1000),
+                'total;dur=%.1f' % (total_time * 1000),
+            ])
+
+        match = request.resolver_match
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            'queries': metrics.query_count,
+            'sql_ms': round(metrics.sql_time * 1000, 2),
+            'template_ms': round(metrics.template_time * 1000, 2),
+            'view_ms': round(view_time * 1000, 2),
+            'total_ms': round(total_time * 1000, 2),
+            'n_plus_one': repeated,
+        }
+        logger.log(logging.WARNING if repeated else logging.INFO,
+                   json.dumps(record), extra={'metrics': record})
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        current_metrics.get().view_started = time.perf_counter()
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.18 on 2026-10-18 13:57
+
+from django.db import migrations, models
+
+from task_management.operations import AddIndexConcurrentlyOnPostgreSQL
+
+
+class Migration(migrations.Migration):
+    # The indexes are built without blocking writes on PostgreSQL, which
+    # can't happen in a transaction
+    atomic = False
+
+    dependencies = [
+        ('task_management', '0002_task_updated_at'),
+    ]
+
+    operations = [
+        AddIndexConcurrentlyOnPostgreSQL(
+            model_name='task',
+            index=models.Index(fields=['user', 'status', 'due_date'], name='task_user_status_due_idx'),
+        ),
+        AddIndexConcurrentlyOnPostgreSQL(
+            model_name='task',
+            index=models.Index(fields=['user', 'due_date'], name='task_user_due_idx'),
+        ),
+        AddIndexConcurrentlyOnPostgreSQL(
+            model_name='task',
+            index=models.Index(condition=models.Q(('status__in', ['To Do', 'In Progress'])), fields=['user', 'due_date'], name='task_user_pending_due_idx'),
+        ),
+        AddIndexConcurrentlyOnPostgreSQL(
+            model_name='task',
+            index=models.Index(fields=['-created_at'], name='task_created_at_idx'),
+        ),
+    ]
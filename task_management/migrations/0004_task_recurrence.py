@@ -0,0 +1,54 @@
+# Generated by Django 4.2.18 on 2026-10-18 14:25
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('task_management', '0003_task_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskRecurrence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=200)),
+                ('description', models.TextField()),
+                ('priority', models.CharField(choices=[('High', 'High'), ('Medium', 'Medium'), ('Low', 'Low')], default='Medium', max_length=10)),
+                ('category', models.CharField(choices=[('Work', 'Work'), ('Personal', 'Personal'), ('Study', 'Study'), ('Health', 'Health'), ('Other', 'Other')], default='Work', max_length=10)),
+                ('frequency', models.CharField(choices=[('DAILY', 'Daily'), ('WEEKLY', 'Weekly'), ('MONTHLY', 'Monthly')], default='WEEKLY', max_length=7)),
+                ('interval', models.PositiveSmallIntegerField(default=1)),
+                ('weekdays', models.CharField(blank=True, max_length=20)),
+                ('count', models.PositiveIntegerField(blank=True, null=True)),
+                ('until', models.DateField(blank=True, null=True)),
+                ('start_date', models.DateField()),
+                ('last_date', models.DateField()),
+                ('generated_count', models.PositiveIntegerField(default=1)),
+                ('active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='taskrecurrence',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='recurrence',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='occurrences', to='task_management.taskrecurrence'),
+        ),
+        migrations.AddConstraint(
+            model_name='task',
+            constraint=models.UniqueConstraint(fields=('recurrence', 'due_date'), name='task_recurrence_due_uniq'),
+        ),
+        migrations.AddIndex(
+            model_name='taskrecurrence',
+            index=models.Index(condition=models.Q(('active', True)), fields=['last_date'], name='recurrence_active_last_idx'),
+        ),
+    ]
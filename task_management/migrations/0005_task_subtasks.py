@@ -0,0 +1,38 @@
+# Generated by Django 4.2.18 on 2026-10-18 14:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('task_management', '0004_task_recurrence'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='completed_subtask_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='subtasks', to='task_management.task'),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='path',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='subtask_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('path', ''), _negated=True), fields=['path'], name='task_path_idx'),
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 4.2.18 on 2026-10-18 14:37
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+STATUS_FIELDS = {
+    'To Do': 'to_do',
+    'In Progress': 'in_progress',
+    'Completed': 'completed',
+    'Overdue': 'overdue',
+}
+PENDING_STATUSES = ['To Do', 'In Progress']
+
+
+def create_task_stats(apps, schema_editor):
+    """
+    Count the tasks of every existing user.
+    """
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    Task = apps.get_model('task_management', 'Task')
+    TaskStats = apps.get_model('task_management', 'TaskStats')
+
+    stats = {
+        pk: TaskStats(user_id=pk)
+        for pk in User.objects.values_list('pk', flat=True).iterator()
+    }
+    for user_id, status, count in (
+            Task.objects.order_by().values_list('user_id', 'status')
+            .annotate(count=models.Count('pk'))):
+        setattr(stats[user_id], STATUS_FIELDS[status], count)
+    for user_id, due_date in (
+            Task.objects.filter(status__in=PENDING_STATUSES).order_by()
+            .values_list('user_id').annotate(models.Min('due_date'))):
+        stats[user_id].next_due_date = due_date
+    TaskStats.objects.bulk_create(stats.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('task_management', '0005_task_subtasks'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='task_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('to_do', models.IntegerField(default=0)),
+                ('in_progress', models.IntegerField(default=0)),
+                ('completed', models.IntegerField(default=0)),
+                ('overdue', models.IntegerField(default=0)),
+                ('next_due_date', models.DateField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name_plural': 'task stats',
+            },
+        ),
+        migrations.RunPython(create_task_stats, migrations.RunPython.noop),
+    ]
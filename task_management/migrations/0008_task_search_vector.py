@@ -0,0 +1,55 @@
+from django.db import migrations
+
+
+# PostgreSQL full-text search: a weighted tsvector generated from the
+# title and description, with a GIN index. SQLite uses an FTS5 table
+# instead, maintained by triggers (see task_management/search.py).
+#
+# Adding a stored generated column rewrites the whole task table under
+# an ACCESS EXCLUSIVE lock: reads and writes of tasks wait until it is
+# done, which takes time proportional to the size of the table. Run
+# this migration in a maintenance window on large databases.
+ADD_SEARCH_VECTOR = (
+    "ALTER TABLE task_management_task "
+    "ADD COLUMN IF NOT EXISTS search_vector tsvector "
+    "GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'B')"
+    ") STORED"
+)
+# The index is then built without blocking writes, which can't happen in
+# a transaction, hence the non-atomic migration
+CREATE_SEARCH_INDEX = (
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS task_search_vector_idx "
+    "ON task_management_task USING GIN (search_vector)"
+)
+DROP_SEARCH_INDEX = "DROP INDEX CONCURRENTLY IF EXISTS task_search_vector_idx"
+DROP_SEARCH_VECTOR = (
+    "ALTER TABLE task_management_task DROP COLUMN IF EXISTS search_vector")
+
+
+def run_on_postgresql(*statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        with schema_editor.connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY can't run in a transaction. The column
+    # is still added under an exclusive lock, see above
+    atomic = False
+
+    dependencies = [
+        ('task_management', '0007_task_user_updated_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_on_postgresql(ADD_SEARCH_VECTOR, CREATE_SEARCH_INDEX),
+            run_on_postgresql(DROP_SEARCH_INDEX, DROP_SEARCH_VECTOR),
+        ),
+    ]
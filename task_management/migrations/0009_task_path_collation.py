@@ -0,0 +1,19 @@
+# Generated by Django 4.2.18 on 2026-10-18 15:51
+
+from django.db import migrations
+import task_management.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('task_management', '0008_task_search_vector'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='task',
+            name='path',
+            field=task_management.models.MaterializedPathField(blank=True, editable=False, max_length=255),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.18 on 2026-10-18 15:52
+
+from django.db import migrations
+
+from task_management.operations import RemoveIndexConcurrentlyOnPostgreSQL
+
+
+class Migration(migrations.Migration):
+    # (user, due_date) lookups are served by the leading columns of the
+    # other composite indexes. Dropped without blocking writes on
+    # PostgreSQL, which can't happen in a transaction
+    atomic = False
+
+    dependencies = [
+        ('task_management', '0009_task_path_collation'),
+    ]
+
+    operations = [
+        RemoveIndexConcurrentlyOnPostgreSQL(
+            model_name='task',
+            name='task_user_due_idx',
+        ),
+    ]
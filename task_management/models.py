@@ -1,8 +1,35 @@
-from django.db import models
+from collections import Counter, defaultdict
+
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Concat, Least, Substr
 from django.utils import timezone
 
+from . import tree
+from .transitions import (
+    PENDING_STATUSES,
+    allowed_next_statuses,
+    validate_status_transition,
+)
+
+
+class MaterializedPathField(models.CharField):
+    """
+    Character field for the materialized paths of tree.py, compared in
+    byte order: the subtree range scans rely on '/' sorting right before
+    '0', but the locale collations PostgreSQL databases default to skip
+    punctuation, so '/1/5/' would sort after '/10'. There the column uses
+    the "C" collation; SQLite already compares bytes, and has no
+    collation of that name.
+    """
+    def db_parameters(self, connection):
+        params = super().db_parameters(connection)
+        if connection.vendor == 'postgresql':
+            params['collation'] = 'C'
+        return params
+
 
 class Task(models.Model):
     """
@@ -96,12 +123,236 @@ class Task(models.Model):
         default=WORK
     )
     due_date = models.DateField()
+    # The series this task is an occurrence of, if it repeats
+    recurrence = models.ForeignKey(
+        'TaskRecurrence',
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name='occurrences',
+    )
+    # Subtasks: the parent task, the materialized path of the subtree
+    # (see tree.py) and counters of the direct subtasks, kept up to date
+    # incrementally as subtasks are added, completed, moved or deleted
+    parent = models.ForeignKey(
+        'self',
+        null=True,
+        blank=True,
+        on_delete=models.CASCADE,
+        related_name='subtasks',
+    )
+    path = MaterializedPathField(
+        max_length=tree.PATH_MAX_LENGTH, blank=True, editable=False)
+    subtask_count = models.PositiveIntegerField(default=0, editable=False)
+    completed_subtask_count = models.PositiveIntegerField(
+        default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        constraints = [
+            # At most one occurrence per date, so generating the
+            # occurrences again (or concurrently) is harmless
+            models.UniqueConstraint(
+                fields=['recurrence', 'due_date'],
+                name='task_recurrence_due_uniq',
+            ),
+        ]
+        indexes = [
+            # Dashboard counters and status filters
+            models.Index(
+                fields=['user', 'status', 'due_date'],
+                name='task_user_status_due_idx',
+            ),
+            # Overdue tasks: only pending tasks are ever looked up by date
+            models.Index(
+                fields=['user', 'due_date'],
+                name='task_user_pending_due_idx',
+                condition=models.Q(status__in=['To Do', 'In Progress']),
+            ),
+            # Conditional GET state and recently updated search results
+            models.Index(
+                fields=['user', 'updated_at'],
+                name='task_user_updated_idx',
+            ),
+            # Admin default ordering
+            models.Index(
+                fields=['-created_at'],
+                name='task_created_at_idx',
+            ),
+            # Subtree range scans
+            models.Index(
+                fields=['path'],
+                name='task_path_idx',
+                condition=~models.Q(path=''),
+            ),
+        ]
+
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """
+        Remember the status the task was loaded with, so status
+        transitions can be validated without fetching the row again.
+        """
+        instance = super().from_db(db, field_names, values)
+        if 'status' in field_names:
+            instance._original_status = values[field_names.index('status')]
+        if 'parent_id' in field_names:
+            instance._original_parent_id = values[
+                field_names.index('parent_id')]
+        if 'due_date' in field_names:
+            instance._original_due_date = values[
+                field_names.index('due_date')]
+        return instance
+
+    @property
+    def original_status(self):
+        """
+        The status currently saved in the database, or `None` for a new
+        task. Only hits the database for instances that weren't loaded
+        from it (e.g. built with an explicit pk or with `status` deferred).
+        """
+        if not self.pk:
+            return None
+        if not hasattr(self, '_original_status'):
+            self._original_status = Task.objects.filter(
+                pk=self.pk).values_list('status', flat=True).first()
+        return self._original_status
+
+    @property
+    def original_parent_id(self):
+        """
+        The parent currently saved in the database, like
+        `original_status`.
+        """
+        if not self.pk:
+            return None
+        if not hasattr(self, '_original_parent_id'):
+            self._original_parent_id = Task.objects.filter(
+                pk=self.pk).values_list('parent_id', flat=True).first()
+        return self._original_parent_id
+
+    @property
+    def original_due_date(self):
+        """
+        The due date currently saved in the database, like
+        `original_status`.
+        """
+        if not self.pk:
+            return None
+        if not hasattr(self, '_original_due_date'):
+            self._original_due_date = Task.objects.filter(
+                pk=self.pk).values_list('due_date', flat=True).first()
+        return self._original_due_date
+
+    @property
+    def tree_path(self):
+        """
+        The materialized path of the task (see tree.py).
+        """
+        return self.path or tree.root_path(self.pk)
+
+    @property
+    def depth(self):
+        """
+        The nesting level of the task, 0 for a top-level task.
+        """
+        return tree.depth(self.tree_path)
+
+    @property
+    def progress(self):
+        """
+        The percentage of completed direct subtasks, or `None` for a task
+        without subtasks.
+        """
+        if not self.subtask_count:
+            return None
+        return round(
+            100 * self.completed_subtask_count / self.subtask_count)
+
+    @property
+    def next_statuses(self):
+        """
+        The statuses the task may be moved to by hand. Pending statuses
+        are left out once the task is past due, as saving it would mark
+        it 'Overdue' again.
+        """
+        statuses = allowed_next_statuses(self.status)
+        if self.due_date < timezone.now().date():
+            statuses = [status for status in statuses
+                        if status not in PENDING_STATUSES]
+        return statuses
+
+    def get_descendants(self):
+        """
+        Return all the subtasks below this task, at any depth, in tree
+        order with one query.
+        """
+        lower, upper = tree.subtree_range(self.tree_path)
+        return Task.objects.filter(
+            path__gte=lower, path__lt=upper).exclude(pk=self.pk).order_by(
+            'path')
+
+    def refresh_from_db(self, using=None, fields=None):
+        """
+        Keep the remembered status and parent in sync when the task is
+        reloaded.
+        """
+        super().refresh_from_db(using=using, fields=fields)
+        if fields is None or 'status' in fields:
+            self._original_status = self.status
+        if fields is None or 'parent' in fields or 'parent_id' in fields:
+            self._original_parent_id = self.parent_id
+        if fields is None or 'due_date' in fields:
+            self._original_due_date = self.due_date
+
+    @classmethod
+    def refresh_subtask_counts(cls, parent_ids):
+        """
+        Recount the direct subtasks of the given tasks, for changes made
+        with bulk operations that bypass `save()`.
+        """
+        def count(**filters):
+            return Coalesce(Subquery(
+                cls.objects.filter(parent=OuterRef('pk'), **filters)
+                .order_by().values('parent').annotate(count=Count('pk'))
+                .values('count')
+            ), 0)
+
+        cls.objects.filter(pk__in=parent_ids).update(
+            subtask_count=count(),
+            completed_subtask_count=count(status=cls.COMPLETED),
+        )
+
+    def _update_subtask_counters(self, previous_parent_id, previous_status):
+        """
+        Adjust the counters of the previous and current parent after the
+        task was created, moved or had its status changed.
+        """
+        was_completed = int(previous_status == self.COMPLETED)
+        is_completed = int(self.status == self.COMPLETED)
+
+        if previous_parent_id == self.parent_id:
+            if self.parent_id and was_completed != is_completed:
+                Task.objects.filter(pk=self.parent_id).update(
+                    completed_subtask_count=F('completed_subtask_count')
+                    + is_completed - was_completed)
+            return
+
+        if previous_parent_id:
+            Task.objects.filter(pk=previous_parent_id).update(
+                subtask_count=F('subtask_count') - 1,
+                completed_subtask_count=F('completed_subtask_count')
+                - was_completed)
+        if self.parent_id:
+            Task.objects.filter(pk=self.parent_id).update(
+                subtask_count=F('subtask_count') + 1,
+                completed_subtask_count=F('completed_subtask_count')
+                + is_completed)
+
     def save(self, *args, **kwargs):
         """
         Override the save method to automatically set the status to
@@ -115,7 +366,48 @@ class Task(models.Model):
         if is_due and is_status_pending:
             self.status = self.OVERDUE
 
-        super().save(*args, **kwargs)
+        adding = self._state.adding
+        previous_status = self.original_status
+        previous_parent_id = self.original_parent_id
+        previous_due_date = self.original_due_date
+
+        # A moved task takes its subtree along: compute its new path now,
+        # and rewrite its descendants' paths once it is saved
+        moved_from = None
+        if not adding and previous_parent_id != self.parent_id:
+            moved_from = self.tree_path
+            self.path = (
+                tree.child_path(self.parent.tree_path, self.pk)
+                if self.parent_id else '')
+
+        # The task, its subtree, its parents and its owner's counters
+        # change together, without a savepoint like Django's own saves
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
+
+            if adding and self.parent_id:
+                self.path = tree.child_path(self.parent.tree_path, self.pk)
+                Task.objects.filter(pk=self.pk).update(path=self.path)
+            if moved_from and moved_from != self.tree_path:
+                lower, upper = tree.subtree_range(moved_from)
+                Task.objects.filter(
+                    path__gte=lower, path__lt=upper).exclude(
+                    pk=self.pk).update(path=Concat(
+                        Value(self.tree_path),
+                        Substr('path', len(moved_from) + 1),
+                        output_field=models.CharField()))
+
+            self._update_subtask_counters(
+                previous_parent_id, previous_status)
+            if adding or self.status != previous_status or (
+                    self.status in PENDING_STATUSES
+                    and self.due_date != previous_due_date):
+                TaskStats.record([(self.user_id, previous_status,
+                                   self.status, self.due_date, 1)])
+
+        self._original_status = self.status
+        self._original_parent_id = self.parent_id
+        self._original_due_date = self.due_date
 
     def clean(self):
         """
@@ -124,44 +416,221 @@ class Task(models.Model):
         2. Task can only be marked 'Completed' if it was previously
         'In Progress'.
         3. Task marked as 'Completed' cannot be reverted back to 'To Do'.
+
+        The transition rules live in
+        :func:`task_management.transitions.validate_status_transition`.
         """
-        # Ensure due date is not in the past
-        if self.due_date < timezone.now().date():
+        # Ensure due date is not in the past (it is unset when the form
+        # already rejected it)
+        if self.due_date and self.due_date < timezone.now().date():
             raise ValidationError("Due date cannot be in the past.")
 
-        # Ensure that 'OVERDUE' cannot be assigned manually
-        if self.status == self.OVERDUE:
-            raise ValidationError(
-                "The status 'Overdue' is automatically set by the system and \
-                cannot be assigned manually.")
+        # Check the status transition against the status the task
+        # was loaded with
+        validate_status_transition(self.original_status, self.status)
 
-        # Only allow status change to 'Completed' if previous was 'In Progress'
-        if self.status == self.COMPLETED:
-            if not self.pk:  # This is a new task
+        # A subtask belongs to the same user, and can't be moved below
+        # itself
+        if self.parent_id:
+            parent = self.parent
+            if parent.user_id != self.user_id:
                 raise ValidationError(
-                    "A new task cannot be marked as 'Completed'.")
-
-            # Check if the current status is 'In Progress' or not
-            previous_status = Task.objects.get(
-                pk=self.pk).status  # Fetch the previous status
-            if previous_status != self.IN_PROGRESS:
+                    "A subtask must belong to the same user as its parent.")
+            if self.pk and parent.tree_path.startswith(self.tree_path):
                 raise ValidationError(
-                    "A task can only be marked as 'Completed' \
-                    after being 'In Progress'.")
+                    "A task can't be a subtask of itself or of its own "
+                    "subtasks.")
+            if len(parent.tree_path) > (
+                    tree.PATH_MAX_LENGTH - tree.MAX_KEY_LENGTH):
+                raise ValidationError("Subtasks can't be nested any deeper.")
 
-        # Ensure a 'Completed' task cannot be changed back to 'In Progress'
-        if self.status == self.IN_PROGRESS:
-            if self.pk and \
-                    Task.objects.get(pk=self.pk).status == self.COMPLETED:
-                raise ValidationError(
-                    "A task marked as 'Completed' cannot be changed back \
-                    to 'In Progress'.")
 
-        # Ensure a 'Completed' task cannot be changed back to 'To Do'
-        if self.status == self.TO_DO:
-            if self.pk and \
-                    Task.objects.get(pk=self.pk).status == self.COMPLETED:
-                raise ValidationError(
-                    "A task marked as 'Completed' cannot be changed back \
-                        to 'To Do'."
-                )
+class TaskStats(models.Model):
+    """
+    Counters of a user's tasks by saved status, so the dashboard reads
+    them with one primary-key lookup.
+
+    Every write path keeps them up to date in the same transaction as
+    the tasks: `Task.save()`, deletes, bulk operations and the overdue
+    sweep. Rows are created with the user, and `rebuild_task_stats`
+    recomputes or verifies them from scratch.
+    """
+    # Counter field of each status
+    STATUS_FIELDS = {
+        Task.TO_DO: 'to_do',
+        Task.IN_PROGRESS: 'in_progress',
+        Task.COMPLETED: 'completed',
+        Task.OVERDUE: 'overdue',
+    }
+
+    user = models.OneToOneField(
+        User,
+        primary_key=True,
+        on_delete=models.CASCADE,
+        related_name='task_stats',
+    )
+    to_do = models.IntegerField(default=0)
+    in_progress = models.IntegerField(default=0)
+    completed = models.IntegerField(default=0)
+    overdue = models.IntegerField(default=0)
+    # No later than the earliest due date of the pending tasks: until
+    # that day, no pending task is past due and the counters match the
+    # dashboard's. It is moved forward by the overdue sweep.
+    next_due_date = models.DateField(null=True, blank=True)
+
+    class Meta:
+        verbose_name_plural = 'task stats'
+
+    def __str__(self):
+        return 'Task stats of %s' % self.user
+
+    def is_current(self, today):
+        """
+        Whether no pending task can be past due on `today`, i.e. the
+        pending counters don't include tasks that are actually overdue.
+        """
+        return self.next_due_date is None or self.next_due_date >= today
+
+    def counts(self):
+        """
+        Return the counters as a dict keyed by field name.
+        """
+        return {
+            field: getattr(self, field)
+            for field in self.STATUS_FIELDS.values()
+        }
+
+    @classmethod
+    def record(cls, changes):
+        """
+        Apply task changes to the counters, with one `UPDATE` per user.
+
+        `changes` is an iterable of `(user_id, previous_status, status,
+        due_date, count)` tuples: `count` tasks of the user moved from
+        `previous_status` to `status`, `None` standing for created or
+        deleted tasks, and `due_date` is their earliest due date.
+
+        Must run in the same transaction as the changes themselves.
+        """
+        deltas = defaultdict(Counter)
+        next_due_dates = {}
+        for user_id, previous_status, status, due_date, count in changes:
+            if previous_status != status:
+                if previous_status in cls.STATUS_FIELDS:
+                    deltas[user_id][cls.STATUS_FIELDS[previous_status]] \
+                        -= count
+                if status in cls.STATUS_FIELDS:
+                    deltas[user_id][cls.STATUS_FIELDS[status]] += count
+            if status in PENDING_STATUSES and due_date:
+                next_due_dates[user_id] = min(
+                    due_date, next_due_dates.get(user_id, due_date))
+
+        for user_id in deltas.keys() | next_due_dates.keys():
+            values = {
+                field: F(field) + delta
+                for field, delta in deltas[user_id].items() if delta
+            }
+            if user_id in next_due_dates:
+                due_date = Value(next_due_dates[user_id],
+                                 output_field=models.DateField())
+                values['next_due_date'] = Least(
+                    Coalesce('next_due_date', due_date), due_date)
+            if values:
+                cls.objects.filter(pk=user_id).update(**values)
+
+
+class TaskRecurrence(models.Model):
+    """
+    A series of repeating tasks.
+
+    The rule is a subset of the iCalendar RRULE: a daily, weekly or
+    monthly frequency, an interval, the days of the week for weekly
+    series, and an optional number of occurrences or end date. The
+    first occurrence is due on `start_date`.
+
+    Occurrences are ordinary `Task` rows created from the series'
+    title, description, priority and category, only a few weeks ahead
+    at a time (see :mod:`task_management.recurrence`). `last_date` and
+    `generated_count` track the latest occurrence generated so far.
+
+    Attributes:
+        user (ForeignKey): The owner of the tasks.
+        title, description, priority, category: Copied to every
+        occurrence.
+        frequency (str): 'DAILY', 'WEEKLY' or 'MONTHLY'.
+        interval (int): Repeat every `interval` days, weeks or months.
+        weekdays (str): Comma-separated days of the week of a weekly
+        series ('MO', 'TU'...), the day of `start_date` when empty.
+        count (int): Total number of occurrences, unlimited when empty.
+        until (DateField): Date of the last possible occurrence.
+        start_date (DateField): Due date of the first occurrence.
+        last_date (DateField): Due date of the latest occurrence
+        generated (or skipped because it was already past).
+        generated_count (int): Number of occurrences up to `last_date`.
+        active (bool): False once the series has ended.
+    """
+    DAILY = 'DAILY'
+    WEEKLY = 'WEEKLY'
+    MONTHLY = 'MONTHLY'
+    FREQUENCY_CHOICES = [
+        (DAILY, 'Daily'),
+        (WEEKLY, 'Weekly'),
+        (MONTHLY, 'Monthly'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    title = models.CharField(max_length=200)
+    description = models.TextField()
+    priority = models.CharField(
+        max_length=10,
+        choices=Task.PRIORITY_CHOICES,
+        default=Task.MEDIUM
+    )
+    category = models.CharField(
+        max_length=10,
+        choices=Task.CATEGORY_CHOICES,
+        default=Task.WORK
+    )
+    frequency = models.CharField(
+        max_length=7,
+        choices=FREQUENCY_CHOICES,
+        default=WEEKLY
+    )
+    interval = models.PositiveSmallIntegerField(default=1)
+    weekdays = models.CharField(max_length=20, blank=True)
+    count = models.PositiveIntegerField(null=True, blank=True)
+    until = models.DateField(null=True, blank=True)
+    start_date = models.DateField()
+    last_date = models.DateField()
+    generated_count = models.PositiveIntegerField(default=1)
+    active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Series that may need more occurrences
+            models.Index(
+                fields=['last_date'],
+                name='recurrence_active_last_idx',
+                condition=models.Q(active=True),
+            ),
+        ]
+
+    def __str__(self):
+        return '%s (%s)' % (self.title, self.rule)
+
+    @property
+    def rule(self):
+        """
+        The recurrence rule in iCalendar RRULE syntax.
+        """
+        parts = ['FREQ=%s' % self.frequency]
+        if self.interval != 1:
+            parts.append('INTERVAL=%d' % self.interval)
+        if self.weekdays:
+            parts.append('BYDAY=%s' % self.weekdays)
+        if self.count:
+            parts.append('COUNT=%d' % self.count)
+        if self.until:
+            parts.append('UNTIL=%s' % self.until.strftime('%Y%m%d'))
+        return ';'.join(parts)
@@ -0,0 +1,52 @@
+from django.contrib.postgres.operations import (
+    AddIndexConcurrently,
+    RemoveIndexConcurrently,
+)
+from django.db.migrations.operations import AddIndex, RemoveIndex
+
+# Migration operations building and dropping indexes without blocking
+# writes to the table on PostgreSQL (CREATE/DROP INDEX CONCURRENTLY),
+# and as usual on other databases. Migrations using them must set
+# `atomic = False`.
+
+
+class AddIndexConcurrentlyOnPostgreSQL(AddIndexConcurrently):
+    """
+    `AddIndexConcurrently` on PostgreSQL, `AddIndex` elsewhere.
+    """
+    def database_forwards(self, app_label, schema_editor, from_state,
+                          to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            return super().database_forwards(
+                app_label, schema_editor, from_state, to_state)
+        return AddIndex.database_forwards(
+            self, app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state,
+                           to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            return super().database_backwards(
+                app_label, schema_editor, from_state, to_state)
+        return AddIndex.database_backwards(
+            self, app_label, schema_editor, from_state, to_state)
+
+
+class RemoveIndexConcurrentlyOnPostgreSQL(RemoveIndexConcurrently):
+    """
+    `RemoveIndexConcurrently` on PostgreSQL, `RemoveIndex` elsewhere.
+    """
+    def database_forwards(self, app_label, schema_editor, from_state,
+                          to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            return super().database_forwards(
+                app_label, schema_editor, from_state, to_state)
+        return RemoveIndex.database_forwards(
+            self, app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state,
+                           to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            return super().database_backwards(
+                app_label, schema_editor, from_state, to_state)
+        return RemoveIndex.database_backwards(
+            self, app_label, schema_editor, from_state, to_state)
@@ -0,0 +1,73 @@
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import invalidate_dashboard_cache_on_commit
+from .events import publish_task_event
+from .models import Task, TaskStats
+from .stats import refresh_next_due_dates, stats_changes
+from .transitions import PENDING_STATUSES
+
+
+def mark_overdue_tasks(today=None, batch_size=1000):
+    """
+    Move every pending task whose due date has passed to 'Overdue'.
+
+    Tasks are processed in primary-key order, `batch_size` rows per
+    `UPDATE`, each batch in its own transaction so long runs don't hold
+    locks on the whole table. Running it again is a no-op until more
+    tasks fall due.
+
+    The owners' `TaskStats` counters are updated along with each batch.
+
+    Returns a dict with the number of tasks `updated` and the number
+    of `batches` issued.
+    """
+    today = today or timezone.now().date()
+    past_due = Task.objects.filter(
+        status__in=PENDING_STATUSES,
+        due_date__lt=today,
+    ).order_by('pk')
+
+    updated = 0
+    batches = 0
+    last_pk = 0
+
+    while True:
+        with transaction.atomic():
+            rows = list(
+                past_due.filter(pk__gt=last_pk)
+                .values_list('pk', 'user_id')[:batch_size]
+            )
+            if not rows:
+                break
+            pks = [pk for pk, user_id in rows]
+
+            # Re-check the status so rows changed since the SELECT are
+            # left untouched
+            batch = Task.objects.filter(
+                pk__in=pks,
+                status__in=PENDING_STATUSES,
+            )
+            changes = stats_changes(batch, Task.OVERDUE)
+            updated += batch.update(
+                status=Task.OVERDUE, updated_at=timezone.now())
+            TaskStats.record(changes)
+
+        # Bulk updates don't send model signals, so invalidate the
+        # cached dashboards of the affected users and notify them
+        # explicitly
+        user_pks = {}
+        for pk, user_id in rows:
+            user_pks.setdefault(user_id, []).append(pk)
+        for user_id, pks_of_user in user_pks.items():
+            invalidate_dashboard_cache_on_commit(user_id)
+            publish_task_event(user_id, 'overdue', pks_of_user)
+
+        batches += 1
+        last_pk = pks[-1]
+
+    # No pending task is past due any more, so the counters match the
+    # dashboard's again until their next due date
+    refresh_next_due_dates(today)
+
+    return {'updated': updated, 'batches': batches}
@@ -0,0 +1,279 @@
+import calendar
+from datetime import date, datetime, timedelta
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import invalidate_dashboard_cache_on_commit
+from .events import publish_task_event
+from .models import Task, TaskRecurrence
+from .stats import rebuild_task_stats
+
+
+# iCalendar day codes, in `date.weekday()` order
+WEEKDAYS = ['MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU']
+
+# Occurrences of a series are unique per due date (see
+# `task_recurrence_due_uniq`), so moving one onto the date of another
+# is refused
+OCCURRENCE_DATE_TAKEN_MESSAGE = (
+    "Another occurrence of this task is already due on that date.")
+
+
+def parse_rrule(rule):
+    """
+    Parse the supported subset of an iCalendar RRULE, e.g.
+    'FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,TH;COUNT=10', into the matching
+    `TaskRecurrence` field values.
+
+    Raises `ValidationError` for malformed rules and unsupported parts.
+    """
+    rule = rule.strip()
+    if rule.upper().startswith('RRULE:'):
+        rule = rule[len('RRULE:'):]
+
+    parts = {}
+    for part in filter(None, rule.upper().split(';')):
+        name, sep, value = part.partition('=')
+        if not sep or not value:
+            raise ValidationError("Invalid rule part '%s'." % part)
+        parts[name] = value
+
+    unsupported = set(parts) - {'FREQ', 'INTERVAL', 'BYDAY', 'COUNT',
+                                'UNTIL', 'WKST'}
+    if unsupported:
+        raise ValidationError(
+            "Unsupported rule part(s): %s." % ', '.join(sorted(unsupported)))
+
+    frequency = parts.get('FREQ')
+    if frequency not in dict(TaskRecurrence.FREQUENCY_CHOICES):
+        raise ValidationError("FREQ must be DAILY, WEEKLY or MONTHLY.")
+    values = {'frequency': frequency, 'interval': 1, 'weekdays': '',
+              'count': None, 'until': None}
+
+    try:
+        if 'INTERVAL' in parts:
+            values['interval'] = int(parts['INTERVAL'])
+        if 'COUNT' in parts:
+            values['count'] = int(parts['COUNT'])
+        if 'UNTIL' in parts:
+            values['until'] = datetime.strptime(
+                parts['UNTIL'][:8], '%Y%m%d').date()
+    except ValueError:
+        raise ValidationError("Invalid INTERVAL, COUNT or UNTIL.")
+    if values['interval'] < 1 or (values['count'] is not None
+                                  and values['count'] < 1):
+        raise ValidationError("INTERVAL and COUNT must be at least 1.")
+    if values['count'] and values['until']:
+        raise ValidationError("COUNT and UNTIL can't be combined.")
+
+    if 'BYDAY' in parts:
+        if frequency != TaskRecurrence.WEEKLY:
+            raise ValidationError("BYDAY is only supported for WEEKLY rules.")
+        days = parts['BYDAY'].split(',')
+        if not days or any(day not in WEEKDAYS for day in days):
+            raise ValidationError("BYDAY must list days like MO,WE,FR.")
+        values['weekdays'] = ','.join(
+            sorted(set(days), key=WEEKDAYS.index))
+
+    return values
+
+
+def _add_months(day, months):
+    """
+    Return the date `months` months after `day`, or `None` when that
+    month has no such day (e.g. the 31st).
+    """
+    month_index = day.year * 12 + day.month - 1 + months
+    year, month = divmod(month_index, 12)
+    if day.day > calendar.monthrange(year, month + 1)[1]:
+        return None
+    return date(year, month + 1, day.day)
+
+
+def next_occurrence(recurrence, after):
+    """
+    Return the due date of the occurrence following the one due on
+    `after`, which must itself be an occurrence (e.g. `last_date`).
+
+    Each step is computed directly from `after`, so long-running series
+    don't need to be replayed from their start.
+    """
+    start = recurrence.start_date
+    interval = recurrence.interval
+
+    if recurrence.frequency == TaskRecurrence.DAILY:
+        return after + timedelta(days=interval)
+
+    if recurrence.frequency == TaskRecurrence.MONTHLY:
+        # Months without the start day are skipped, as in iCalendar
+        months = (after.year - start.year) * 12 + after.month - start.month
+        while True:
+            months += interval
+            occurrence = _add_months(start, months)
+            if occurrence:
+                return occurrence
+
+    weekdays = sorted(
+        WEEKDAYS.index(day) for day in recurrence.weekdays.split(',')
+        if day) or [start.weekday()]
+    # Later days in the same week, then the first day `interval` weeks on
+    for weekday in weekdays:
+        if weekday > after.weekday():
+            return after + timedelta(days=weekday - after.weekday())
+    week_start = after - timedelta(days=after.weekday())
+    return week_start + timedelta(weeks=interval, days=weekdays[0])
+
+
+def get_horizon(today=None):
+    """
+    Return the last due date occurrences are generated up to.
+    """
+    today = today or timezone.now().date()
+    return today + timedelta(days=settings.TASK_RECURRENCE_HORIZON_DAYS)
+
+
+def plan_occurrences(recurrence, today, horizon):
+    """
+    Advance `recurrence` and return the due dates of its occurrences to
+    create: those up to `horizon`, and at least the next one.
+
+    Occurrences that are already past are skipped rather than created
+    as overdue tasks. The series is deactivated once it ends.
+    """
+    due_dates = []
+    while recurrence.active:
+        occurrence = next_occurrence(recurrence, recurrence.last_date)
+        if ((recurrence.count and recurrence.generated_count
+                >= recurrence.count)
+                or (recurrence.until and occurrence > recurrence.until)):
+            recurrence.active = False
+            break
+        # Enough ahead once an upcoming occurrence exists and the next
+        # one is beyond the horizon
+        if recurrence.last_date >= today and occurrence > horizon:
+            break
+        recurrence.last_date = occurrence
+        recurrence.generated_count += 1
+        if occurrence >= today:
+            due_dates.append(occurrence)
+    return due_dates
+
+
+def occurrence_date_taken(task, due_date):
+    """
+    Whether another occurrence of the task's series is due on
+    `due_date`. Always false for tasks that don't repeat.
+    """
+    return task.recurrence_id is not None and Task.objects.filter(
+        recurrence_id=task.recurrence_id, due_date=due_date).exclude(
+        pk=task.pk).exists()
+
+
+def generate_occurrences(recurrences, today=None):
+    """
+    Create the missing occurrences of `recurrences` (a list of series)
+    with one `bulk_create`, and save the series' progress with one
+    `bulk_update`.
+
+    Returns the number of occurrences created.
+    """
+    today = today or timezone.now().date()
+    horizon = get_horizon(today)
+
+    tasks = []
+    changed = []
+    for recurrence in recurrences:
+        state = (recurrence.last_date, recurrence.active)
+        for due_date in plan_occurrences(recurrence, today, horizon):
+            tasks.append(Task(
+                user_id=recurrence.user_id,
+                recurrence=recurrence,
+                title=recurrence.title,
+                description=recurrence.description,
+                priority=recurrence.priority,
+                category=recurrence.category,
+                due_date=due_date,
+            ))
+        if (recurrence.last_date, recurrence.active) != state:
+            changed.append(recurrence)
+
+    if not changed:
+        return 0
+
+    with transaction.atomic():
+        # Occurrences created concurrently are skipped by the unique
+        # constraint on (recurrence, due_date)
+        Task.objects.bulk_create(
+            tasks, batch_size=settings.TASK_BULK_BATCH_SIZE,
+            ignore_conflicts=True)
+        TaskRecurrence.objects.bulk_update(
+            changed, ['last_date', 'generated_count', 'active'],
+            batch_size=settings.TASK_BULK_BATCH_SIZE)
+        # Which occurrences were skipped as conflicts isn't known, so
+        # recount the owners' tasks rather than adding them up
+        rebuild_task_stats({task.user_id for task in tasks})
+
+    # Bulk inserts don't send model signals, so invalidate the cached
+    # dashboards of the affected users and notify them explicitly
+    for user_id in {task.user_id for task in tasks}:
+        invalidate_dashboard_cache_on_commit(user_id)
+        publish_task_event(user_id, 'created')
+
+    return len(tasks)
+
+
+def generate_due_occurrences(today=None, batch_size=500):
+    """
+    Generate the occurrences of every series that falls short of the
+    horizon, `batch_size` series at a time in primary-key order.
+
+    Returns a dict with the number of occurrences `created` and the
+    number of `batches` processed.
+    """
+    today = today or timezone.now().date()
+    pending = TaskRecurrence.objects.filter(
+        active=True,
+        last_date__lt=get_horizon(today),
+    ).order_by('pk')
+
+    created = 0
+    batches = 0
+    last_pk = 0
+
+    while True:
+        recurrences = list(pending.filter(pk__gt=last_pk)[:batch_size])
+        if not recurrences:
+            break
+        created += generate_occurrences(recurrences, today)
+        batches += 1
+        last_pk = recurrences[-1].pk
+
+    return {'created': created, 'batches': batches}
+
+
+def make_recurring(task, rule):
+    """
+    Turn a saved task into the first occurrence of a new series
+    following `rule` (see `parse_rrule`), and generate the next
+    occurrences.
+
+    Returns the new `TaskRecurrence`.
+    """
+    with transaction.atomic():
+        recurrence = TaskRecurrence.objects.create(
+            user_id=task.user_id,
+            title=task.title,
+            description=task.description,
+            priority=task.priority,
+            category=task.category,
+            start_date=task.due_date,
+            last_date=task.due_date,
+            **parse_rrule(rule),
+        )
+        Task.objects.filter(pk=task.pk).update(recurrence=recurrence)
+        task.recurrence = recurrence
+        generate_occurrences([recurrence])
+    return recurrence
@@ -0,0 +1,123 @@
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+from .models import Task
+
+
+TASK_TABLE = Task._meta.db_table
+
+# SQLite: FTS5 index over the title and description, kept in sync with
+# the task table by triggers. The update trigger only fires when the
+# indexed columns change, not on status or counter updates. (PostgreSQL
+# uses a generated tsvector column, added by migration 0008.)
+FTS_TABLE = TASK_TABLE + '_fts'
+
+SQLITE_SEARCH_INDEX = [
+    # Replaced by {fts}_update_text, which fired on every update
+    "DROP TRIGGER IF EXISTS {fts}_update",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+    "title, description, content='{table}', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table} "
+    "BEGIN "
+    "INSERT INTO {fts}(rowid, title, description) "
+    "VALUES (new.id, new.title, new.description); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table} "
+    "BEGIN "
+    "INSERT INTO {fts}({fts}, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS {fts}_update_text "
+    "AFTER UPDATE OF title, description ON {table} "
+    # `save()` writes every column, so also compare the values
+    "WHEN old.title IS NOT new.title "
+    "OR old.description IS NOT new.description "
+    "BEGIN "
+    "INSERT INTO {fts}({fts}, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); "
+    "INSERT INTO {fts}(rowid, title, description) "
+    "VALUES (new.id, new.title, new.description); "
+    "END",
+]
+
+
+def install_search_index(using=None, **kwargs):
+    """
+    Create the SQLite full-text index of the tasks if it doesn't exist
+    yet.
+
+    Connected to `post_migrate`: the index lives outside of the model,
+    and the triggers are dropped whenever a migration rebuilds the task
+    table, so they are recreated (and the index rebuilt) after every
+    migration run.
+    """
+    db = connections[using or 'default']
+    if (db.vendor != 'sqlite'
+            or TASK_TABLE not in db.introspection.table_names()):
+        return
+
+    with db.cursor() as cursor:
+        cursor.execute(
+            "SELECT count(*) FROM sqlite_master WHERE type = 'trigger' "
+            "AND name LIKE %s", [FTS_TABLE + '_%'])
+        (triggers,) = cursor.fetchone()
+        for statement in SQLITE_SEARCH_INDEX:
+            cursor.execute(statement.format(fts=FTS_TABLE, table=TASK_TABLE))
+        # Index rows written while the triggers were missing
+        if triggers < 3:
+            cursor.execute(
+                "INSERT INTO {fts}({fts}) VALUES ('rebuild')".format(
+                    fts=FTS_TABLE))
+
+
+def fts_query(query):
+    """
+    Turn free text into an FTS5 query matching every word as a prefix,
+    with any FTS5 syntax in the input neutralised.
+    """
+    return ' '.join('"%s"*' % word for word in re.findall(r'\w+', query))
+
+
+def search_tasks(queryset, query):
+    """
+    Filter a task queryset down to the tasks matching `query` and order
+    them by relevance, best match first.
+
+    Uses the PostgreSQL tsvector index or the SQLite FTS5 index, and
+    falls back to a case-insensitive scan on other databases. The
+    result is an ordinary queryset, so it can be filtered further and
+    sliced for pagination.
+    """
+    vendor = connections[queryset.db].vendor
+    if vendor == 'postgresql':
+        tsquery = "websearch_to_tsquery('english', %s)"
+        return queryset.annotate(
+            rank=RawSQL(
+                "ts_rank(search_vector, %s)" % tsquery, [query],
+                output_field=FloatField()),
+        ).filter(RawSQL(
+            "search_vector @@ %s" % tsquery, [query],
+            output_field=BooleanField(),
+        )).order_by('-rank', 'pk')
+
+    if vendor == 'sqlite':
+        match = fts_query(query)
+        if not match:
+            return queryset.none()
+        # bm25() is lower for better matches; the title weighs more
+        return queryset.filter(pk__in=RawSQL(
+            "SELECT rowid FROM {fts} WHERE {fts} MATCH %s".format(
+                fts=FTS_TABLE), [match],
+        )).annotate(rank=RawSQL(
+            "SELECT bm25({fts}, 10.0, 1.0) FROM {fts} "
+            "WHERE {fts} MATCH %s AND rowid = {table}.id".format(
+                fts=FTS_TABLE, table=TASK_TABLE), [match],
+            output_field=FloatField(),
+        )).order_by('rank', 'pk')
+
+    return queryset.filter(
+        Q(title__icontains=query) | Q(description__icontains=query)
+    ).order_by('-updated_at', 'pk')
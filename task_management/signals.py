@@ -0,0 +1,144 @@
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.contrib.auth.models import User
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import invalidate_dashboard_cache_on_commit
+from .events import publish_task_event
+from .models import Task, TaskStats
+
+# Tasks deleted within `deleting_tasks()` in the current thread
+_deleting = threading.local()
+
+
+def deleting_in_bulk():
+    """
+    Whether tasks are being deleted within `deleting_tasks()`, which
+    takes over the work of the post_delete receivers.
+    """
+    return getattr(_deleting, 'tasks', None) is not None
+
+
+@contextmanager
+def deleting_tasks():
+    """
+    Context manager to delete many tasks at once (e.g. with
+    `QuerySet.delete()`, subtasks included) in the current transaction.
+
+    The post_delete receivers only collect the deleted tasks. On exit,
+    the counters of their owners and of the parents left are updated
+    with one query each, and every owner's dashboard is invalidated and
+    sent a single 'deleted' event, instead of queries and commit
+    callbacks for each task.
+    """
+    deleted = _deleting.tasks = []
+    try:
+        yield
+    finally:
+        _deleting.tasks = None
+
+    deleted_ids = {pk for pk, _, _, _ in deleted}
+    TaskStats.record([(user_id, status, None, None, 1)
+                      for _, user_id, _, status in deleted])
+    Task.refresh_subtask_counts({
+        parent_id for _, _, parent_id, _ in deleted
+        if parent_id and parent_id not in deleted_ids
+    })
+
+    ids_by_user = defaultdict(list)
+    for pk, user_id, _, _ in deleted:
+        ids_by_user[user_id].append(pk)
+    for user_id, ids in ids_by_user.items():
+        invalidate_dashboard_cache_on_commit(user_id)
+        publish_task_event(user_id, 'deleted', ids)
+
+
+@receiver(post_delete, sender=Task)
+def collect_deleted_task(sender, instance, **kwargs):
+    """
+    Collect the task for `deleting_tasks()`, before the deletion clears
+    its primary key.
+    """
+    if deleting_in_bulk():
+        _deleting.tasks.append((instance.pk, instance.user_id,
+                                instance.parent_id, instance.original_status))
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def invalidate_task_owner_dashboard(sender, instance, **kwargs):
+    """
+    Invalidate the cached dashboard of the task's owner whenever one of
+    their tasks is saved or deleted (views, admin, shell...), once the
+    change is committed.
+    """
+    if deleting_in_bulk():
+        return
+    invalidate_dashboard_cache_on_commit(instance.user_id)
+
+
+@receiver(post_save, sender=Task)
+def publish_task_saved(sender, instance, created, raw=False, **kwargs):
+    """
+    Push the saved task to its owner's open dashboards. The snapshot of
+    the previous status is still that of the loaded task here.
+    """
+    if raw:
+        return
+    if created:
+        kind = 'created'
+    elif (instance.status == Task.OVERDUE
+            and instance.original_status != Task.OVERDUE):
+        kind = 'overdue'
+    else:
+        kind = 'updated'
+    publish_task_event(instance.user_id, kind, [instance.pk])
+
+
+@receiver(post_delete, sender=Task)
+def publish_task_deleted(sender, instance, **kwargs):
+    """
+    Push the deleted task to its owner's open dashboards.
+    """
+    if deleting_in_bulk():
+        return
+    publish_task_event(instance.user_id, 'deleted', [instance.pk])
+
+
+@receiver(post_delete, sender=Task)
+def update_parent_subtask_counts(sender, instance, **kwargs):
+    """
+    Remove a deleted subtask from its parent's counters. Updating a
+    parent deleted along with it is a no-op.
+    """
+    if instance.parent_id and not deleting_in_bulk():
+        Task.objects.filter(pk=instance.parent_id).update(
+            subtask_count=F('subtask_count') - 1,
+            completed_subtask_count=F('completed_subtask_count') - int(
+                instance.original_status == Task.COMPLETED),
+        )
+
+
+@receiver(post_delete, sender=Task)
+def update_owner_task_stats(sender, instance, **kwargs):
+    """
+    Remove a deleted task from its owner's counters, in the delete's
+    transaction.
+    """
+    if deleting_in_bulk():
+        return
+    TaskStats.record([(instance.user_id, instance.original_status, None,
+                       None, 1)])
+
+
+@receiver(post_save, sender=User)
+def create_task_stats(sender, instance, created, raw=False, **kwargs):
+    """
+    Start the counters of a new user at zero.
+    """
+    if created and not raw:
+        TaskStats.objects.create(user=instance)
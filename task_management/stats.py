@@ -0,0 +1,141 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count, Min, OuterRef, Q, Subquery
+
+from .models import Task, TaskStats
+from .transitions import PENDING_STATUSES
+
+
+def stats_aggregates(prefix=''):
+    """
+    Aggregates computing the `TaskStats` fields from scratch, through
+    the `prefix` relation to the tasks (e.g. 'task__' from users).
+    """
+    aggregates = {
+        field: Count(prefix + 'pk', filter=Q(**{prefix + 'status': status}))
+        for status, field in TaskStats.STATUS_FIELDS.items()
+    }
+    aggregates['next_due_date'] = Min(
+        prefix + 'due_date',
+        filter=Q(**{prefix + 'status__in': PENDING_STATUSES}))
+    return aggregates
+
+
+def stats_changes(queryset, status=None):
+    """
+    Describe the tasks of `queryset` for `TaskStats.record`, grouped by
+    user and status, as if they moved to `status` (their current
+    status when `None`). Use it before bulk updates or deletes.
+    """
+    rows = (
+        queryset.order_by().values_list('user_id', 'status')
+        .annotate(count=Count('pk'), earliest_due_date=Min('due_date'))
+    )
+    return [
+        (user_id, previous_status, status or previous_status, due_date,
+         count)
+        for user_id, previous_status, count, due_date in rows
+    ]
+
+
+def created_changes(tasks):
+    """
+    Describe new `tasks`, e.g. inserted with `bulk_create`, for
+    `TaskStats.record`.
+    """
+    return [(task.user_id, None, task.status, task.due_date, 1)
+            for task in tasks]
+
+
+def is_consistent(stats, values):
+    """
+    Whether the `stats` row agrees with `values` computed from scratch:
+    the same counters, and a `next_due_date` that is no later than the
+    actual one.
+    """
+    if stats.counts() != {field: values[field]
+                          for field in TaskStats.STATUS_FIELDS.values()}:
+        return False
+    if values['next_due_date'] is None:
+        return True
+    return (stats.next_due_date is not None
+            and stats.next_due_date <= values['next_due_date'])
+
+
+def rebuild_task_stats(user_ids=None, batch_size=1000, verify=False):
+    """
+    Recompute the counters of the given users, or of every user,
+    `batch_size` users at a time in primary-key order, from their
+    tasks. Missing and inconsistent rows are rewritten, unless
+    `verify` is set.
+
+    The rows of each batch are locked while their tasks are counted,
+    so concurrent changes are applied on top of the recomputed values.
+
+    Returns a dict with the number of users `checked` and the ids of
+    those whose counters were `mismatched`.
+    """
+    users = User.objects.order_by('pk')
+    if user_ids is not None:
+        users = users.filter(pk__in=user_ids)
+    fields = list(TaskStats.STATUS_FIELDS.values()) + ['next_due_date']
+
+    checked = 0
+    mismatched = []
+    last_pk = 0
+
+    while True:
+        pks = list(users.filter(pk__gt=last_pk).values_list(
+            'pk', flat=True)[:batch_size])
+        if not pks:
+            break
+
+        with transaction.atomic():
+            rows = TaskStats.objects.filter(pk__in=pks)
+            existing = (rows if verify else rows.select_for_update()
+                        ).in_bulk()
+            computed = (
+                User.objects.filter(pk__in=pks).order_by()
+                .values('pk').annotate(**stats_aggregates('task__'))
+            )
+
+            created = []
+            updated = []
+            for values in computed:
+                user_id = values.pop('pk')
+                stats = existing.get(user_id)
+                if stats is not None and is_consistent(stats, values):
+                    continue
+                mismatched.append(user_id)
+                if stats is None:
+                    created.append(TaskStats(user_id=user_id, **values))
+                    continue
+                for field in fields:
+                    setattr(stats, field, values[field])
+                updated.append(stats)
+
+            if not verify:
+                TaskStats.objects.bulk_create(created, ignore_conflicts=True)
+                TaskStats.objects.bulk_update(updated, fields)
+
+        checked += len(pks)
+        last_pk = pks[-1]
+
+    return {'checked': checked, 'mismatched': sorted(mismatched)}
+
+
+def refresh_next_due_dates(today):
+    """
+    Move the `next_due_date` of the rows that fell behind `today` to
+    the actual earliest due date of their pending tasks, with a single
+    `UPDATE`. Run after the overdue sweep, once no pending task is past
+    due any more.
+    """
+    return TaskStats.objects.filter(next_due_date__lt=today).update(
+        next_due_date=Subquery(
+            Task.objects.filter(
+                user=OuterRef('pk'), status__in=PENDING_STATUSES)
+            .order_by().values('user')
+            .annotate(earliest_due_date=Min('due_date'))
+            .values('earliest_due_date')
+        ))
@@ -0,0 +1,297 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .admin import EstimatedCountPaginator
+from .models import Task
+from .recurrence import make_recurring
+
+
+class TaskAdminTest(TestCase):
+
+    def setUp(self):
+        """
+        Create a superuser and a few tasks owned by regular users.
+        """
+        self.admin = User.objects.create_superuser(
+            username="admin", password="password123"
+        )
+        self.client.force_login(self.admin)
+        self.url = reverse('admin:task_management_task_changelist')
+        self.user = User.objects.create_user(
+            username="testuser", password="password123"
+        )
+        due_date = timezone.now().date() + timedelta(days=3)
+        self.report = Task.objects.create(
+            user=self.user,
+            title="Quarterly report",
+            description="Numbers for the board",
+            due_date=due_date
+        )
+        self.gym = Task.objects.create(
+            user=self.admin,
+            title="Gym",
+            description="Leg day",
+            due_date=due_date
+        )
+
+    def test_search_uses_full_text_index(self):
+        """
+        The changelist search matches words in titles and descriptions.
+        """
+        response = self.client.get(self.url, {'q': 'board'})
+        self.assertEqual(list(response.context['cl'].result_list),
+                         [self.report])
+
+    def test_search_by_username(self):
+        """
+        Searching for a username lists that user's tasks.
+        """
+        response = self.client.get(self.url, {'q': 'testuser'})
+        self.assertEqual(list(response.context['cl'].result_list),
+                         [self.report])
+
+    def test_changelist_query_count_does_not_grow_with_rows(self):
+        """
+        The owners of the listed tasks are loaded with the tasks, so
+        more tasks from more users don't mean more queries.
+        """
+        with CaptureQueriesContext(connection) as initial:
+            self.client.get(self.url)
+
+        due_date = timezone.now().date() + timedelta(days=3)
+        for i in range(5):
+            user = User.objects.create_user(username="user%d" % i)
+            Task.objects.create(
+                user=user,
+                title="Task %d" % i,
+                description="Another task",
+                due_date=due_date
+            )
+
+        with self.assertNumQueries(len(initial)):
+            response = self.client.get(self.url)
+        self.assertEqual(response.context['cl'].result_count, 7)
+
+    def test_user_filter(self):
+        """
+        The user filter is an autocomplete box, not a list of accounts,
+        and keeps the selected user.
+        """
+        response = self.client.get(self.url, {'user': self.user.id,
+                                              'status': Task.TO_DO})
+
+        self.assertEqual(list(response.context['cl'].result_list),
+                         [self.report])
+        self.assertContains(response, 'class="admin-autocomplete')
+        self.assertContains(
+            response,
+            '<option value="%d" selected>testuser</option>' % self.user.id,
+            html=True)
+        self.assertContains(
+            response, '<input type="hidden" name="status" value="To Do">',
+            html=True)
+        self.assertNotContains(response, '?user=%d' % self.admin.id)
+
+    def test_user_filter_ignores_invalid_ids(self):
+        """
+        A user filter that isn't an id is ignored rather than failing.
+        """
+        response = self.client.get(self.url, {'user': 'abc'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['cl'].result_count,
+                         Task.objects.count())
+
+    def test_user_autocomplete(self):
+        """
+        The user field's autocomplete endpoint searches the accounts.
+        """
+        response = self.client.get(reverse('admin:autocomplete'), {
+            'app_label': 'task_management',
+            'model_name': 'task',
+            'field_name': 'user',
+            'term': 'test',
+        })
+        self.assertEqual(
+            [result['text'] for result in response.json()['results']],
+            ['testuser'])
+
+    def test_date_hierarchy(self):
+        """
+        The changelist can be drilled down by due date.
+        """
+        due_date = self.report.due_date
+        response = self.client.get(self.url, {
+            'due_date__year': due_date.year,
+            'due_date__month': due_date.month,
+        })
+        self.assertEqual(response.context['cl'].result_count, 2)
+        self.assertFalse(response.context['cl'].show_full_result_count)
+
+    def test_change_tasks_asks_for_changes(self):
+        """
+        The bulk change action first shows a form for the new values.
+        """
+        response = self.client.post(self.url, {
+            'action': 'change_tasks',
+            '_selected_action': [self.report.pk, self.gym.pk],
+        })
+
+        self.assertTemplateUsed(
+            response, 'admin/task_management/task/change_tasks.html')
+        self.assertContains(response, "Change 2 selected task(s)")
+        self.assertContains(
+            response,
+            '<input type="hidden" name="_selected_action" value="%d">'
+            % self.report.pk, html=True)
+
+    def test_change_tasks_applies_transition_rules(self):
+        """
+        Tasks that may move to the new status are changed in one
+        UPDATE, the others are left unchanged and reported.
+        """
+        Task.objects.filter(pk=self.report.pk).update(
+            status=Task.IN_PROGRESS)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, {
+                'action': 'change_tasks',
+                '_selected_action': [self.report.pk, self.gym.pk],
+                'apply': '1',
+                'status': Task.COMPLETED,
+                'priority': Task.HIGH,
+            }, follow=True)
+
+        self.report.refresh_from_db()
+        self.gym.refresh_from_db()
+        self.assertEqual(
+            (self.report.status, self.report.priority),
+            (Task.COMPLETED, Task.HIGH))
+        self.assertEqual(
+            (self.gym.status, self.gym.priority),
+            (Task.TO_DO, Task.MEDIUM))
+        self.assertEqual(
+            sum(query['sql'].startswith('UPDATE "task_management_task"')
+                for query in queries.captured_queries), 1)
+        self.assertContains(response, "Changed 1 task(s).")
+        self.assertContains(
+            response,
+            "Left 1 &#x27;To Do&#x27; task(s) unchanged: A task can only "
+            "be marked as &#x27;Completed&#x27; after being &#x27;In "
+            "Progress&#x27;.")
+
+    def test_change_tasks_select_across(self):
+        """
+        With "select all", every task of the filtered list is changed.
+        """
+        due_date = timezone.now().date() + timedelta(days=10)
+        self.client.post(self.url + '?user=%d' % self.user.id, {
+            'action': 'change_tasks',
+            '_selected_action': [self.report.pk],
+            'select_across': '1',
+            'apply': '1',
+            'due_date': due_date.isoformat(),
+            'category': Task.STUDY,
+        })
+
+        self.report.refresh_from_db()
+        self.gym.refresh_from_db()
+        self.assertEqual(
+            (self.report.due_date, self.report.category),
+            (due_date, Task.STUDY))
+        self.assertNotEqual(self.gym.due_date, due_date)
+
+    def test_change_tasks_rejects_past_due_date(self):
+        """
+        An invalid change shows the form again with the error.
+        """
+        response = self.client.post(self.url, {
+            'action': 'change_tasks',
+            '_selected_action': [self.report.pk],
+            'apply': '1',
+            'due_date': (timezone.now().date()
+                         - timedelta(days=1)).isoformat(),
+        })
+
+        self.assertContains(response, "Due date cannot be in the past.")
+        self.report.refresh_from_db()
+        self.assertGreater(self.report.due_date, timezone.now().date())
+
+    def test_change_tasks_keeps_past_due_tasks_overdue(self):
+        """
+        Past due tasks aren't moved back to a pending status unless
+        they get a new due date.
+        """
+        Task.objects.filter(pk=self.report.pk).update(
+            status=Task.OVERDUE,
+            due_date=timezone.now().date() - timedelta(days=1))
+        data = {
+            'action': 'change_tasks',
+            '_selected_action': [self.report.pk, self.gym.pk],
+            'apply': '1',
+            'status': Task.TO_DO,
+        }
+
+        response = self.client.post(self.url, data, follow=True)
+
+        self.report.refresh_from_db()
+        self.assertEqual(self.report.status, Task.OVERDUE)
+        self.assertContains(response, "Changed 1 task(s).")
+        self.assertContains(
+            response,
+            "Left 1 &#x27;Overdue&#x27; task(s) unchanged: Past due tasks "
+            "can only be reopened with a new due date.")
+
+        due_date = timezone.now().date() + timedelta(days=1)
+        self.client.post(self.url, dict(data, due_date=due_date.isoformat()))
+
+        self.report.refresh_from_db()
+        self.assertEqual((self.report.status, self.report.due_date),
+                         (Task.TO_DO, due_date))
+
+    def test_edit_recurrence_rule(self):
+        """
+        A series' recurrence is edited as an RRULE.
+        """
+        recurrence = make_recurring(self.report, 'FREQ=WEEKLY')
+        url = reverse('admin:task_management_taskrecurrence_change',
+                      args=[recurrence.pk])
+        self.assertContains(self.client.get(url), 'value="FREQ=WEEKLY"')
+
+        response = self.client.post(url, {
+            'user': self.user.pk,
+            'title': recurrence.title,
+            'description': recurrence.description,
+            'priority': recurrence.priority,
+            'category': recurrence.category,
+            'active': 'on',
+            'rule': 'FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,FR;COUNT=5',
+        })
+
+        self.assertEqual(response.status_code, 302)
+        recurrence.refresh_from_db()
+        self.assertEqual(recurrence.rule,
+                         'FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,FR;COUNT=5')
+
+
+class EstimatedCountPaginatorTest(TestCase):
+
+    def test_exact_count_outside_postgresql(self):
+        """
+        Without a PostgreSQL estimate, the count is exact.
+        """
+        user = User.objects.create_user(username="testuser")
+        Task.objects.create(
+            user=user,
+            title="Task",
+            description="A task",
+            due_date=timezone.now().date()
+        )
+        paginator = EstimatedCountPaginator(Task.objects.order_by('pk'), 10)
+        self.assertEqual(paginator.count, 1)
@@ -0,0 +1,264 @@
+import json
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from . import events
+from .models import Task, TaskStats
+from .stats import rebuild_task_stats
+
+
+class TaskApiTest(TestCase):
+
+    def setUp(self):
+        """
+        Create a logged-in user with a task in progress.
+        """
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="testuser", password="password123"
+        )
+        self.client.force_login(self.user)
+        self.due_date = timezone.now().date() + timedelta(days=5)
+        # Send the setup's events, which would otherwise be batched
+        # with those of the test
+        with self.captureOnCommitCallbacks(execute=True):
+            self.task = Task.objects.create(
+                user=self.user,
+                title="In Progress Task",
+                description="A task that's in progress",
+                status=Task.IN_PROGRESS,
+                due_date=self.due_date
+            )
+        self.detail_url = reverse('api_task_detail', args=[self.task.id])
+
+    def send(self, method, url, data):
+        """
+        Send `data` as a JSON request body.
+        """
+        return getattr(self.client, method)(
+            url, json.dumps(data), content_type='application/json')
+
+    def new_task_data(self, **overrides):
+        """
+        Return valid data for a new task, with optional overrides.
+        """
+        data = {
+            'title': "New Task",
+            'description': "Created through the API",
+            'priority': Task.HIGH,
+            'status': Task.TO_DO,
+            'category': Task.STUDY,
+            'due_date': self.due_date.isoformat(),
+        }
+        data.update(overrides)
+        return data
+
+    def test_anonymous_request(self):
+        """
+        Anonymous requests get a JSON 401 instead of a redirect.
+        """
+        self.client.logout()
+        response = self.client.get(reverse('api_task_list'))
+        self.assertEqual(response.status_code, 401)
+
+    def test_list_is_paginated(self):
+        """
+        The list follows `next` links until every task has been returned.
+        """
+        for i in range(4):
+            Task.objects.create(
+                user=self.user,
+                title="Task %d" % i,
+                description="A task",
+                due_date=self.due_date
+            )
+
+        ids = []
+        url = reverse('api_task_list') + '?limit=2'
+        while url:
+            data = self.client.get(url).json()
+            ids.extend(task['id'] for task in data['results'])
+            url = data['next']
+
+        self.assertEqual(
+            ids, list(Task.objects.order_by('due_date', 'pk')
+                      .values_list('pk', flat=True)))
+
+    def test_create(self):
+        """
+        A valid task is created for the logged-in user.
+        """
+        response = self.send(
+            'post', reverse('api_task_list'), self.new_task_data())
+
+        self.assertEqual(response.status_code, 201)
+        task = Task.objects.get(pk=response.json()['id'])
+        self.assertEqual(task.user, self.user)
+        self.assertEqual(task.category, Task.STUDY)
+
+    def test_create_validates_like_the_form(self):
+        """
+        The form's rules apply, e.g. a new task cannot be 'Completed'.
+        """
+        response = self.send(
+            'post', reverse('api_task_list'),
+            self.new_task_data(status=Task.COMPLETED))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('errors', response.json())
+
+    def test_partial_update(self):
+        """
+        Fields missing from a PATCH keep their value.
+        """
+        response = self.send(
+            'patch', self.detail_url, {'status': Task.COMPLETED})
+
+        self.assertEqual(response.status_code, 200)
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.status, Task.COMPLETED)
+        self.assertEqual(self.task.title, "In Progress Task")
+
+    def test_other_users_task(self):
+        """
+        Other users' tasks are not found.
+        """
+        other = User.objects.create_user(
+            username="otheruser", password="password123"
+        )
+        self.client.force_login(other)
+        response = self.client.delete(self.detail_url)
+
+        self.assertEqual(response.status_code, 404)
+        self.assertTrue(Task.objects.filter(pk=self.task.pk).exists())
+
+    def test_delete(self):
+        """
+        DELETE removes the task.
+        """
+        response = self.client.delete(self.detail_url)
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(Task.objects.filter(pk=self.task.pk).exists())
+
+    def test_bulk_create(self):
+        """
+        Many tasks are inserted with a constant number of queries.
+        """
+        data = {'tasks': [
+            self.new_task_data(title="Task %d" % i) for i in range(50)
+        ]}
+        with self.assertNumQueries(6):
+            response = self.send('post', reverse('api_task_bulk'), data)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.json()['results']), 50)
+        self.assertEqual(Task.objects.filter(user=self.user).count(), 51)
+
+    def test_bulk_create_is_all_or_nothing(self):
+        """
+        A single invalid task rejects the whole request.
+        """
+        past = (timezone.now().date() - timedelta(days=1)).isoformat()
+        data = {'tasks': [
+            self.new_task_data(),
+            self.new_task_data(due_date=past),
+        ]}
+        response = self.send('post', reverse('api_task_bulk'), data)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(response.json()['errors']), ['1'])
+        self.assertEqual(Task.objects.filter(user=self.user).count(), 1)
+
+    def test_bulk_update(self):
+        """
+        Bulk updates apply the status transition rules.
+        """
+        to_do = Task.objects.create(
+            user=self.user,
+            title="To Do Task",
+            description="Not started",
+            due_date=self.due_date
+        )
+        response = self.send('patch', reverse('api_task_bulk'), {'tasks': [
+            {'id': self.task.id, 'status': Task.COMPLETED},
+            {'id': to_do.id, 'status': Task.COMPLETED},
+        ]})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(response.json()['errors']), ['1'])
+
+        response = self.send('patch', reverse('api_task_bulk'), {'tasks': [
+            {'id': self.task.id, 'status': Task.COMPLETED},
+            {'id': to_do.id, 'priority': Task.LOW},
+        ]})
+        self.assertEqual(response.status_code, 200)
+        self.task.refresh_from_db()
+        to_do.refresh_from_db()
+        self.assertEqual(self.task.status, Task.COMPLETED)
+        self.assertEqual(to_do.priority, Task.LOW)
+
+    def test_bulk_delete(self):
+        """
+        Bulk delete only removes the user's own tasks.
+        """
+        other = User.objects.create_user(
+            username="otheruser", password="password123"
+        )
+        other_task = Task.objects.create(
+            user=other,
+            title="Other Task",
+            description="Not yours",
+            due_date=self.due_date
+        )
+        response = self.send('delete', reverse('api_task_bulk'), {
+            'ids': [self.task.id, other_task.id],
+        })
+
+        self.assertEqual(response.json(), {'deleted': 1})
+        self.assertTrue(Task.objects.filter(pk=other_task.pk).exists())
+
+    def test_bulk_delete_in_one_pass(self):
+        """
+        Counters, caches and events are updated once for all the deleted
+        tasks, their subtasks included, not once per task.
+        """
+        tasks = Task.objects.bulk_create([
+            Task(user=self.user, title="Task %d" % i, description="",
+                 status=[Task.TO_DO, Task.COMPLETED][i % 2],
+                 due_date=self.due_date)
+            for i in range(50)
+        ])
+        rebuild_task_stats([self.user.id])
+        # A subtask deleted with its parent, and one whose parent stays
+        with self.captureOnCommitCallbacks(execute=True):
+            Task.objects.create(
+                user=self.user, parent=tasks[0], title="Sub",
+                description="", due_date=self.due_date)
+            subtask = Task.objects.create(
+                user=self.user, parent=self.task, title="Sub",
+                description="", due_date=self.due_date)
+        ids = [task.id for task in tasks] + [subtask.id]
+
+        with patch.object(events.get_broker(), 'publish') as publish:
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                with self.assertNumQueries(10):
+                    response = self.send(
+                        'delete', reverse('api_task_bulk'), {'ids': ids})
+
+        self.assertEqual(response.json(), {'deleted': 52})
+        # The cache invalidation and the batch of events
+        self.assertEqual(len(callbacks), 2)
+        (user_id, [event]), = [call.args for call in publish.call_args_list]
+        self.assertEqual(event['type'], 'deleted')
+        self.assertEqual(len(event['ids']), 52)
+        stats = TaskStats.objects.get(user=self.user)
+        self.assertEqual((stats.to_do, stats.completed), (0, 0))
+        self.assertEqual(
+            rebuild_task_stats([self.user.id], verify=True)['mismatched'],
+            [])
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.subtask_count, 0)
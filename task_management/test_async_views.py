@@ -0,0 +1,138 @@
+import asyncio
+import csv
+import io
+import json
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import AsyncClient, TestCase, override_settings
+from django.urls import path, reverse
+from django.utils import timezone
+
+from task_manager_project import urls as project_urls
+
+from . import async_views
+from .events import get_broker
+from .export import aiter_export, get_export_filters
+from .models import Task
+
+
+# The project URLs with the event streams, as served when
+# TASK_ASYNC_VIEWS is enabled
+urlpatterns = [
+    path('task-events/<int:user_id>/',
+         async_views.task_events, name='task_events'),
+] + project_urls.urlpatterns
+
+
+@override_settings(ROOT_URLCONF='task_management.test_async_views')
+class AsyncTaskViewsTest(TestCase):
+
+    def setUp(self):
+        """
+        Create a logged-in user with a task in progress.
+        """
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="testuser", password="password123"
+        )
+        self.client.force_login(self.user)
+        self.async_client.force_login(self.user)
+        self.due_date = timezone.now().date() + timedelta(days=3)
+        self.task = Task.objects.create(
+            user=self.user,
+            title="In Progress Task",
+            description="A task that's in progress",
+            status=Task.IN_PROGRESS,
+            due_date=self.due_date
+        )
+        self.dashboard_url = reverse('task_dashboard', args=[self.user.id])
+
+    async def test_anonymous_redirects_to_login(self):
+        """
+        Anonymous users are sent to the login page.
+        """
+        url = reverse('task_events', args=[self.user.id])
+        response = await AsyncClient().get(url)
+        self.assertRedirects(response, '/accounts/login/?next=' + url,
+                             fetch_redirect_response=False)
+
+    @override_settings(TASK_ASYNC_VIEWS=False)
+    def test_dashboard_events_url(self):
+        """
+        The dashboard only follows the event stream when the ASGI app
+        serves it.
+        """
+        response = self.client.get(self.dashboard_url)
+        self.assertFalse(response.context['events_url'])
+
+        with override_settings(TASK_ASYNC_VIEWS=True):
+            response = self.client.get(self.dashboard_url)
+        self.assertEqual(response.context['events_url'],
+                         reverse('task_events', args=[self.user.id]))
+
+    @override_settings(TASK_ASYNC_VIEWS=True)
+    async def test_export(self):
+        """
+        Under ASGI the export streams the file from an async iterator,
+        one chunk of rows at a time.
+        """
+        await Task.objects.acreate(
+            user=self.user,
+            title="Second Task",
+            description="Another task",
+            due_date=self.due_date
+        )
+        response = await self.async_client.get(
+            reverse('task_export', args=[self.user.id]), {'format': 'csv'})
+        self.assertTrue(response.is_async)
+        content = b''.join([
+            chunk async for chunk in response.streaming_content])
+        rows = list(csv.reader(io.StringIO(content.decode())))
+        self.assertEqual([row[1] for row in rows],
+                         ['title', "In Progress Task", "Second Task"])
+
+        chunks = [chunk async for chunk in aiter_export(
+            self.user, get_export_filters({}), timezone.now().date(), 'csv',
+            chunk_size=1)]
+        # The header with the first row, the second row, an empty chunk
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual(''.join(chunks).encode(), content)
+
+    async def test_event_stream(self):
+        """
+        The event stream starts with the counters, then relays the
+        user's events, each followed by the updated counters.
+        """
+        response = await self.async_client.get(
+            reverse('task_events', args=[self.user.id]))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = aiter(response.streaming_content)
+        try:
+            first = await anext(stream)
+            self.assertTrue(first.startswith(b'event: counts\n'))
+
+            event = {'type': 'deleted', 'ids': [self.task.id]}
+            await sync_to_async(get_broker().publish)(
+                self.user.id, [event])
+
+            chunk = await asyncio.wait_for(anext(stream), 5)
+            name, data = chunk.decode().strip().split('\n')
+            self.assertEqual(name, 'event: task')
+            self.assertEqual(json.loads(data[len('data: '):]), event)
+            chunk = await asyncio.wait_for(anext(stream), 5)
+            self.assertTrue(chunk.startswith(b'event: counts\n'))
+        finally:
+            await stream.aclose()
+
+    async def test_event_stream_requires_owner(self):
+        """
+        Users can't follow the events of others.
+        """
+        response = await self.async_client.get(
+            reverse('task_events', args=[self.user.id + 1]))
+
+        self.assertEqual(response.status_code, 403)
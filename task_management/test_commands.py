@@ -0,0 +1,360 @@
+import csv
+import json
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from .models import Task, TaskStats
+from .overdue import mark_overdue_tasks
+
+
+class ExplainDashboardCommandTest(TestCase):
+
+    def setUp(self):
+        """
+        Create a user whose dashboard queries can be explained.
+        """
+        self.user = User.objects.create_user(
+            username="testuser", password="password123"
+        )
+
+    def test_explain_prints_each_query(self):
+        """
+        The command prints a heading and a plan for every dashboard query.
+        """
+        out = StringIO()
+        call_command('explain_dashboard', 'testuser', stdout=out)
+        output = out.getvalue()
+
+        self.assertIn("Task counts", output)
+        self.assertIn("Section: overdue", output)
+        self.assertIn("Section: upcoming", output)
+        self.assertIn("Section: completed", output)
+
+    def test_explain_unknown_user(self):
+        """
+        An unknown username raises a `CommandError`.
+        """
+        with self.assertRaises(CommandError):
+            call_command('explain_dashboard', 'nobody', stdout=StringIO())
+
+
+class MarkOverdueCommandTest(TestCase):
+
+    def setUp(self):
+        """
+        Create pending tasks that have fallen due, bypassing `save()` so
+        they keep their pending status.
+        """
+        self.user = User.objects.create_user(
+            username="testuser", password="password123"
+        )
+        today = timezone.now().date()
+        for i, status in enumerate(
+                [Task.TO_DO, Task.IN_PROGRESS, Task.TO_DO, Task.COMPLETED]):
+            Task.objects.create(
+                user=self.user,
+                title="Task %d" % i,
+                description="A task",
+                status=status,
+                due_date=today + timedelta(days=1)
+            )
+        Task.objects.update(due_date=today - timedelta(days=1))
+        self.future = Task.objects.create(
+            user=self.user,
+            title="Future Task",
+            description="Not due yet",
+            due_date=today + timedelta(days=1)
+        )
+
+    def test_marks_past_due_pending_tasks(self):
+        """
+        Only pending past-due tasks are moved to 'Overdue', in batches.
+        """
+        out = StringIO()
+        call_command('mark_overdue', '--batch-size', '2', stdout=out)
+
+        self.assertEqual(
+            Task.objects.filter(status=Task.OVERDUE).count(), 3)
+        self.assertEqual(
+            Task.objects.get(pk=self.future.pk).status, Task.TO_DO)
+        self.assertEqual(
+            Task.objects.filter(status=Task.COMPLETED).count(), 1)
+        self.assertIn("Marked 3 task(s) as overdue in 2 batch(es)",
+                      out.getvalue())
+
+    def test_sweep_is_idempotent(self):
+        """
+        A second run finds nothing left to update.
+        """
+        call_command('mark_overdue', stdout=StringIO())
+        self.assertEqual(mark_overdue_tasks(), {'updated': 0, 'batches': 0})
+
+
+class RebuildTaskStatsCommandTest(TestCase):
+
+    def setUp(self):
+        """
+        Create a user with a task whose counters have drifted.
+        """
+        self.user = User.objects.create_user(
+            username="testuser", password="password123"
+        )
+        Task.objects.create(
+            user=self.user,
+            title="Task",
+            description="A task",
+            due_date=timezone.now().date() + timedelta(days=1)
+        )
+        TaskStats.objects.filter(pk=self.user.pk).update(to_do=0)
+
+    def test_verify_then_rebuild(self):
+        """
+        `--verify` fails on drifted counters, which a rebuild fixes.
+        """
+        with self.assertRaisesMessage(CommandError, "1 of 1 user(s)"):
+            call_command('rebuild_task_stats', '--verify', stdout=StringIO())
+
+        out = StringIO()
+        call_command('rebuild_task_stats', 'testuser', stdout=out)
+        self.assertIn("rebuilt the counters of 1", out.getvalue())
+        self.assertEqual(TaskStats.objects.get(pk=self.user.pk).to_do, 1)
+
+        out = StringIO()
+        call_command('rebuild_task_stats', '--verify', stdout=out)
+        self.assertIn("are consistent", out.getvalue())
+
+    def test_unknown_user(self):
+        """
+        Unknown usernames are rejected.
+        """
+        with self.assertRaisesMessage(CommandError, "Unknown user(s): nobody"):
+            call_command('rebuild_task_stats', 'nobody', stdout=StringIO())
+
+
+class ExportTasksCommandTest(TestCase):
+
+    def setUp(self):
+        """
+        Create a user with a couple of tasks.
+        """
+        self.user = User.objects.create_user(
+            username="testuser", password="password123"
+        )
+        for i in range(3):
+            Task.objects.create(
+                user=self.user,
+                title="Task %d" % i,
+                description="A task",
+                category=Task.STUDY if i else Task.WORK,
+                due_date=timezone.now().date() + timedelta(days=i)
+            )
+
+    def test_export_to_file(self):
+        """
+        Tasks matching the filters are written to the output file.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'tasks.jsonl')
+            call_command('export_tasks', 'testuser', '--format', 'jsonl',
+                         '--category', Task.STUDY, '--chunk-size', '1',
+                         '-o', path)
+            with open(path) as output:
+                titles = [json.loads(line)['title'] for line in output]
+
+        self.assertEqual(titles, ["Task 1", "Task 2"])
+
+    def test_export_to_stdout(self):
+        """
+        Without an output file, the CSV goes to standard output.
+        """
+        out = StringIO()
+        call_command('export_tasks', 'testuser', stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 4)
+
+
+class ImportTasksCommandTest(TestCase):
+
+    def setUp(self):
+        """
+        Create the user the tasks are imported for.
+        """
+        self.user = User.objects.create_user(
+            username="testuser", password="password123"
+        )
+        self.due_date = (timezone.now().date() + timedelta(days=3))
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write_file(self, name, content):
+        """
+        Write `content` to a temporary file and return its path.
+        """
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w', newline='') as output:
+            output.write(content)
+        return path
+
+    def test_import_csv_in_batches(self):
+        """
+        Valid records are inserted and invalid ones reported by line.
+        """
+        past = timezone.now().date() - timedelta(days=1)
+        rows = ["title,description,priority,status,due_date"]
+        rows += ["Task %d,Imported,High,To Do,%s" % (i, self.due_date)
+                 for i in range(5)]
+        rows += [
+            "Bad Priority,Imported,Urgent,To Do,%s" % self.due_date,
+            "Done,Imported,Low,Completed,%s" % self.due_date,
+            "Late,Imported,Low,To Do,%s" % past,
+            ",No title,Low,To Do,%s" % self.due_date,
+        ]
+        path = self.write_file('tasks.csv', '\n'.join(rows) + '\n')
+        report = os.path.join(self.directory.name, 'report.csv')
+
+        out = StringIO()
+        call_command('import_tasks', 'testuser', path, '--batch-size', '3',
+                     '--report', report, stdout=out)
+
+        self.assertEqual(Task.objects.filter(user=self.user).count(), 5)
+        self.assertEqual(
+            Task.objects.filter(priority=Task.HIGH).count(), 5)
+        with open(report) as report_file:
+            lines = [row[0] for row in csv.reader(report_file)]
+        self.assertEqual(lines, ['line', '7', '8', '9', '10'])
+        self.assertIn("Imported 5 task(s), rejected 4 record(s)",
+                      out.getvalue())
+
+    def test_import_jsonl_defaults(self):
+        """
+        Missing choice fields get the model defaults.
+        """
+        path = self.write_file('tasks.jsonl', '\n'.join([
+            json.dumps({'title': "A", 'description': "B",
+                        'due_date': self.due_date.isoformat()}),
+            "not json",
+        ]))
+
+        call_command('import_tasks', 'testuser', path,
+                     stdout=StringIO(), stderr=StringIO())
+
+        task = Task.objects.get(user=self.user)
+        self.assertEqual(
+            (task.priority, task.status, task.category),
+            (Task.MEDIUM, Task.TO_DO, Task.WORK))
+
+    def test_import_roundtrip(self):
+        """
+        A file produced by `export_tasks` can be imported again.
+        """
+        Task.objects.create(
+            user=self.user,
+            title="Exported",
+            description="Round trip",
+            due_date=self.due_date
+        )
+        path = os.path.join(self.directory.name, 'export.csv')
+        call_command('export_tasks', 'testuser', '-o', path)
+
+        call_command('import_tasks', 'testuser', path, stdout=StringIO())
+
+        self.assertEqual(
+            Task.objects.filter(user=self.user, title="Exported").count(), 2)
+
+
+class BenchmarkSessionsCommandTest(TestCase):
+
+    def test_benchmark_reports_each_backend(self):
+        """
+        Every backend is measured, only the database backend queries the
+        session table, and the benchmark data is rolled back.
+        """
+        out = StringIO()
+        call_command('benchmark_sessions', '--requests', '2', '--warmup',
+                     '1', '--tasks', '5', '--json', stdout=out)
+        results = json.loads(out.getvalue())
+
+        self.assertEqual(
+            list(results), ['db', 'cache', 'cached_db', 'signed_cookies'])
+        self.assertEqual(results['db']['session_queries'], 1)
+        for backend in ['cache', 'cached_db', 'signed_cookies']:
+            self.assertEqual(results[backend]['session_queries'], 0)
+        self.assertFalse(User.objects.exists())
+        self.assertFalse(Task.objects.exists())
+
+
+class BenchmarkViewsCommandTest(TransactionTestCase):
+
+    def benchmark(self, *args):
+        out = StringIO()
+        call_command('benchmark_views', '--requests', '2', '--warmup', '1',
+                     '--tasks', '5', '--json', *args, stdout=out)
+        return json.loads(out.getvalue())
+
+    def test_client_mode(self):
+        """
+        Every view is measured with query counts, without failures, and
+        the benchmark data and sessions are deleted afterwards.
+        """
+        results = self.benchmark()['results']
+
+        self.assertEqual(
+            [result['view'] for result in results],
+            ['task_dashboard', 'task_add', 'task_edit', 'task_delete'])
+        for result in results:
+            self.assertEqual(result['errors'], 0)
+            self.assertEqual(result['requests'], 2)
+            self.assertGreater(result['queries'], 0)
+        self.assertFalse(User.objects.exists())
+        self.assertFalse(Task.objects.exists())
+        self.assertFalse(Session.objects.exists())
+
+    def test_http_mode(self):
+        """
+        The views are served over HTTP by a local server.
+        """
+        results = self.benchmark(
+            '--mode', 'http', '--concurrency', '1',
+            '--views', 'task_dashboard', 'task_edit')['results']
+
+        self.assertEqual(len(results), 2)
+        for result in results:
+            self.assertEqual(result['mode'], 'http')
+            self.assertEqual(result['errors'], 0)
+            self.assertIsNone(result['queries'])
+        self.assertFalse(Session.objects.exists())
+
+    def test_baseline_regression(self):
+        """
+        The command fails when the results regress against a baseline,
+        and passes against its own results with a generous tolerance.
+        """
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'baseline.json')
+        call_command('benchmark_views', '--requests', '2', '--tasks', '5',
+                     '--views', 'task_dashboard', '--output', path,
+                     stdout=StringIO())
+        with open(path) as baseline_file:
+            baseline = json.load(baseline_file)
+
+        call_command('benchmark_views', '--requests', '2', '--tasks', '5',
+                     '--views', 'task_dashboard', '--baseline', path,
+                     '--tolerance', '100000', stdout=StringIO())
+
+        baseline['results'][0]['queries'] -= 1
+        baseline['results'][0]['p95_ms'] = 0
+        with open(path, 'w') as baseline_file:
+            json.dump(baseline, baseline_file)
+        with self.assertRaisesMessage(CommandError, "queries per request"):
+            call_command('benchmark_views', '--requests', '2', '--tasks',
+                         '5', '--views', 'task_dashboard', '--baseline',
+                         path, stdout=StringIO())
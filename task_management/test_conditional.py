@@ -0,0 +1,124 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Task
+
+
+class ConditionalGetTest(TestCase):
+
+    def setUp(self):
+        """
+        Create a logged-in user with a task in progress.
+        """
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="testuser", password="password123"
+        )
+        self.client.force_login(self.user)
+        self.task = Task.objects.create(
+            user=self.user,
+            title="In Progress Task",
+            description="A task that's in progress",
+            status=Task.IN_PROGRESS,
+            due_date=timezone.now().date() + timedelta(days=5)
+        )
+        self.url = reverse('task_dashboard', args=[self.user.id])
+
+    def get(self, url, etag):
+        return self.client.get(url, headers={'If-None-Match': etag})
+
+    def test_not_modified(self):
+        """
+        A current ETag is answered with `304 Not Modified`, loading only
+        the session, the user and the summary of their tasks, and
+        rendering no template.
+        """
+        response = self.client.get(self.url)
+        etag = response['ETag']
+        self.assertIn('private', response['Cache-Control'])
+        self.assertIn('no-cache', response['Cache-Control'])
+
+        with self.assertNumQueries(3):
+            response = self.get(self.url, etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertFalse(response.templates)
+
+    def test_etag_not_cached(self):
+        """
+        The ETag follows the database even when the cached dashboard
+        hasn't been invalidated, e.g. by another process.
+        """
+        etag = self.client.get(self.url)['ETag']
+
+        Task.objects.filter(pk=self.task.pk).update(
+            updated_at=timezone.now() + timedelta(seconds=1))
+
+        self.assertNotEqual(self.client.get(self.url)['ETag'], etag)
+
+    def test_changes_update_etag(self):
+        """
+        Saving, adding or deleting a task changes the ETag.
+        """
+        etag = self.client.get(self.url)['ETag']
+
+        self.task.title = "Renamed"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.task.save()
+        response = self.get(self.url, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Renamed")
+
+        etag = response['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            other = Task.objects.create(
+                user=self.user, title="Other", description="Another task",
+                status=Task.TO_DO, due_date=self.task.due_date)
+        response = self.get(self.url, etag)
+        self.assertEqual(response.status_code, 200)
+
+        etag = response['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            other.delete()
+        self.assertEqual(self.get(self.url, etag).status_code, 200)
+
+    def test_pending_messages_are_rendered(self):
+        """
+        A page with messages to show is rendered even if the tasks
+        haven't changed.
+        """
+        etag = self.client.get(self.url)['ETag']
+        self.client.get(reverse('task_dashboard', args=[self.user.id + 1]))
+
+        response = self.get(self.url, etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "not authorised")
+
+    def test_edit_page_and_api(self):
+        """
+        The edit page and the JSON API are validated too, but not the
+        requests changing a task.
+        """
+        for url in [
+            reverse('task_edit', args=[self.user.id, self.task.id]),
+            reverse('task_upcoming', args=[self.user.id]) + '?format=json',
+            reverse('api_task_detail', args=[self.task.id]),
+            reverse('api_task_list'),
+        ]:
+            with self.subTest(url=url):
+                etag = self.client.get(url)['ETag']
+                self.assertEqual(self.get(url, etag).status_code, 304)
+
+        response = self.client.patch(
+            reverse('api_task_detail', args=[self.task.id]),
+            '{"title": "Renamed"}', content_type='application/json',
+            headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response)
@@ -0,0 +1,233 @@
+import asyncio
+import json
+from datetime import timedelta
+from unittest import skipUnless
+from unittest.mock import patch
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from . import events
+from .checks import check_shared_broker
+from .events import (
+    MAX_NOTIFY_PAYLOAD,
+    InProcessBroker,
+    PostgresBroker,
+    merge_events,
+    notify_payload,
+)
+from .models import Task
+from .overdue import mark_overdue_tasks
+
+
+class InProcessBrokerTest(SimpleTestCase):
+
+    async def test_fan_out(self):
+        """
+        Events published from another thread reach every subscriber of
+        the user, and only theirs.
+        """
+        broker = InProcessBroker()
+
+        async with broker.subscribe(1) as first, \
+                broker.subscribe(1) as second, \
+                broker.subscribe(2) as other:
+            await sync_to_async(broker.publish)(1, [{'type': 'created'}])
+
+            for queue in (first, second):
+                self.assertEqual(
+                    await asyncio.wait_for(queue.get(), 1),
+                    {'type': 'created'})
+            self.assertTrue(other.empty())
+
+        self.assertEqual(broker._subscribers, {})
+
+    async def test_slow_subscriber(self):
+        """
+        A subscriber that doesn't keep up loses the oldest events.
+        """
+        broker = InProcessBroker()
+
+        with patch.object(events, 'MAX_QUEUED_EVENTS', 2):
+            async with broker.subscribe(1) as queue:
+                for index in range(3):
+                    broker.publish(1, [{'type': 'updated', 'ids': [index]}])
+                await asyncio.sleep(0)
+
+                self.assertEqual(queue.qsize(), 2)
+                self.assertEqual(queue.get_nowait()['ids'], [1])
+
+
+class PostgresBrokerTest(SimpleTestCase):
+    # Notifications are only sent on commit, so the test can't run in a
+    # transaction
+    databases = {'default'}
+
+    def test_payload_fits_notifications(self):
+        """
+        Events too large for a notification are sent without their ids.
+        """
+        events = [{'type': 'updated', 'ids': [1, 2]}]
+        self.assertEqual(json.loads(notify_payload(1, events)),
+                         {'user_id': 1, 'events': events})
+
+        events = [{'type': 'updated', 'ids': list(range(10000))},
+                  {'type': 'deleted', 'ids': [1]}]
+        payload = notify_payload(1, events)
+        self.assertLessEqual(len(payload.encode()), MAX_NOTIFY_PAYLOAD)
+        self.assertEqual(json.loads(payload), {'user_id': 1, 'events': [
+            {'type': 'updated'}, {'type': 'deleted'}]})
+
+    @skipUnless(connection.vendor == 'postgresql', "LISTEN/NOTIFY")
+    async def test_notifications_reach_subscribers(self):
+        """
+        Events published on the database reach the subscribers through
+        the listener.
+        """
+        broker = PostgresBroker()
+
+        async with broker.subscribe(1) as queue:
+            await sync_to_async(broker.listening.wait)(5)
+            await sync_to_async(broker.publish)(
+                1, [{'type': 'created'}, {'type': 'deleted'}])
+
+            self.assertEqual(await asyncio.wait_for(queue.get(), 5),
+                             {'type': 'created'})
+            self.assertEqual(await asyncio.wait_for(queue.get(), 5),
+                             {'type': 'deleted'})
+
+    def test_check_shared_broker(self):
+        """
+        A per-process broker is refused when several workers serve the
+        event streams.
+        """
+        with override_settings(
+                WEB_CONCURRENCY=2, TASK_ASYNC_VIEWS=False,
+                TASK_EVENTS_BROKER='task_management.events.InProcessBroker'):
+            self.assertEqual(check_shared_broker(None), [])
+
+            with override_settings(TASK_ASYNC_VIEWS=True):
+                self.assertEqual(
+                    [error.id for error in check_shared_broker(None)],
+                    ['task_management.E002'])
+
+            shared = 'task_management.events.PostgresBroker'
+            with override_settings(TASK_EVENTS_BROKER=shared,
+                                   TASK_ASYNC_VIEWS=True):
+                self.assertEqual(check_shared_broker(None), [])
+
+
+class TaskEventsTest(TestCase):
+
+    def setUp(self):
+        """
+        Create a user with a task to do.
+        """
+        self.user = User.objects.create_user(
+            username="testuser", password="password123"
+        )
+        # Send the setup's events, which would otherwise be batched
+        # with those of the test
+        with self.captureOnCommitCallbacks(execute=True):
+            self.task = Task.objects.create(
+                user=self.user,
+                title="Task",
+                description="A task",
+                status=Task.TO_DO,
+                due_date=timezone.now().date() + timedelta(days=1)
+            )
+
+    def published(self, action):
+        """
+        Return the events published by `action()` once committed.
+        """
+        with patch.object(events.get_broker(), 'publish') as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                action()
+        return [call.args for call in publish.call_args_list]
+
+    def test_saves_and_deletes(self):
+        """
+        Saving and deleting a task publish events to its owner.
+        """
+        def update():
+            self.task.status = Task.IN_PROGRESS
+            self.task.save()
+
+        task_id = self.task.id
+        self.assertEqual(self.published(update), [
+            (self.user.id, [{'type': 'updated', 'ids': [task_id]}])])
+        self.assertEqual(self.published(self.task.delete), [
+            (self.user.id, [{'type': 'deleted', 'ids': [task_id]}])])
+
+    def test_batched_per_transaction(self):
+        """
+        The events of a transaction are published together, once per
+        user, those of each type merged.
+        """
+        other_user = User.objects.create_user(
+            username="otheruser", password="password123"
+        )
+
+        def changes():
+            with transaction.atomic():
+                self.task.save()
+                second = Task.objects.create(
+                    user=self.user, title="Second", description="",
+                    due_date=self.task.due_date)
+                self.task.save()
+                second.save()
+                other = Task.objects.create(
+                    user=other_user, title="Other", description="",
+                    due_date=self.task.due_date)
+            return second, other
+
+        with patch.object(events.get_broker(), 'publish') as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                second, other = changes()
+
+        self.assertEqual([call.args for call in publish.call_args_list], [
+            (self.user.id, [{'type': 'updated',
+                             'ids': [self.task.id, second.id]},
+                            {'type': 'created', 'ids': [second.id]}]),
+            (other_user.id, [{'type': 'created', 'ids': [other.id]}]),
+        ])
+
+    def test_rolled_back_batch_discarded(self):
+        """
+        Events of a rolled back transaction are never published, and
+        don't hold back those of the next one.
+        """
+        def rolled_back():
+            with transaction.atomic():
+                self.task.save()
+                transaction.set_rollback(True)
+
+        self.assertEqual(self.published(rolled_back), [])
+        self.assertEqual(self.published(self.task.save), [
+            (self.user.id, [{'type': 'updated', 'ids': [self.task.id]}])])
+
+    def test_merge_events(self):
+        """
+        An event without ids makes the merged event of its type have
+        none.
+        """
+        self.assertEqual(merge_events([
+            {'type': 'updated', 'ids': [1]},
+            {'type': 'created'},
+            {'type': 'updated', 'ids': [2, 1]},
+            {'type': 'created', 'ids': [3]},
+        ]), [{'type': 'updated', 'ids': [1, 2]}, {'type': 'created'}])
+
+    def test_overdue_sweep(self):
+        """
+        The overdue sweep publishes the tasks it marked overdue.
+        """
+        Task.objects.filter(pk=self.task.pk).update(
+            due_date=timezone.now().date() - timedelta(days=1))
+
+        self.assertEqual(self.published(mark_overdue_tasks), [
+            (self.user.id, [{'type': 'overdue', 'ids': [self.task.id]}])])
@@ -0,0 +1,143 @@
+import json
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.template.base import Template
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .middleware import RequestMetrics
+from .models import Task
+
+TEMPLATE_RENDER = Template.render
+
+
+class RequestMetricsMiddlewareTest(TestCase):
+
+    def setUp(self):
+        """
+        Create a logged-in user with a task.
+        """
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="testuser", password="password123"
+        )
+        self.client.login(username="testuser", password="password123")
+        Task.objects.create(
+            user=self.user,
+            title="Test Task",
+            description="A task to display",
+            due_date=timezone.now().date() + timedelta(days=1)
+        )
+        self.url = reverse('task_dashboard', args=[self.user.id])
+
+    def test_disabled_by_default(self):
+        """
+        Without REQUEST_METRICS_ENABLED nothing is added to the response.
+        """
+        response = self.client.get(self.url)
+        self.assertNotIn('Server-Timing', response)
+
+    @override_settings(REQUEST_METRICS_ENABLED=True)
+    def test_server_timing_and_log_line(self):
+        """
+        The timings are sent in a Server-Timing header and logged as one
+        JSON line per request.
+        """
+        with self.assertLogs('task_management.metrics', 'INFO') as logs:
+            response = self.client.get(self.url)
+
+        self.assertEqual(len(logs.records), 1)
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(logs.records[0].levelname, 'INFO')
+        self.assertEqual(record['view'], 'task_dashboard')
+        self.assertEqual(record['status'], 200)
+        self.assertEqual(record['n_plus_one'], [])
+        self.assertGreater(record['queries'], 0)
+        self.assertGreater(record['template_ms'], 0)
+        self.assertGreaterEqual(record['total_ms'], record['view_ms'])
+
+        server_timing = response['Server-Timing']
+        self.assertIn('db;dur=', server_timing)
+        self.assertIn('desc="%d queries"' % record['queries'], server_timing)
+        for name in ['template', 'view', 'total']:
+            self.assertIn('%s;dur=' % name, server_timing)
+
+    @override_settings(REQUEST_METRICS_ENABLED=True,
+                       REQUEST_METRICS_SERVER_TIMING=False)
+    def test_server_timing_disabled(self):
+        """
+        The header can be turned off while keeping the log lines.
+        """
+        with self.assertLogs('task_management.metrics', 'INFO'):
+            response = self.client.get(self.url)
+        self.assertNotIn('Server-Timing', response)
+
+    @override_settings(REQUEST_METRICS_ENABLED=True,
+                       REQUEST_METRICS_N_PLUS_ONE_THRESHOLD=1)
+    def test_repeated_queries_logged_as_warning(self):
+        """
+        Requests reaching the N+1 threshold are logged as warnings with
+        the repeated statements.
+        """
+        with self.assertLogs('task_management.metrics', 'INFO') as logs:
+            self.client.get(self.url)
+
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(logs.records[0].levelname, 'WARNING')
+        self.assertEqual(
+            sum(query['count'] for query in record['n_plus_one']),
+            record['queries'])
+
+    @override_settings(REQUEST_METRICS_ENABLED=True)
+    async def test_asgi_request(self):
+        """
+        The queries of requests served by the ASGI handler are recorded
+        too: Django runs the sync middleware and views in one thread.
+        """
+        await sync_to_async(self.async_client.force_login)(self.user)
+        with self.assertLogs('task_management.metrics', 'INFO') as logs:
+            response = await self.async_client.get(self.url)
+
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(record['view'], 'task_dashboard')
+        self.assertGreater(record['queries'], 0)
+        self.assertGreater(record['template_ms'], 0)
+
+    def test_templates_not_patched(self):
+        """
+        Renders are timed by the template backend, the template class
+        itself is left alone.
+        """
+        with override_settings(REQUEST_METRICS_ENABLED=True):
+            with self.assertLogs('task_management.metrics', 'INFO'):
+                self.client.get(self.url)
+        self.assertIs(Template.render, TEMPLATE_RENDER)
+
+
+class RequestMetricsTest(TestCase):
+
+    def test_repeated_queries(self):
+        """
+        Statements are grouped by their SQL regardless of the parameters.
+        """
+        metrics = RequestMetrics()
+
+        def execute(sql, params, many, context):
+            return None
+
+        for pk in range(3):
+            metrics(execute, 'SELECT * FROM task WHERE id = %s', [pk],
+                    False, {})
+        metrics(execute, 'SELECT * FROM user', [], False, {})
+
+        self.assertEqual(metrics.query_count, 4)
+        self.assertEqual(metrics.repeated_queries(3), [
+            {'sql': 'SELECT * FROM task WHERE id = %s', 'count': 3},
+        ])
+        self.assertEqual(metrics.repeated_queries(4), [])
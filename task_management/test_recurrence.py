@@ -0,0 +1,282 @@
+import json
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .bulk import bulk_change_tasks
+from .models import Task, TaskRecurrence
+from .recurrence import (
+    OCCURRENCE_DATE_TAKEN_MESSAGE,
+    generate_due_occurrences,
+    make_recurring,
+    next_occurrence,
+    parse_rrule,
+)
+
+
+class RecurrenceRuleTest(TestCase):
+
+    def test_parse_rrule(self):
+        """
+        The supported RRULE subset maps to the series fields.
+        """
+        self.assertEqual(
+            parse_rrule('RRULE:FREQ=WEEKLY;INTERVAL=2;BYDAY=TH,MO;COUNT=10'),
+            {'frequency': 'WEEKLY', 'interval': 2, 'weekdays': 'MO,TH',
+             'count': 10, 'until': None})
+        self.assertEqual(
+            parse_rrule('FREQ=MONTHLY;UNTIL=20271231T000000Z')['until'],
+            date(2027, 12, 31))
+
+    def test_parse_rrule_rejects_unsupported_rules(self):
+        """
+        Unsupported or inconsistent rules raise `ValidationError`.
+        """
+        for rule in ['FREQ=YEARLY', 'FREQ=DAILY;BYHOUR=9',
+                     'FREQ=DAILY;BYDAY=MO', 'FREQ=WEEKLY;BYDAY=XX',
+                     'FREQ=DAILY;COUNT=2;UNTIL=20270101',
+                     'FREQ=DAILY;INTERVAL=0', 'FREQ']:
+            with self.subTest(rule=rule):
+                with self.assertRaises(ValidationError):
+                    parse_rrule(rule)
+
+    def series(self, rule, start):
+        return TaskRecurrence(start_date=start, last_date=start,
+                              **parse_rrule(rule))
+
+    def test_next_occurrence(self):
+        """
+        Each frequency steps from one occurrence to the next.
+        """
+        # Tuesday 2026-10-20
+        start = date(2026, 10, 20)
+        daily = self.series('FREQ=DAILY;INTERVAL=3', start)
+        self.assertEqual(next_occurrence(daily, start), date(2026, 10, 23))
+
+        weekly = self.series('FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,WE', start)
+        dates = [start]
+        for _ in range(4):
+            dates.append(next_occurrence(weekly, dates[-1]))
+        self.assertEqual(dates, [
+            date(2026, 10, 20), date(2026, 10, 21), date(2026, 11, 2),
+            date(2026, 11, 4), date(2026, 11, 16),
+        ])
+
+        # Months without a 31st are skipped
+        monthly = self.series('FREQ=MONTHLY', date(2026, 10, 31))
+        self.assertEqual(next_occurrence(monthly, date(2026, 10, 31)),
+                         date(2026, 12, 31))
+
+
+@override_settings(TASK_RECURRENCE_HORIZON_DAYS=14)
+class OccurrenceGenerationTest(TestCase):
+
+    def setUp(self):
+        """
+        Create a user with a task due tomorrow.
+        """
+        self.user = User.objects.create_user(
+            username="testuser", password="password123"
+        )
+        self.today = timezone.now().date()
+        self.task = Task.objects.create(
+            user=self.user,
+            title="Stand-up",
+            description="Daily meeting",
+            due_date=self.today + timedelta(days=1)
+        )
+
+    def due_dates(self, recurrence):
+        return list(recurrence.occurrences.order_by('due_date')
+                    .values_list('due_date', flat=True))
+
+    def test_occurrences_generated_up_to_the_horizon(self):
+        """
+        Only the occurrences within the horizon are created, and the
+        job is a no-op until more fall within it.
+        """
+        recurrence = make_recurring(self.task, 'FREQ=DAILY;INTERVAL=2')
+
+        self.assertEqual(
+            self.due_dates(recurrence),
+            [self.today + timedelta(days=days) for days in range(1, 15, 2)])
+        self.assertEqual(generate_due_occurrences()['created'], 0)
+
+        result = generate_due_occurrences(
+            today=self.today + timedelta(days=4))
+        self.assertEqual(result, {'created': 2, 'batches': 1})
+        self.assertEqual(self.due_dates(recurrence)[-1],
+                         self.today + timedelta(days=17))
+
+    def test_next_occurrence_beyond_the_horizon(self):
+        """
+        The next occurrence is created even when it is further away than
+        the horizon.
+        """
+        recurrence = make_recurring(self.task, 'FREQ=MONTHLY')
+        self.assertEqual(len(self.due_dates(recurrence)), 1)
+
+        generate_due_occurrences(today=self.task.due_date + timedelta(1))
+
+        recurrence.refresh_from_db()
+        self.assertEqual(len(self.due_dates(recurrence)), 2)
+        self.assertGreater(recurrence.last_date,
+                           self.task.due_date + timedelta(days=15))
+
+    def test_series_end(self):
+        """
+        Series stop after COUNT occurrences or after UNTIL.
+        """
+        counted = make_recurring(self.task, 'FREQ=DAILY;COUNT=3')
+        self.assertEqual(len(self.due_dates(counted)), 3)
+
+        other = Task.objects.create(
+            user=self.user,
+            title="Report",
+            description="Weekly report",
+            due_date=self.today + timedelta(days=1)
+        )
+        until = make_recurring(other, 'FREQ=WEEKLY;UNTIL=%s' % (
+            self.today + timedelta(days=8)).strftime('%Y%m%d'))
+        self.assertEqual(len(self.due_dates(until)), 2)
+
+        counted.refresh_from_db()
+        until.refresh_from_db()
+        self.assertFalse(counted.active)
+        self.assertFalse(until.active)
+
+    def test_past_occurrences_skipped(self):
+        """
+        Occurrences that fell due while none were generated are skipped
+        instead of being created as overdue tasks.
+        """
+        recurrence = make_recurring(self.task, 'FREQ=WEEKLY')
+
+        generate_due_occurrences(today=self.today + timedelta(days=60))
+
+        dates = self.due_dates(recurrence)
+        self.assertNotIn(self.today + timedelta(days=29), dates)
+        self.assertIn(self.today + timedelta(days=64), dates)
+        recurrence.refresh_from_db()
+        self.assertEqual(recurrence.generated_count,
+                         1 + (recurrence.last_date - self.task.due_date).days
+                         // 7)
+
+    def test_add_view_creates_a_series(self):
+        """
+        Choosing how often a new task repeats creates the series.
+        """
+        self.client.login(username="testuser", password="password123")
+        self.client.post(reverse('task_add', args=[self.user.id]), {
+            'title': "Gym",
+            'description': "Workout",
+            'priority': Task.LOW,
+            'status': Task.TO_DO,
+            'category': Task.HEALTH,
+            'due_date': (self.today + timedelta(days=1)).isoformat(),
+            'repeat': TaskRecurrence.WEEKLY,
+        })
+
+        recurrence = TaskRecurrence.objects.get(title="Gym")
+        self.assertEqual(recurrence.rule, 'FREQ=WEEKLY')
+        self.assertEqual(
+            self.due_dates(recurrence),
+            [self.today + timedelta(days=1), self.today + timedelta(days=8)])
+
+
+class OccurrenceDueDateTest(TestCase):
+
+    def setUp(self):
+        """
+        Create a logged-in user with a daily series of three tasks.
+        """
+        self.user = User.objects.create_user(
+            username="testuser", password="password123"
+        )
+        self.client.force_login(self.user)
+        self.today = timezone.now().date()
+        first = Task.objects.create(
+            user=self.user,
+            title="Stand-up",
+            description="Daily meeting",
+            due_date=self.today + timedelta(days=1)
+        )
+        self.recurrence = make_recurring(first, 'FREQ=DAILY;COUNT=3')
+        self.first, self.second, self.third = (
+            self.recurrence.occurrences.order_by('due_date'))
+
+    def test_edit_onto_another_occurrence(self):
+        """
+        The edit form refuses the due date of another occurrence.
+        """
+        response = self.client.post(
+            reverse('task_edit', args=[self.user.id, self.second.id]), {
+                'title': self.second.title,
+                'description': self.second.description,
+                'priority': self.second.priority,
+                'status': self.second.status,
+                'category': self.second.category,
+                'due_date': self.first.due_date.isoformat(),
+            })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['task_form'].errors['due_date'],
+                         [OCCURRENCE_DATE_TAKEN_MESSAGE])
+        self.second.refresh_from_db()
+        self.assertEqual(self.second.due_date,
+                         self.today + timedelta(days=2))
+
+    def test_bulk_change_onto_one_date(self):
+        """
+        A bulk due date change leaves out the occurrences that would
+        share the new date, and moves the other tasks.
+        """
+        other = Task.objects.create(
+            user=self.user,
+            title="Report",
+            description="One-off",
+            due_date=self.today + timedelta(days=1)
+        )
+        new_date = self.today + timedelta(days=3)
+
+        result = bulk_change_tasks(
+            Task.objects.filter(user=self.user), {'due_date': new_date})
+
+        self.assertEqual(result, {'updated': 2, 'rejected': [
+            (Task.TO_DO, 2, OCCURRENCE_DATE_TAKEN_MESSAGE)]})
+        other.refresh_from_db()
+        self.assertEqual(other.due_date, new_date)
+        self.assertEqual(
+            list(self.recurrence.occurrences.order_by('due_date')
+                 .values_list('due_date', flat=True)),
+            [self.today + timedelta(days=days) for days in (1, 2, 3)])
+
+    def test_api_bulk_update_onto_one_date(self):
+        """
+        The API refuses occurrences moved onto the date of another one,
+        in the database or in the same request.
+        """
+        def bulk_update(*items):
+            return self.client.patch(
+                reverse('api_task_bulk'), json.dumps({'tasks': items}),
+                content_type='application/json')
+
+        new_date = (self.today + timedelta(days=5)).isoformat()
+        response = bulk_update(
+            {'id': self.first.id, 'due_date': new_date},
+            {'id': self.second.id, 'due_date': new_date},
+            {'id': self.third.id,
+             'due_date': self.first.due_date.isoformat()},
+        )
+
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()['errors']
+        self.assertEqual(sorted(errors), ['1', '2'])
+        for error in errors.values():
+            self.assertEqual(error['due_date'][0]['message'],
+                             OCCURRENCE_DATE_TAKEN_MESSAGE)
+        self.assertFalse(Task.objects.filter(due_date=new_date).exists())
@@ -0,0 +1,84 @@
+import tempfile
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from task_manager_project.storage import StaticFilesStorage
+
+
+class StaticAssetsTest(TestCase):
+
+    def setUp(self):
+        """
+        Collect the project's static files into a temporary directory.
+        """
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = override_settings(
+            STATIC_ROOT=directory.name,
+            STATICFILES_FINDERS=[
+                'django.contrib.staticfiles.finders.FileSystemFinder',
+            ],
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.static_root = directory.name
+
+    def collectstatic(self):
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+    def test_fingerprinted_assets_cached_forever(self):
+        """
+        Pages link the fingerprinted assets, which are served with
+        immutable caching headers and precompressed.
+        """
+        self.collectstatic()
+        user = User.objects.create_user(
+            username="testuser", password="password123"
+        )
+        self.client.force_login(user)
+
+        response = self.client.get(reverse('task_dashboard', args=[user.id]))
+        script = next(
+            line for line in response.content.decode().splitlines()
+            if 'js/task_management' in line)
+        url = script.split('"')[1]
+        self.assertRegex(url, r'task_management\.[0-9a-f]{12}\.js$')
+
+        asset = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(asset.status_code, 200)
+        self.assertIn('immutable', asset['Cache-Control'])
+        self.assertEqual(asset['Content-Encoding'], 'gzip')
+
+    def test_check_static_assets(self):
+        """
+        The check fails until the assets have been collected.
+        """
+        with self.assertRaisesMessage(CommandError, "'css/style.css'"):
+            call_command('check_static_assets', stdout=StringIO())
+
+        self.collectstatic()
+        out = StringIO()
+        call_command('check_static_assets', stdout=out)
+        self.assertIn("are fingerprinted", out.getvalue())
+
+    def test_missing_manifest_entry(self):
+        """
+        Without a manifest, files are linked under their plain names
+        with a warning; once collected, a missing entry is an error.
+        """
+        storage = StaticFilesStorage()
+        with self.assertLogs('task_manager_project.storage', 'WARNING'):
+            self.assertEqual(storage.stored_name('css/style.css'),
+                             'css/style.css')
+
+        self.collectstatic()
+        storage = StaticFilesStorage()
+        self.assertNotEqual(storage.stored_name('css/style.css'),
+                            'css/style.css')
+        with self.assertRaisesMessage(ValueError, 'css/missing.css'):
+            storage.stored_name('css/missing.css')
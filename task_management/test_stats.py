@@ -0,0 +1,107 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+
+from .bulk import bulk_change_tasks
+from .models import Task, TaskStats
+from .overdue import mark_overdue_tasks
+from .stats import rebuild_task_stats
+
+
+class TaskStatsTest(TestCase):
+
+    def setUp(self):
+        """
+        Create a user with a task due tomorrow.
+        """
+        self.user = User.objects.create_user(
+            username="testuser", password="password123"
+        )
+        self.today = timezone.now().date()
+        self.task = self.create_task(Task.TO_DO, days=1)
+
+    def create_task(self, status, days):
+        return Task.objects.create(
+            user=self.user,
+            title="Task",
+            description="A task",
+            status=status,
+            due_date=self.today + timedelta(days=days)
+        )
+
+    def stats(self):
+        return TaskStats.objects.get(pk=self.user.pk)
+
+    def assertConsistent(self):
+        self.assertEqual(
+            rebuild_task_stats([self.user.pk], verify=True)['mismatched'],
+            [])
+
+    def test_counters_follow_saves_and_deletes(self):
+        """
+        Creating, updating and deleting tasks adjust the counters.
+        """
+        other = self.create_task(Task.IN_PROGRESS, days=3)
+        other.status = Task.COMPLETED
+        other.save()
+        self.assertEqual(self.stats().counts(), {
+            'to_do': 1, 'in_progress': 0, 'completed': 1, 'overdue': 0})
+
+        self.task.delete()
+        other.delete()
+        self.assertEqual(self.stats().counts(), {
+            'to_do': 0, 'in_progress': 0, 'completed': 0, 'overdue': 0})
+        self.assertConsistent()
+
+    def test_counters_follow_bulk_changes(self):
+        """
+        Bulk status changes move the counted tasks between statuses.
+        """
+        self.create_task(Task.TO_DO, days=2)
+
+        bulk_change_tasks(Task.objects.filter(user=self.user),
+                          {'status': Task.IN_PROGRESS})
+
+        self.assertEqual(self.stats().in_progress, 2)
+        self.assertConsistent()
+
+    def test_overdue_sweep(self):
+        """
+        Tasks falling due are counted as overdue before the sweep, and
+        moved between the counters by it.
+        """
+        Task.objects.filter(pk=self.task.pk).update(
+            due_date=self.today - timedelta(days=1))
+        rebuild_task_stats([self.user.pk])
+        self.create_task(Task.IN_PROGRESS, days=5)
+        self.assertFalse(self.stats().is_current(self.today))
+
+        mark_overdue_tasks()
+
+        stats = self.stats()
+        self.assertEqual((stats.to_do, stats.overdue), (0, 1))
+        # The pending task due in 5 days is the next to fall due
+        self.assertEqual(stats.next_due_date,
+                         self.today + timedelta(days=5))
+        self.assertConsistent()
+
+    def test_rebuild(self):
+        """
+        Drifted and missing counters are reported and rebuilt.
+        """
+        TaskStats.objects.filter(pk=self.user.pk).update(to_do=7)
+        other = User.objects.create_user(username="other", password="pw")
+        TaskStats.objects.filter(pk=other.pk).delete()
+
+        self.assertEqual(rebuild_task_stats(verify=True), {
+            'checked': 2, 'mismatched': [self.user.pk, other.pk]})
+        self.assertEqual(self.stats().to_do, 7)
+
+        rebuild_task_stats(batch_size=1)
+
+        self.assertEqual(self.stats().to_do, 1)
+        self.assertEqual(TaskStats.objects.get(pk=other.pk).counts(), {
+            'to_do': 0, 'in_progress': 0, 'completed': 0, 'overdue': 0})
+        self.assertEqual(rebuild_task_stats(verify=True)['mismatched'], [])
@@ -0,0 +1,196 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .bulk import bulk_change_tasks
+from .models import Task
+
+
+class SubtaskTest(TestCase):
+
+    def setUp(self):
+        """
+        Create a user with a top-level task.
+        """
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="testuser", password="password123"
+        )
+        self.root = self.create_task("Root")
+
+    def create_task(self, title, parent=None, **fields):
+        return Task.objects.create(
+            user=self.user,
+            parent=parent,
+            title=title,
+            description="Description",
+            due_date=timezone.now().date() + timedelta(days=1),
+            **fields
+        )
+
+    def counts(self, task):
+        task.refresh_from_db()
+        return task.completed_subtask_count, task.subtask_count
+
+    def test_paths(self):
+        """
+        Subtasks store the path from their root, and a whole subtree is
+        read with one query.
+        """
+        child = self.create_task("Child", self.root)
+        grandchild = self.create_task("Grandchild", child)
+        self.create_task("Other")
+
+        self.assertEqual(self.root.path, '')
+        self.assertEqual(grandchild.path, '/%d/%d/%d/' % (
+            self.root.pk, child.pk, grandchild.pk))
+        self.assertEqual(grandchild.depth, 2)
+        with self.assertNumQueries(1):
+            self.assertEqual(list(self.root.get_descendants()),
+                             [child, grandchild])
+
+    def test_subtrees_of_ids_sharing_a_prefix(self):
+        """
+        The subtree of a task doesn't spill into those of tasks whose id
+        starts with its own, e.g. 100 and 1000.
+        """
+        short = self.create_task("Short", pk=100)
+        long = self.create_task("Long", pk=1000)
+        short_child = self.create_task("Short child", short, pk=1005)
+        long_child = self.create_task("Long child", long, pk=1006)
+
+        self.assertEqual(list(short.get_descendants()), [short_child])
+        self.assertEqual(list(long.get_descendants()), [long_child])
+
+    def test_counters_follow_status_changes(self):
+        """
+        Adding, completing and deleting subtasks update the direct
+        parent's counters.
+        """
+        first = self.create_task("First", self.root, status=Task.IN_PROGRESS)
+        second = self.create_task("Second", self.root,
+                                  status=Task.IN_PROGRESS)
+        self.assertEqual(self.counts(self.root), (0, 2))
+
+        first.status = Task.COMPLETED
+        with self.assertNumQueries(3):
+            # The task, its parent's counters and its owner's
+            first.save()
+        self.assertEqual(self.counts(self.root), (1, 2))
+        self.assertEqual(self.root.progress, 50)
+
+        first.delete()
+        self.assertEqual(self.counts(self.root), (0, 1))
+
+        second.status = Task.COMPLETED
+        second.save()
+        self.assertEqual(self.counts(self.root), (1, 1))
+        self.assertEqual(self.root.progress, 100)
+
+    def test_moving_a_subtree(self):
+        """
+        Moving a task rewrites the paths of its subtree and moves it
+        between the parents' counters.
+        """
+        child = self.create_task("Child", self.root, status=Task.IN_PROGRESS)
+        child.status = Task.COMPLETED
+        child.save()
+        grandchild = self.create_task("Grandchild", child)
+        other = self.create_task("Other")
+
+        child.parent = other
+        child.save()
+
+        grandchild.refresh_from_db()
+        self.assertEqual(grandchild.path, '/%d/%d/%d/' % (
+            other.pk, child.pk, grandchild.pk))
+        self.assertEqual(self.counts(self.root), (0, 0))
+        self.assertEqual(self.counts(other), (1, 1))
+
+        child.parent = None
+        child.save()
+        grandchild.refresh_from_db()
+        self.assertEqual(child.path, '')
+        self.assertEqual(grandchild.path, '/%d/%d/' % (
+            child.pk, grandchild.pk))
+
+    def test_cycles_rejected(self):
+        """
+        A task can't be moved below one of its own subtasks.
+        """
+        child = self.create_task("Child", self.root)
+        self.root.parent = child
+        with self.assertRaises(ValidationError):
+            self.root.clean()
+
+    def test_bulk_status_change_recounts_parents(self):
+        """
+        Bulk status changes, which bypass `save()`, recount the parents.
+        """
+        for index in range(3):
+            self.create_task("Child %d" % index, self.root,
+                             status=Task.IN_PROGRESS)
+
+        bulk_change_tasks(Task.objects.filter(parent=self.root),
+                          {'status': Task.COMPLETED})
+
+        self.assertEqual(self.counts(self.root), (3, 3))
+
+    def test_add_subtask_view(self):
+        """
+        The add view creates a subtask below one of the user's tasks.
+        """
+        self.client.login(username="testuser", password="password123")
+        url = reverse('task_add', args=[self.user.id])
+
+        response = self.client.get(url, {'parent': self.root.pk})
+        self.assertContains(response, 'name="parent"')
+
+        self.client.post(url, {
+            'parent': self.root.pk,
+            'title': "Subtask",
+            'description': "Part of the root task",
+            'priority': Task.LOW,
+            'status': Task.TO_DO,
+            'category': Task.WORK,
+            'due_date': (timezone.now().date()
+                         + timedelta(days=1)).isoformat(),
+        })
+
+        self.assertEqual(Task.objects.get(title="Subtask").parent,
+                         self.root)
+        self.assertEqual(self.counts(self.root), (0, 1))
+
+        other = User.objects.create_user(username="other", password="pw")
+        foreign = Task.objects.create(
+            user=other, title="Foreign", description="Not yours",
+            due_date=timezone.now().date() + timedelta(days=1))
+        response = self.client.get(url, {'parent': foreign.pk})
+        self.assertEqual(response.status_code, 404)
+
+    def test_dashboard_queries_constant_with_deep_hierarchies(self):
+        """
+        The dashboard runs the same number of queries however deep the
+        subtasks are nested.
+        """
+        self.client.login(username="testuser", password="password123")
+        url = reverse('task_dashboard', args=[self.user.id])
+
+        self.client.get(url)
+        cache.clear()
+        with self.assertNumQueries(6):
+            self.client.get(url)
+
+        parent = self.root
+        for depth in range(10):
+            parent = self.create_task("Level %d" % depth, parent)
+
+        cache.clear()
+        with self.assertNumQueries(6):
+            response = self.client.get(url)
+        self.assertContains(response, "0/1 subtasks")
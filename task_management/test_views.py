@@ -0,0 +1,845 @@
+import csv
+import io
+import json
+import tempfile
+from datetime import timedelta
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .cache import get_dashboard_generation
+from .checks import check_shared_cache
+from .export import get_export_filters, iter_export
+from .models import Task
+from .overdue import mark_overdue_tasks
+from .stats import rebuild_task_stats
+
+
+class TaskDashboardViewTest(TestCase):
+
+    def setUp(self):
+        """
+        Create a user with tasks in every dashboard section and log
+        them in.
+        """
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="testuser", password="password123"
+        )
+        self.client.force_login(self.user)
+        self.url = reverse('task_dashboard', args=[self.user.id])
+        today = timezone.now().date()
+
+        self.upcoming = Task.objects.create(
+            user=self.user,
+            title="Upcoming Task",
+            description="Due in a few days",
+            status=Task.TO_DO,
+            due_date=today + timedelta(days=3)
+        )
+        self.far_away = Task.objects.create(
+            user=self.user,
+            title="Far Away Task",
+            description="Due next quarter",
+            status=Task.IN_PROGRESS,
+            due_date=today + timedelta(days=90)
+        )
+        self.completed = Task.objects.create(
+            user=self.user,
+            title="Completed Task",
+            description="Already done",
+            status=Task.COMPLETED,
+            due_date=today + timedelta(days=2)
+        )
+        # Bypass save() so the task keeps a pending status past its due date
+        self.overdue = Task.objects.create(
+            user=self.user,
+            title="Overdue Task",
+            description="Should have been done",
+            status=Task.IN_PROGRESS,
+            due_date=today + timedelta(days=1)
+        )
+        Task.objects.filter(pk=self.overdue.pk).update(
+            due_date=today - timedelta(days=1))
+        # Raw updates bypass the counters
+        rebuild_task_stats([self.user.pk])
+
+    def test_dashboard_query_count(self):
+        """
+        The dashboard costs a constant number of queries: session, user,
+        the summary of the tasks for the ETag, one lookup of the counters
+        and one page each for the overdue and upcoming sections.
+        """
+        mark_overdue_tasks()
+
+        with self.assertNumQueries(6):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['task_counts']['overdue'], 1)
+
+    def test_dashboard_counts_before_overdue_sweep(self):
+        """
+        Until the overdue sweep catches up, the tasks are counted with
+        one more aggregate query.
+        """
+        with self.assertNumQueries(7):
+            self.client.get(self.url)
+
+    def test_dashboard_sections(self):
+        """
+        Tasks are split into the overdue, upcoming and completed sections.
+        """
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.context['overdue_tasks'], [self.overdue])
+        self.assertEqual(response.context['upcoming_tasks'],
+                         [self.completed, self.upcoming])
+        # Completed tasks are only loaded when the section is expanded
+        self.assertNotIn('completed_tasks', response.context)
+
+    def test_dashboard_counts(self):
+        """
+        The status counters match the tasks owned by the user.
+        """
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.context['task_counts'], {
+            'to_do': 1,
+            'in_progress': 1,
+            'completed': 1,
+            'overdue': 1,
+        })
+
+    def test_dashboard_materialized_overdue(self):
+        """
+        Tasks already moved to 'Overdue' are shown and counted as overdue.
+        """
+        mark_overdue_tasks()
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.context['overdue_tasks'], [self.overdue])
+        self.assertEqual(response.context['task_counts']['overdue'], 1)
+        self.assertEqual(response.context['task_counts']['in_progress'], 1)
+
+    def test_dashboard_filters(self):
+        """
+        Filters and the visibility window only apply to upcoming tasks.
+        """
+        response = self.client.get(self.url, {
+            'status': Task.IN_PROGRESS,
+            'visibility': 'all',
+        })
+
+        self.assertEqual(response.context['upcoming_tasks'], [self.far_away])
+        self.assertEqual(response.context['overdue_tasks'], [self.overdue])
+
+    def test_visibility_options(self):
+        """
+        The visibility options send the keys the view understands.
+        """
+        response = self.client.get(self.url, {'visibility': '2_weeks'})
+
+        self.assertContains(response, 'value="2_weeks" selected')
+        self.assertContains(response, "Tasks Due in the Next 2 Weeks")
+
+    def test_upcoming_table_fragment(self):
+        """
+        The filters fetch only the upcoming table: no counters and no
+        other section are loaded or rendered.
+        """
+        url = reverse('task_upcoming', args=[self.user.id])
+
+        with self.assertNumQueries(4):
+            response = self.client.get(url, {
+                'status': Task.IN_PROGRESS,
+                'visibility': 'all',
+            })
+
+        self.assertEqual(response.context['upcoming_tasks'], [self.far_away])
+        self.assertContains(response, 'data-heading="All Upcoming Tasks"')
+        self.assertNotContains(response, "Overdue Tasks")
+        self.assertNotIn('task_counts', response.context)
+
+    def test_upcoming_table_json(self):
+        """
+        The upcoming table is also available as JSON.
+        """
+        response = self.client.get(
+            reverse('task_upcoming', args=[self.user.id]),
+            {'visibility': 'all', 'format': 'json'})
+
+        data = response.json()
+        self.assertEqual(data['heading'], "All Upcoming Tasks")
+        self.assertEqual(
+            [task['id'] for task in data['tasks']],
+            [self.completed.id, self.upcoming.id, self.far_away.id])
+        self.assertIsNone(data['next_url'])
+
+    def test_dashboard_other_user_redirects(self):
+        """
+        A user cannot view another user's dashboard.
+        """
+        other = User.objects.create_user(
+            username="otheruser", password="password123"
+        )
+        response = self.client.get(
+            reverse('task_dashboard', args=[other.id]))
+        self.assertRedirects(response, '/')
+
+
+class TaskDashboardCacheTest(TestCase):
+
+    def setUp(self):
+        """
+        Create a logged-in user with one upcoming task.
+        """
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="testuser", password="password123"
+        )
+        self.client.force_login(self.user)
+        self.url = reverse('task_dashboard', args=[self.user.id])
+        self.task = Task.objects.create(
+            user=self.user,
+            title="Upcoming Task",
+            description="Due in a few days",
+            status=Task.IN_PROGRESS,
+            due_date=timezone.now().date() + timedelta(days=3)
+        )
+
+    def test_repeat_visit_is_cached(self):
+        """
+        A repeat visit only loads the session, the user and the summary
+        of their tasks for the ETag.
+        """
+        self.client.get(self.url)
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url)
+        self.assertEqual(response.context['upcoming_tasks'], [self.task])
+
+    def test_task_changes_invalidate_cache(self):
+        """
+        Saving or deleting a task refreshes its owner's dashboard.
+        """
+        self.client.get(self.url)
+
+        self.task.status = Task.COMPLETED
+        with self.captureOnCommitCallbacks(execute=True):
+            self.task.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response.context['task_counts']['completed'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.task.delete()
+        response = self.client.get(self.url)
+        self.assertEqual(response.context['task_counts']['completed'], 0)
+
+    def test_invalidated_on_commit(self):
+        """
+        Changes only invalidate the cache once committed, so concurrent
+        requests can't cache the old data under the new generation.
+        """
+        generation = get_dashboard_generation(self.user.id)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.task.status = Task.COMPLETED
+            self.task.save()
+            self.assertEqual(
+                get_dashboard_generation(self.user.id), generation)
+
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(
+            get_dashboard_generation(self.user.id), generation)
+
+    @override_settings(WEB_CONCURRENCY=2)
+    def test_shared_cache_required(self):
+        """
+        A per-process cache is refused when several workers run.
+        """
+        self.assertEqual(
+            [error.id for error in check_shared_cache(None)],
+            ['task_management.E001'])
+
+        with override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': 'redis://localhost:6379',
+        }}):
+            self.assertEqual(check_shared_cache(None), [])
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'focusflow',
+    }})
+    def test_not_cached_in_database(self):
+        """
+        The database cache is left alone, as it would take more queries
+        than it saves: there is no cache table to read at all.
+        """
+        with self.assertNumQueries(6):
+            self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.task.save()
+        with self.assertNumQueries(6):
+            response = self.client.get(self.url)
+        self.assertEqual(response.context['upcoming_tasks'], [self.task])
+
+    def test_overdue_sweep_invalidates_cache(self):
+        """
+        The bulk overdue sweep invalidates the affected dashboards.
+        """
+        Task.objects.filter(pk=self.task.pk).update(
+            due_date=timezone.now().date() - timedelta(days=1))
+        self.client.get(self.url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            mark_overdue_tasks()
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.context['overdue_tasks'][0].status,
+                         Task.OVERDUE)
+
+    def test_file_based_cache(self):
+        """
+        The cache works with the file-based backend.
+        """
+        with tempfile.TemporaryDirectory() as location:
+            with override_settings(CACHES={'default': {
+                'BACKEND':
+                    'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': location,
+            }}):
+                self.client.get(self.url)
+                with self.assertNumQueries(3):
+                    self.client.get(self.url)
+
+                with self.captureOnCommitCallbacks(execute=True):
+                    self.task.delete()
+                response = self.client.get(self.url)
+                self.assertEqual(response.context['upcoming_tasks'], [])
+
+
+class TaskSectionViewTest(TestCase):
+
+    def setUp(self):
+        """
+        Create a logged-in user with more completed tasks than fit on
+        one page.
+        """
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="testuser", password="password123"
+        )
+        self.client.force_login(self.user)
+        today = timezone.now().date()
+        self.tasks = [
+            Task.objects.create(
+                user=self.user,
+                title="Completed Task %d" % i,
+                description="x" * 500,
+                status=Task.COMPLETED,
+                due_date=today + timedelta(days=i % 3)
+            )
+            for i in range(5)
+        ]
+        self.tasks.sort(key=lambda task: (task.due_date, task.pk))
+        self.url = reverse('task_section', args=[self.user.id, 'completed'])
+
+    @patch('task_management.dashboard.PAGE_SIZE', 2)
+    def test_keyset_pages(self):
+        """
+        Following the "Load more" cursors walks every task exactly once,
+        in `(due_date, id)` order.
+        """
+        seen = []
+        pages = 0
+        url = self.url
+        while url:
+            # Each page also summarises the tasks for the ETag
+            with self.assertNumQueries(4):
+                response = self.client.get(url)
+            seen.extend(response.context['tasks'])
+            url = response.context['next_url']
+            pages += 1
+
+        self.assertEqual(pages, 3)
+        self.assertEqual(seen, self.tasks)
+
+    def test_description_is_truncated(self):
+        """
+        Only a preview of long descriptions is rendered.
+        """
+        response = self.client.get(self.url)
+        self.assertNotContains(response, "x" * 200)
+
+    def test_invalid_cursor(self):
+        """
+        A malformed cursor is rejected.
+        """
+        response = self.client.get(self.url, {'after': 'nonsense'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_unknown_section(self):
+        """
+        Unknown sections return a 404.
+        """
+        response = self.client.get(
+            reverse('task_section', args=[self.user.id, 'archived']))
+        self.assertEqual(response.status_code, 404)
+
+
+class TaskEditViewTest(TestCase):
+
+    def setUp(self):
+        """
+        Create a logged-in user with a task in progress.
+        """
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="testuser", password="password123"
+        )
+        self.client.force_login(self.user)
+        self.task = Task.objects.create(
+            user=self.user,
+            title="In Progress Task",
+            description="A task that's in progress",
+            status=Task.IN_PROGRESS,
+            due_date=timezone.now().date() + timedelta(days=5)
+        )
+        self.url = reverse('task_edit', args=[self.user.id, self.task.id])
+
+    def post_data(self, **overrides):
+        """
+        Return valid form data for the task, with optional overrides.
+        """
+        data = {
+            'title': self.task.title,
+            'description': self.task.description,
+            'priority': self.task.priority,
+            'status': self.task.status,
+            'category': self.task.category,
+            'due_date': self.task.due_date.isoformat(),
+        }
+        data.update(overrides)
+        return data
+
+    def test_edit_post_query_count(self):
+        """
+        An edit costs the session, the user, one task lookup, the update
+        and the owner's counters: the previous status is never fetched
+        again.
+        """
+        with self.assertNumQueries(5):
+            response = self.client.post(
+                self.url, self.post_data(status=Task.COMPLETED))
+
+        self.assertRedirects(
+            response, reverse('task_dashboard', args=[self.user.id]))
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.status, Task.COMPLETED)
+
+    def test_edit_rejects_invalid_transition(self):
+        """
+        A task cannot be moved from 'Completed' back to 'To Do'.
+        """
+        Task.objects.filter(pk=self.task.pk).update(status=Task.COMPLETED)
+
+        response = self.client.post(
+            self.url, self.post_data(status=Task.TO_DO))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['task_form'].errors)
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.status, Task.COMPLETED)
+
+
+class TaskInPlaceActionsTest(TestCase):
+
+    def setUp(self):
+        """
+        Create a logged-in user with a task in progress.
+        """
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="testuser", password="password123"
+        )
+        self.client.force_login(self.user)
+        self.task = Task.objects.create(
+            user=self.user,
+            title="In Progress Task",
+            description="A task that's in progress",
+            status=Task.IN_PROGRESS,
+            due_date=timezone.now().date() + timedelta(days=5)
+        )
+
+    def transition(self, task, status):
+        return self.client.post(
+            reverse('task_transition', args=[self.user.id, task.id]),
+            {'status': status})
+
+    def test_transition(self):
+        """
+        A status change returns the new row and counters. It costs the
+        session, the user, the task, its update, and the update and read
+        of the counters: the dashboard is not rendered again.
+        """
+        with self.assertNumQueries(6):
+            response = self.transition(self.task, Task.COMPLETED)
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['status'], Task.COMPLETED)
+        self.assertIn('data-task-id="%d"' % self.task.id, data['row'])
+        self.assertEqual(data['counts'], {
+            'to_do': 0, 'in_progress': 0, 'completed': 1, 'overdue': 0})
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.status, Task.COMPLETED)
+
+    def test_transition_rules(self):
+        """
+        Transitions are checked against the model's rules, and tasks in
+        progress can still be completed once past due, until they are
+        marked 'Overdue'.
+        """
+        to_do = Task.objects.create(
+            user=self.user, title="To Do", description="A task",
+            status=Task.TO_DO, due_date=self.task.due_date)
+        response = self.transition(to_do, Task.COMPLETED)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('status', response.json()['errors'])
+
+        response = self.transition(to_do, Task.OVERDUE)
+        self.assertEqual(response.status_code, 400)
+
+        Task.objects.filter(pk=self.task.pk).update(
+            due_date=timezone.now().date() - timedelta(days=1))
+        response = self.transition(self.task, Task.COMPLETED)
+        self.assertEqual(response.status_code, 200)
+
+    def test_transition_overdue(self):
+        """
+        'Overdue' tasks can't be completed or reopened in place: they
+        need a new due date first, and their row offers no transition.
+        """
+        Task.objects.filter(pk=self.task.pk).update(
+            status=Task.OVERDUE,
+            due_date=timezone.now().date() - timedelta(days=1))
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.next_statuses, [])
+
+        response = self.transition(self.task, Task.COMPLETED)
+        self.assertEqual(response.status_code, 400)
+        response = self.transition(self.task, Task.IN_PROGRESS)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['errors']['status'], [
+            "Past due tasks can only be reopened with a new due date."])
+
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.status, Task.OVERDUE)
+
+    def test_transition_requires_owner(self):
+        """
+        Other users' tasks can neither be changed nor deleted.
+        """
+        other = User.objects.create_user(username="other", password="pw")
+        self.client.force_login(other)
+
+        response = self.transition(self.task, Task.COMPLETED)
+        self.assertEqual(response.status_code, 403)
+        response = self.client.post(
+            reverse('task_transition', args=[other.id, self.task.id]),
+            {'status': Task.COMPLETED})
+        self.assertEqual(response.status_code, 404)
+        response = self.client.post(
+            reverse('task_delete_json', args=[other.id, self.task.id]))
+        self.assertEqual(response.status_code, 404)
+
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.status, Task.IN_PROGRESS)
+
+    def test_delete(self):
+        """
+        Deleting a task returns the ids of the rows to remove, its
+        subtasks included, and the new counters.
+        """
+        subtask = Task.objects.create(
+            user=self.user, title="Subtask", description="A subtask",
+            status=Task.TO_DO, due_date=self.task.due_date,
+            parent=self.task)
+
+        response = self.client.post(
+            reverse('task_delete_json', args=[self.user.id, self.task.id]))
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['deleted'], [self.task.id, subtask.id])
+        self.assertEqual(data['counts'], {
+            'to_do': 0, 'in_progress': 0, 'completed': 0, 'overdue': 0})
+        self.assertFalse(Task.objects.exists())
+
+        response = self.client.get(
+            reverse('task_delete_json', args=[self.user.id, subtask.id]))
+        self.assertEqual(response.status_code, 405)
+
+
+class TaskExportViewTest(TestCase):
+
+    def setUp(self):
+        """
+        Create a logged-in user with tasks of different priorities.
+        """
+        self.user = User.objects.create_user(
+            username="testuser", password="password123"
+        )
+        self.client.force_login(self.user)
+        self.url = reverse('task_export', args=[self.user.id])
+        due_date = timezone.now().date() + timedelta(days=3)
+        self.high = Task.objects.create(
+            user=self.user,
+            title="High, with a comma",
+            description="Multi\nline",
+            priority=Task.HIGH,
+            due_date=due_date
+        )
+        self.low = Task.objects.create(
+            user=self.user,
+            title="Low Task",
+            description="Can wait",
+            priority=Task.LOW,
+            due_date=due_date + timedelta(days=60)
+        )
+
+    def test_csv_export(self):
+        """
+        The CSV export streams a header and one record per task.
+        """
+        response = self.client.get(self.url, {'format': 'csv'})
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.reader(io.StringIO(
+            b''.join(response.streaming_content).decode())))
+        self.assertEqual(rows[0][:3], ['id', 'title', 'description'])
+        self.assertEqual(rows[1][1:3], ["High, with a comma", "Multi\nline"])
+        self.assertEqual(len(rows), 3)
+
+    def test_jsonl_export_with_filters(self):
+        """
+        The JSON Lines export honours the dashboard filters.
+        """
+        response = self.client.get(self.url, {
+            'format': 'jsonl',
+            'priority': Task.HIGH,
+        })
+        lines = b''.join(response.streaming_content).decode().splitlines()
+
+        self.assertEqual([json.loads(line)['id'] for line in lines],
+                         [self.high.id])
+
+        response = self.client.get(self.url, {
+            'format': 'jsonl',
+            'visibility': '1_month',
+        })
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 1)
+
+    def test_chunked_without_server_side_cursors(self):
+        """
+        Rows are fetched one chunk per query, by primary key, so exports
+        don't rely on server-side cursors.
+        """
+        lines = iter_export(self.user, get_export_filters({}),
+                            timezone.now().date(), 'jsonl', chunk_size=1)
+        # One query per chunk, and a last one finding no more rows
+        with self.assertNumQueries(3):
+            ids = [json.loads(line)['id'] for line in lines]
+        self.assertEqual(ids, [self.high.id, self.low.id])
+
+    def test_unknown_format(self):
+        """
+        Unknown formats are rejected.
+        """
+        response = self.client.get(self.url, {'format': 'xml'})
+        self.assertEqual(response.status_code, 400)
+
+
+class TaskImportViewTest(TestCase):
+
+    def setUp(self):
+        """
+        Create a logged-in user.
+        """
+        self.user = User.objects.create_user(
+            username="testuser", password="password123"
+        )
+        self.client.force_login(self.user)
+        self.url = reverse('task_import', args=[self.user.id])
+        self.due_date = timezone.now().date() + timedelta(days=3)
+
+    def test_upload_json_summary(self):
+        """
+        JSON clients get the number of tasks created and the errors.
+        """
+        upload = SimpleUploadedFile('tasks.csv', (
+            "title,description,due_date\n"
+            "Imported,From upload,%s\n"
+            "Broken,From upload,someday\n" % self.due_date
+        ).encode())
+
+        response = self.client.post(
+            self.url, {'file': upload}, HTTP_ACCEPT='application/json')
+
+        self.assertEqual(response.json(), {
+            'created': 1,
+            'errors': [{'line': 3, 'errors': [
+                "due_date: Enter a valid date."]}],
+        })
+
+    def test_upload_with_byte_order_mark(self):
+        """
+        The byte order mark of spreadsheet exports is skipped.
+        """
+        upload = SimpleUploadedFile('tasks.csv', (
+            "title,description,due_date\n"
+            "Imported,From a spreadsheet,%s\n" % self.due_date
+        ).encode('utf-8-sig'))
+
+        response = self.client.post(
+            self.url, {'file': upload}, HTTP_ACCEPT='application/json')
+
+        self.assertEqual(response.json()['created'], 1)
+        self.assertEqual(Task.objects.get().title, "Imported")
+
+    @override_settings(TASK_BULK_BATCH_SIZE=1)
+    def test_badly_encoded_upload_imports_nothing(self):
+        """
+        A file that isn't UTF-8 is rejected as a whole, even when only
+        its end is malformed.
+        """
+        upload = SimpleUploadedFile('tasks.csv', (
+            "title,description,due_date\n"
+            "Imported,From upload,%s\n" % self.due_date
+        ).encode() + b"Broken,\xff,2099-01-01\n")
+
+        response = self.client.post(
+            self.url, {'file': upload}, HTTP_ACCEPT='application/json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Task.objects.exists())
+
+    def test_upload_redirects_to_dashboard(self):
+        """
+        Browser uploads redirect back to the dashboard.
+        """
+        upload = SimpleUploadedFile('tasks.txt', b"nothing")
+
+        response = self.client.post(self.url, {'file': upload})
+
+        self.assertRedirects(
+            response, reverse('task_dashboard', args=[self.user.id]))
+        self.assertFalse(Task.objects.exists())
+
+
+class TaskSearchViewTest(TestCase):
+
+    def setUp(self):
+        """
+        Create a logged-in user with a few tasks to search through.
+        """
+        self.user = User.objects.create_user(
+            username="testuser", password="password123"
+        )
+        self.client.force_login(self.user)
+        self.url = reverse('task_search', args=[self.user.id])
+        due_date = timezone.now().date() + timedelta(days=3)
+        self.title_match = Task.objects.create(
+            user=self.user,
+            title="Quarterly report",
+            description="Numbers for the board",
+            due_date=due_date
+        )
+        self.description_match = Task.objects.create(
+            user=self.user,
+            title="Email the team",
+            description="Ask everyone to review the report draft",
+            due_date=due_date
+        )
+        Task.objects.create(
+            user=self.user,
+            title="Gym",
+            description="Leg day",
+            due_date=due_date
+        )
+        other = User.objects.create_user(
+            username="otheruser", password="password123"
+        )
+        Task.objects.create(
+            user=other,
+            title="Someone else's report",
+            description="Private",
+            due_date=due_date
+        )
+
+    def test_results_are_ranked(self):
+        """
+        Only the user's matching tasks are returned, title matches first.
+        """
+        response = self.client.get(self.url, {'q': 'report'})
+
+        self.assertEqual(response.context['tasks'],
+                         [self.title_match, self.description_match])
+
+    def test_index_follows_updates(self):
+        """
+        Edited and deleted tasks are reflected in the results.
+        """
+        self.title_match.title = "Quarterly numbers"
+        self.title_match.save()
+        self.description_match.delete()
+
+        response = self.client.get(self.url, {'q': 'report'})
+        self.assertEqual(response.context['tasks'], [])
+
+        response = self.client.get(self.url, {'q': 'numb'})
+        self.assertEqual(response.context['tasks'], [self.title_match])
+
+    @skipUnless(connection.vendor == 'sqlite', "SQLite FTS5 triggers")
+    def test_index_skips_other_updates(self):
+        """
+        Updating columns that aren't indexed leaves the index alone.
+        """
+        def total_changes():
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT total_changes()")
+                return cursor.fetchone()[0]
+
+        before = total_changes()
+        Task.objects.filter(pk=self.title_match.pk).update(
+            status=Task.IN_PROGRESS)
+        # Only the task row itself, no index writes from the trigger
+        self.assertEqual(total_changes() - before, 1)
+
+        # Saves write the indexed columns too, with the same values
+        self.title_match.refresh_from_db()
+        before = total_changes()
+        self.title_match.save()
+        self.assertEqual(total_changes() - before, 1)
+
+    @patch('task_management.views.SEARCH_PAGE_SIZE', 1)
+    def test_pagination(self):
+        """
+        Results are paginated with previous/next links.
+        """
+        response = self.client.get(self.url, {'q': 'report', 'page': 2})
+
+        self.assertEqual(response.context['tasks'], [self.description_match])
+        self.assertTrue(response.context['previous_page_url'])
+        self.assertFalse(response.context['next_page_url'])
@@ -0,0 +1,86 @@
+from django.core.exceptions import ValidationError
+
+
+# Status values, duplicated from `Task` to avoid a circular import with
+# models.py which uses this module for validation.
+TO_DO = 'To Do'
+IN_PROGRESS = 'In Progress'
+COMPLETED = 'Completed'
+OVERDUE = 'Overdue'
+
+# Statuses that are flipped to 'Overdue' once the due date has passed
+PENDING_STATUSES = [TO_DO, IN_PROGRESS]
+
+# Reported when a past due task would be moved to a pending status
+# while keeping its due date: saving it marks it 'Overdue' again
+PAST_DUE_MESSAGE = "Past due tasks can only be reopened with a new due date."
+
+# For each target status, the statuses a task may move to it from.
+# `None` stands for a task that hasn't been saved yet.
+ALLOWED_PREVIOUS_STATUSES = {
+    TO_DO: {None, TO_DO, IN_PROGRESS, OVERDUE},
+    IN_PROGRESS: {None, TO_DO, IN_PROGRESS, OVERDUE},
+    COMPLETED: {IN_PROGRESS},
+    # 'Overdue' is only ever set by the system
+    OVERDUE: set(),
+}
+
+
+def allowed_previous_statuses(status):
+    """
+    Return the saved statuses a task may be moved to `status` from.
+
+    Used for set-wise checks on querysets, e.g.
+    `queryset.filter(status__in=allowed_previous_statuses(status))`.
+    """
+    return {
+        previous for previous in ALLOWED_PREVIOUS_STATUSES.get(status, ())
+        if previous is not None
+    }
+
+
+def allowed_next_statuses(status):
+    """
+    Return the statuses a saved task in `status` may be moved to, in
+    the order of `ALLOWED_PREVIOUS_STATUSES`, leaving out `status`
+    itself.
+    """
+    return [
+        target for target, previous in ALLOWED_PREVIOUS_STATUSES.items()
+        if target != status and status in previous
+    ]
+
+
+def validate_status_transition(previous_status, status):
+    """
+    Check that a task may move from `previous_status` to `status`.
+
+    `previous_status` is `None` for a new task. Raises `ValidationError`
+    describing the first rule that is broken:
+    1. 'Overdue' cannot be assigned manually.
+    2. A task can only be marked 'Completed' if it was 'In Progress'.
+    3. A 'Completed' task cannot be changed back to 'To Do' or
+    'In Progress'.
+    """
+    allowed = ALLOWED_PREVIOUS_STATUSES.get(status)
+    # Unknown statuses are rejected by the field's choices instead
+    if allowed is None or previous_status in allowed:
+        return
+
+    if status == OVERDUE:
+        raise ValidationError(
+            "The status 'Overdue' is automatically set by the system and \
+            cannot be assigned manually.")
+
+    if status == COMPLETED:
+        if previous_status is None:
+            raise ValidationError(
+                "A new task cannot be marked as 'Completed'.")
+        raise ValidationError(
+            "A task can only be marked as 'Completed' after being \
+            'In Progress'.")
+
+    if previous_status == COMPLETED:
+        raise ValidationError(
+            "A task marked as 'Completed' cannot be changed back to \
+            '%s'." % status)
@@ -0,0 +1,44 @@
+# Materialized paths of subtasks.
+#
+# A subtask's `path` lists the primary keys of its ancestors and its own,
+# from the root down, e.g. '/12/34/'. Top-level tasks keep an empty path
+# and are addressed as '/<pk>/', so tasks created in bulk need no path.
+# Every path starting with a given prefix sorts between the prefix and
+# the same prefix with its final '/' replaced by the next character,
+# '0', so a whole subtree is read with one index range scan. That holds
+# in byte order, which the column uses on PostgreSQL too (see
+# `MaterializedPathField`).
+
+PATH_MAX_LENGTH = 255
+
+# Room for the last key and separator of a child's path
+MAX_KEY_LENGTH = 21
+
+
+def root_path(pk):
+    """
+    Return the path of a top-level task.
+    """
+    return '/%d/' % pk
+
+
+def child_path(parent_path, pk):
+    """
+    Return the path of a subtask of the task at `parent_path`.
+    """
+    return '%s%d/' % (parent_path, pk)
+
+
+def subtree_range(path):
+    """
+    Return the `(lower, upper)` bounds of the paths below `path`: every
+    one of them is >= lower and < upper, other paths are not.
+    """
+    return path, path[:-1] + '0'
+
+
+def depth(path):
+    """
+    Return the depth of the task at `path`, 0 for a top-level task.
+    """
+    return path.count('/') - 2
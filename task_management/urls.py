@@ -1,11 +1,35 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import api, async_views, views
 
 urlpatterns = [
     path('task-dashboard/<int:user_id>/',
          views.task_dashboard, name='task_dashboard'),
+    path('task-dashboard/<int:user_id>/upcoming/table/',
+         views.task_upcoming, name='task_upcoming'),
+    path('task-dashboard/<int:user_id>/<str:section>/',
+         views.task_section, name='task_section'),
     path('task-edit/<int:user_id>/<int:task_id>/', views.task_edit, name='task_edit'),
     path('task-delete/<int:user_id>/<int:task_id>/',
          views.task_delete, name='task_delete'),
+    path('task-delete/<int:user_id>/<int:task_id>/json/',
+         views.task_delete_json, name='task_delete_json'),
+    path('task-transition/<int:user_id>/<int:task_id>/',
+         views.task_transition, name='task_transition'),
     path('task-add/<int:user_id>/', views.task_add, name='task_add'),
+    path('task-export/<int:user_id>/', views.task_export,
+         name='task_export'),
+    path('task-import/<int:user_id>/', views.task_import,
+         name='task_import'),
+    path('task-search/<int:user_id>/', views.task_search,
+         name='task_search'),
+    path('api/tasks/', api.task_list, name='api_task_list'),
+    path('api/tasks/bulk/', api.task_bulk, name='api_task_bulk'),
+    path('api/tasks/<int:task_id>/', api.task_detail,
+         name='api_task_detail'),
 ]
+
+if settings.TASK_ASYNC_VIEWS:
+    # Event streams stay open, which would tie up a WSGI worker each
+    urlpatterns.append(path('task-events/<int:user_id>/',
+                            async_views.task_events, name='task_events'))
@@ -1,13 +1,63 @@
+import io
+from urllib.parse import urlencode
+
+from django.conf import settings
 from django.shortcuts import render, get_object_or_404, redirect, reverse
+from django.http import (
+    Http404,
+    HttpResponseBadRequest,
+    JsonResponse,
+    StreamingHttpResponse,
+)
+from django.views.decorators.http import require_POST
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
 from django.utils import timezone
 from django.contrib import messages
-from .forms import TaskForm
+from django.core.exceptions import ValidationError
+from django.template.loader import render_to_string
+from django.db.models.functions import Substr
+from .api import api_login_required, error_response
+from .cache import get_cached_dashboard_data
+from .conditional import conditional_task_page
+from .dashboard import (
+    DESCRIPTION_PREVIEW_LENGTH,
+    SECTIONS,
+    get_dashboard_filters,
+    get_section_page,
+    get_task_counts,
+    get_task_section,
+    get_upcoming_heading,
+    serialize_task_row,
+)
+from .export import (
+    EXPORT_FORMATS,
+    aiter_export,
+    get_export_filters,
+    iter_export,
+)
+from .forms import RecurrenceForm, TaskForm
+from .importer import (
+    IMPORT_ENCODING,
+    IMPORT_FORMATS,
+    check_encoding,
+    import_tasks,
+)
 from .models import Task
+from .transitions import (
+    PAST_DUE_MESSAGE,
+    PENDING_STATUSES,
+    validate_status_transition,
+)
+from .recurrence import make_recurring
+from .search import search_tasks
+
+# Number of results per search page
+SEARCH_PAGE_SIZE = 20
 
 
 @login_required(login_url='/accounts/login/')
+@conditional_task_page
 def task_dashboard(request, user_id):
     """
     View for the user's task dashboard.
@@ -17,6 +67,7 @@ def task_dashboard(request, user_id):
     (overdue, upcoming, completed).
     - Allows filtering tasks based on status, priority, category,
     and visibility.
+    - Answers `304 Not Modified` while the user's tasks are unchanged.
 
     **Template:**
     :template:`task_management/task-dashboard.html`
@@ -26,90 +77,182 @@ def task_dashboard(request, user_id):
         messages.error(request, "You are not authorised to access this page.")
         return redirect('/')
 
-    # Fetch the user object from the database
-    user = get_object_or_404(User, id=user_id)
+    # The logged-in user is the dashboard owner, no need to fetch it again
+    user = request.user
 
-    # Get the current date and upcoming date ranges
     today = timezone.now().date()
-    next_week = today + timezone.timedelta(days=7)
-    next_two_weeks = today + timezone.timedelta(weeks=2)
-    next_month = today + timezone.timedelta(weeks=4)
-
-    # Fetch overdue tasks for the user
-    overdue_tasks = Task.objects.filter(
-        user=user,
-        status__in=[Task.TO_DO, Task.IN_PROGRESS],
-        due_date__lt=today
-    )
-
-    # Extract filters from GET request parameters
-    filters = {
-        'status': request.GET.get('status', ''),
-        'priority': request.GET.get('priority', ''),
-        'category': request.GET.get('category', ''),
-        'visibility': request.GET.get('visibility', '7_days')
-    }
-
-    # Apply visibility filters to determine the upcoming tasks to show
-    if filters['visibility'] == '7_days':
-        upcoming_tasks = Task.objects.filter(
-            user=user, due_date__gte=today, due_date__lte=next_week)
-    elif filters['visibility'] == '2_weeks':
-        upcoming_tasks = Task.objects.filter(
-            user=user, due_date__gte=today, due_date__lte=next_two_weeks)
-    elif filters['visibility'] == '1_month':
-        upcoming_tasks = Task.objects.filter(
-            user=user, due_date__gte=today, due_date__lte=next_month)
-    else:
-        upcoming_tasks = Task.objects.filter(user=user, due_date__gte=today)
-
-    # Apply additional filters (status, priority, category)
-    if filters['status']:
-        upcoming_tasks = upcoming_tasks.filter(status=filters['status'])
-    if filters['priority']:
-        upcoming_tasks = upcoming_tasks.filter(priority=filters['priority'])
-    if filters['category']:
-        upcoming_tasks = upcoming_tasks.filter(category=filters['category'])
-
-    # Fetch completed tasks
-    completed_tasks = Task.objects.filter(user=user, status=Task.COMPLETED)
-
-    # Count tasks in different status (to-do, in-progress, completed, overdue)
-    task_counts = {
-        'to_do': Task.objects.filter(user=user, status=Task.TO_DO).count(),
-        'in_progress': Task.objects.filter(
-            user=user,
-            status=Task.IN_PROGRESS
-        ).count(),
-        'completed': Task.objects.filter(
-            user=user,
-            status=Task.COMPLETED
-        ).count(),
-        'overdue': overdue_tasks.count(),
-    }
+    filters = get_dashboard_filters(request)
+
+    # One lookup of the counters and one query per section page,
+    # each cached per user until one of their tasks changes.
+    # Completed tasks are only loaded once that section is expanded.
+    task_counts = get_cached_dashboard_data(
+        user.id, 'counts', today, None,
+        lambda: get_task_counts(user, today))
+    overdue_tasks, overdue_cursor = get_cached_dashboard_data(
+        user.id, 'overdue', today, None,
+        lambda: get_section_page(user, 'overdue', filters, today))
+    upcoming_tasks, upcoming_cursor = get_cached_dashboard_data(
+        user.id, 'upcoming', today, filters,
+        lambda: get_section_page(user, 'upcoming', filters, today))
 
     # Prepare context for the template
     context = {
         'user': user,
         'overdue_tasks': overdue_tasks,
+        'overdue_next_url': overdue_cursor and section_url(
+            user, 'overdue', filters, overdue_cursor),
         'upcoming_tasks': upcoming_tasks,
-        'completed_tasks': completed_tasks,
+        'upcoming_next_url': upcoming_cursor and section_url(
+            user, 'upcoming', filters, upcoming_cursor),
+        'upcoming_heading': get_upcoming_heading(filters['visibility']),
+        'completed_url': section_url(user, 'completed', filters),
         'filters': filters,
         'task_counts': task_counts,
+        # The event stream is only served by the ASGI app
+        'events_url': settings.TASK_ASYNC_VIEWS and reverse(
+            'task_events', args=[user.id]),
     }
 
     return render(request, "task_management/task-dashboard.html", context)
 
 
+def section_url(user, section, filters, after=None):
+    """
+    Build the URL of a dashboard section page starting after the
+    `after` cursor, or of its first page if no cursor is given.
+    """
+    params = {'after': after} if after else {}
+    if section == 'upcoming':
+        params.update(filters)
+
+    url = reverse('task_section', args=[user.id, section])
+    return '%s?%s' % (url, urlencode(params)) if params else url
+
+
+@login_required(login_url='/accounts/login/')
+@conditional_task_page
+def task_upcoming(request, user_id):
+    """
+    View returning the filtered upcoming tasks table of the dashboard,
+    as HTML or, with `format=json`, as JSON.
+
+    **Context:**
+    - Serves the dashboard filters, which swap the table in place
+    instead of reloading the whole page: neither the counters nor the
+    other sections are fetched or rendered again.
+    - Shares the dashboard's cached upcoming page for the same filters.
+
+    **Template:**
+    :template:`task_management/partials/upcoming-table.html`
+    """
+    # Ensure the logged-in user matches the user_id in the URL
+    if request.user.id != int(user_id):
+        messages.error(request, "You are not authorised to access this page.")
+        return redirect('/')
+
+    user = request.user
+    today = timezone.now().date()
+    filters = get_dashboard_filters(request)
+
+    tasks, cursor = get_cached_dashboard_data(
+        user.id, 'upcoming', today, filters,
+        lambda: get_section_page(user, 'upcoming', filters, today))
+    next_url = cursor and section_url(user, 'upcoming', filters, cursor)
+    heading = get_upcoming_heading(filters['visibility'])
+
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'heading': heading,
+            'tasks': [serialize_task_row(task) for task in tasks],
+            'next_url': next_url,
+        })
+
+    context = {
+        'user': user,
+        'upcoming_tasks': tasks,
+        'upcoming_next_url': next_url,
+        'upcoming_heading': heading,
+    }
+
+    return render(
+        request, 'task_management/partials/upcoming-table.html', context)
+
+
+def get_parent_task(request):
+    """
+    Return the task a new subtask is added below, from the `parent`
+    query or form parameter, or `None` for a top-level task. Only the
+    user's own tasks can have subtasks added.
+    """
+    parent_id = request.POST.get('parent') or request.GET.get('parent')
+    if not parent_id:
+        return None
+    if not parent_id.isdigit():
+        raise Http404("No Task matches the given query.")
+    return get_object_or_404(Task, pk=parent_id, user=request.user)
+
+
+@login_required(login_url='/accounts/login/')
+@conditional_task_page
+def task_section(request, user_id, section):
+    """
+    View returning one page of a dashboard section as table rows.
+
+    **Context:**
+    - Serves the "Load more" buttons and the lazily expanded completed
+    section of the dashboard.
+    - Paginates with a `(due_date, id)` cursor passed as `after`, so
+    every page costs the same no matter how many tasks the user has.
+
+    **Template:**
+    :template:`task_management/partials/task-rows.html`
+    """
+    # Ensure the logged-in user matches the user_id in the URL
+    if request.user.id != int(user_id):
+        messages.error(request, "You are not authorised to access this page.")
+        return redirect('/')
+
+    if section not in SECTIONS:
+        raise Http404("Unknown dashboard section.")
+
+    user = request.user
+    today = timezone.now().date()
+    filters = get_dashboard_filters(request)
+
+    after = request.GET.get('after')
+    params = dict(filters, after=after or '')
+
+    try:
+        tasks, cursor = get_cached_dashboard_data(
+            user.id, section, today, params,
+            lambda: get_section_page(
+                user, section, filters, today, after=after))
+    except ValueError:
+        return HttpResponseBadRequest("Invalid cursor.")
+
+    context = {
+        'user': user,
+        'tasks': tasks,
+        'section': section,
+        'next_url': cursor and section_url(user, section, filters, cursor),
+    }
+
+    return render(
+        request, 'task_management/partials/task-rows.html', context)
+
+
 @login_required(login_url='/accounts/login/')
 def task_add(request, user_id):
     """
     View to add a new task.
 
     **Context:**
-    - Displays the task creation form.
+    - Displays the task creation form and the recurrence form.
     - Ensures that the logged-in user matches the user_id.
-    - On successful submission, creates a new task.
+    - Adds a subtask of the user's task given by the `parent` parameter.
+    - On successful submission, creates a new task, and a series of
+    occurrences if it repeats.
 
     **Template:**
     :template:`task_management/add-task.html`
@@ -120,31 +263,44 @@ def task_add(request, user_id):
         return redirect('/')
 
     user = get_object_or_404(User, id=user_id)
+    parent = get_parent_task(request)
 
     if request.method == "POST":
         # Create a form instance and populate it with data from the request
-        task_form = TaskForm(data=request.POST)
-        if task_form.is_valid():
+        task_form = TaskForm(
+            data=request.POST,
+            instance=Task(user=request.user, parent=parent),
+        )
+        recurrence_form = RecurrenceForm(data=request.POST)
+        if task_form.is_valid() and recurrence_form.is_valid():
             # Save the task instance with the logged-in user
             task = task_form.save(commit=False)
             task.user = request.user
             task.save()
+            # Make it the first occurrence of a series if it repeats
+            rule = recurrence_form.get_rule()
+            if rule:
+                make_recurring(task, rule)
             messages.add_message(request, messages.SUCCESS,
                                  'You have created a new task.')
             return redirect('task_dashboard', user_id=user.id)
 
     task_form = TaskForm()
+    recurrence_form = RecurrenceForm()
 
     # Prepare context for the template
     context = {
         "user": user,
+        "parent": parent,
         "task_form": task_form,
+        "recurrence_form": recurrence_form,
     }
 
     return render(request, 'task_management/add-task.html', context)
 
 
 @login_required(login_url='/accounts/login/')
+@conditional_task_page
 def task_edit(request, user_id, task_id):
     """
     View to edit an existing task.
@@ -153,6 +309,8 @@ def task_edit(request, user_id, task_id):
     - Displays the task edit form pre-filled with the current task's details.
     - Ensures that the logged-in user matches the user_id.
     - Updates the task upon valid form submission.
+    - Lists the task's whole subtree of subtasks, read with one query.
+    - Answers `304 Not Modified` while the user's tasks are unchanged.
 
     **Template:**
     :template:`task_management/update-task.html`
@@ -185,6 +343,7 @@ def task_edit(request, user_id, task_id):
         "user": task.user,
         "task_form": task_form,
         "task": task,  # Optionally pass task for context
+        "subtasks": task.get_descendants(),
     }
 
     return render(request, 'task_management/update-task.html', context)
@@ -219,3 +378,257 @@ def task_delete(request, user_id, task_id):
             Please try again.')
 
     return redirect('task_dashboard', user_id=request.user.id)
+
+
+def get_user_task_or_error(request, user_id, task_id):
+    """
+    Return the logged-in user's task `task_id`, or a JSON error
+    response when the URL is not theirs or the task doesn't exist.
+    """
+    if request.user.id != int(user_id):
+        return None, error_response(
+            "You are not authorised to access this page.", status=403)
+
+    task = Task.objects.filter(pk=task_id, user=request.user).first()
+    if task is None:
+        return None, error_response("Task not found.", status=404)
+    return task, None
+
+
+@api_login_required
+@require_POST
+def task_transition(request, user_id, task_id):
+    """
+    View moving a task to another status from the dashboard, answering
+    with JSON.
+
+    **Context:**
+    - Ensures that the logged-in user matches the user_id.
+    - Checks the new `status` against the task's transition rules, and
+    only offers to reopen tasks that aren't past due (see
+    `Task.next_statuses`): the due date is changed with the edit form.
+    - Returns the re-rendered table row of the task and the user's
+    counters, which the dashboard swaps in place instead of reloading.
+
+    **Template:**
+    :template:`task_management/partials/task-rows.html`
+    """
+    task, error = get_user_task_or_error(request, user_id, task_id)
+    if error:
+        return error
+
+    status = request.POST.get('status')
+    if status not in dict(Task.STATUS_CHOICES):
+        return error_response({'status': ["Select a valid status."]})
+    try:
+        validate_status_transition(task.original_status, status)
+    except ValidationError as e:
+        return error_response({'status': e.messages})
+    # Saving would mark the task 'Overdue' again
+    today = timezone.now().date()
+    if status in PENDING_STATUSES and task.due_date < today:
+        return error_response({'status': [PAST_DUE_MESSAGE]})
+
+    task.status = status
+    task.save()
+
+    task.description_preview = task.description
+    row = render_to_string(
+        'task_management/partials/task-rows.html',
+        {
+            'user': request.user,
+            'tasks': [task],
+            'section': get_task_section(task, today),
+        },
+        request=request,
+    )
+
+    return JsonResponse({
+        'id': task.pk,
+        'status': task.status,
+        'row': row,
+        'counts': get_task_counts(request.user, today),
+    })
+
+
+@api_login_required
+@require_POST
+def task_delete_json(request, user_id, task_id):
+    """
+    View deleting a task from the dashboard, answering with JSON.
+
+    **Context:**
+    - Ensures that the logged-in user matches the user_id.
+    - Deletes the task along with its subtasks, and returns their ids
+    and the user's counters so the dashboard can drop their rows in
+    place instead of reloading.
+
+    **Template:**
+    - None, responds with JSON.
+    """
+    task, error = get_user_task_or_error(request, user_id, task_id)
+    if error:
+        return error
+
+    deleted = [task.pk] + list(
+        task.get_descendants().values_list('pk', flat=True))
+    task.delete()
+
+    return JsonResponse({
+        'deleted': deleted,
+        'counts': get_task_counts(request.user, timezone.now().date()),
+    })
+
+
+@login_required(login_url='/accounts/login/')
+def task_export(request, user_id):
+    """
+    View to download the user's tasks as CSV or JSON Lines.
+
+    **Context:**
+    - Ensures that the logged-in user matches the user_id.
+    - The format is chosen with `format` (`csv` or `jsonl`).
+    - Honours the dashboard's status, priority, category and visibility
+    filters; without filters the whole account is exported.
+    - Streams the file so memory use doesn't depend on the task count.
+    Under ASGI (TASK_ASYNC_VIEWS) it is streamed from an async iterator,
+    as the ASGI app would read a sync one whole before sending it.
+    """
+    # Ensure the logged-in user matches the user_id in the URL
+    if request.user.id != int(user_id):
+        messages.error(request, "You are not authorised to access this page.")
+        return redirect('/')
+
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return HttpResponseBadRequest("Unknown export format.")
+
+    today = timezone.now().date()
+    export = aiter_export if settings.TASK_ASYNC_VIEWS else iter_export
+    lines = export(
+        request.user, get_export_filters(request.GET), today, export_format)
+
+    response = StreamingHttpResponse(
+        lines, content_type=EXPORT_FORMATS[export_format])
+    response['Content-Disposition'] = (
+        'attachment; filename="tasks-%s.%s"' % (today, export_format))
+    return response
+
+
+@login_required(login_url='/accounts/login/')
+@require_POST
+def task_import(request, user_id):
+    """
+    View to bulk import tasks from an uploaded CSV or JSON Lines file.
+
+    **Context:**
+    - Ensures that the logged-in user matches the user_id.
+    - The file is posted as `file`; the format is taken from `format`
+    or the file extension.
+    - Clients asking for JSON get a summary with the per-record errors,
+    others are redirected to the dashboard with a message.
+    """
+    # Ensure the logged-in user matches the user_id in the URL
+    if request.user.id != int(user_id):
+        messages.error(request, "You are not authorised to access this page.")
+        return redirect('/')
+
+    wants_json = 'application/json' in request.headers.get('Accept', '')
+    upload = request.FILES.get('file')
+    import_format = request.POST.get('format') or (
+        upload and upload.name.rsplit('.', 1)[-1].lower())
+
+    if upload is None or import_format not in IMPORT_FORMATS:
+        error = "Please upload a .csv or .jsonl file."
+        if wants_json:
+            return JsonResponse({'errors': error}, status=400)
+        messages.add_message(request, messages.ERROR, error)
+        return redirect('task_dashboard', user_id=request.user.id)
+
+    # Reject badly encoded files as a whole, before anything is imported
+    try:
+        check_encoding(upload.file)
+    except UnicodeDecodeError:
+        error = "The file must be UTF-8 encoded."
+        if wants_json:
+            return JsonResponse({'errors': error}, status=400)
+        messages.add_message(request, messages.ERROR, error)
+        return redirect('task_dashboard', user_id=request.user.id)
+
+    stream = io.TextIOWrapper(
+        upload.file, encoding=IMPORT_ENCODING, newline='')
+    result = import_tasks(request.user, stream, import_format)
+
+    if wants_json:
+        return JsonResponse({
+            'created': result['created'],
+            'errors': [
+                {'line': line_number, 'errors': errors}
+                for line_number, errors in result['errors']
+            ],
+        })
+
+    messages.add_message(
+        request, messages.SUCCESS,
+        'Imported %d task(s).' % result['created'])
+    if result['errors']:
+        messages.add_message(
+            request, messages.ERROR,
+            '%d record(s) were rejected, starting with line %d: %s' % (
+                len(result['errors']),
+                result['errors'][0][0],
+                '; '.join(result['errors'][0][1]),
+            ))
+    return redirect('task_dashboard', user_id=request.user.id)
+
+
+@login_required(login_url='/accounts/login/')
+def task_search(request, user_id):
+    """
+    View to search the user's tasks by title and description.
+
+    **Context:**
+    - Ensures that the logged-in user matches the user_id.
+    - Results are ranked by relevance using the database's full-text
+    index and paginated with `page`, `SEARCH_PAGE_SIZE` at a time.
+
+    **Template:**
+    :template:`task_management/search-results.html`
+    """
+    # Ensure the logged-in user matches the user_id in the URL
+    if request.user.id != int(user_id):
+        messages.error(request, "You are not authorised to access this page.")
+        return redirect('/')
+
+    query = request.GET.get('q', '').strip()
+    try:
+        page = max(int(request.GET.get('page', 1)), 1)
+    except ValueError:
+        page = 1
+
+    tasks = []
+    has_next = False
+    if query:
+        offset = (page - 1) * SEARCH_PAGE_SIZE
+        results = search_tasks(
+            Task.objects.filter(user=request.user), query,
+        ).annotate(
+            description_preview=Substr(
+                'description', 1, DESCRIPTION_PREVIEW_LENGTH + 1),
+        ).defer('description')
+        # Fetch one extra row to find out whether there is a next page
+        tasks = list(results[offset:offset + SEARCH_PAGE_SIZE + 1])
+        has_next = len(tasks) > SEARCH_PAGE_SIZE
+        tasks = tasks[:SEARCH_PAGE_SIZE]
+
+    context = {
+        'user': request.user,
+        'query': query,
+        'tasks': tasks,
+        'previous_page_url': page > 1 and '?' + urlencode(
+            {'q': query, 'page': page - 1}),
+        'next_page_url': has_next and '?' + urlencode(
+            {'q': query, 'page': page + 1}),
+    }
+
+    return render(request, 'task_management/search-results.html', context)
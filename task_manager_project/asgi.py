@@ -13,4 +13,14 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'task_manager_project.settings')
 
+# Under ASGI, sync code runs in a thread pool and persistent connections
+# are not reliably closed, so don't keep them open by default. Pool them
+# with PgBouncer instead (see DB_POOLER in settings.py).
+os.environ.setdefault('DB_CONN_MAX_AGE', '0')
+
+# The ASGI app serves the task event streams (see TASK_EVENTS_BROKER in
+# settings.py) on top of the sync views. It replaces the WSGI app as the
+# `web` process, see "Serving over ASGI" in the README.
+os.environ.setdefault('TASK_ASYNC_VIEWS', 'True')
+
 application = get_asgi_application()
@@ -67,6 +67,7 @@ CRISPY_ALLOWED_TEMPLATE_PACKS = "bootstrap5"
 CRISPY_TEMPLATE_PACK = "bootstrap5"
 
 MIDDLEWARE = [
+    'task_management.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -82,7 +83,8 @@ ROOT_URLCONF = 'task_manager_project.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # The Django backend, timing renders for the request metrics
+        'BACKEND': 'task_management.middleware.TimedDjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -98,6 +100,43 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'task_manager_project.wsgi.application'
 
+# Per-request metrics (task_management/middleware.py): query count, SQL,
+# template and view time, logged as JSON lines to the
+# `task_management.metrics` logger and sent in a Server-Timing header.
+# Requests running one statement at least
+# REQUEST_METRICS_N_PLUS_ONE_THRESHOLD times are logged as warnings.
+REQUEST_METRICS_ENABLED = (
+    os.environ.get('REQUEST_METRICS_ENABLED', 'False') == 'True')
+REQUEST_METRICS_SERVER_TIMING = (
+    os.environ.get('REQUEST_METRICS_SERVER_TIMING', 'True') == 'True')
+REQUEST_METRICS_N_PLUS_ONE_THRESHOLD = int(
+    os.environ.get('REQUEST_METRICS_N_PLUS_ONE_THRESHOLD', 10))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'task_management.metrics': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
+# Keeps the expected log records of the tests off the console
+TEST_RUNNER = 'task_manager_project.test_runner.TestRunner'
+
+# Serve the task event streams (task_management/async_views.py) and
+# stream exports from async iterators. Enabled by asgi.py, see "Serving
+# over ASGI" in the README.
+TASK_ASYNC_VIEWS = os.environ.get('TASK_ASYNC_VIEWS', 'False') == 'True'
+
 
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
@@ -109,10 +148,107 @@ WSGI_APPLICATION = 'task_manager_project.wsgi.application'
 #     }
 # }
 
+# Connections are kept open for DB_CONN_MAX_AGE seconds and reused across
+# requests (0 closes them after each request), and checked before reuse
+# so a connection dropped by the server doesn't fail the next request.
 DATABASES = {
-    'default': dj_database_url.parse(os.environ.get("DATABASE_URL"))
+    'default': dj_database_url.parse(
+        os.environ.get("DATABASE_URL"),
+        conn_max_age=int(os.environ.get('DB_CONN_MAX_AGE', 600)),
+    )
+}
+DATABASES['default']['CONN_HEALTH_CHECKS'] = (
+    os.environ.get('DB_CONN_HEALTH_CHECKS', 'True') == 'True')
+
+# Set DB_POOLER=pgbouncer when DATABASE_URL points to PgBouncer (or
+# another transaction-mode pooler): the pooler owns the connections, and
+# server-side cursors don't survive across its transactions. Without
+# them, `.iterator()` loads whole result sets into memory, so large
+# reads such as the task export paginate by primary key instead.
+if os.environ.get('DB_POOLER') == 'pgbouncer':
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+# The cache must be shared by every process serving requests: a change
+# handled by one process invalidates the dashboards of the others
+# through it. The per-process memory cache is therefore only the default
+# for a single worker (WEB_CONCURRENCY, also read by gunicorn). With
+# more, set CACHE_BACKEND to Redis or Memcached; otherwise nothing is
+# cached, as the dashboards aren't cached in the database cache (it
+# takes more queries than it saves, see task_management/cache.py).
+WEB_CONCURRENCY = int(os.environ.get('WEB_CONCURRENCY', 1))
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+            if WEB_CONCURRENCY == 1
+            else 'django.core.cache.backends.dummy.DummyCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'focusflow'),
+    }
 }
 
+# Seconds a user's dashboard counters and task lists stay cached.
+# Entries are also invalidated whenever one of the user's tasks changes.
+TASK_DASHBOARD_CACHE_TIMEOUT = int(
+    os.environ.get('TASK_DASHBOARD_CACHE_TIMEOUT', 300))
+
+# Real-time task events, streamed to the dashboards by the async views
+# only. The broker class fans them out to the open streams, and must
+# reach those of every process. On PostgreSQL it notifies them through
+# the database, from any worker or management command; elsewhere the
+# default broker only reaches its own process, so serve every request
+# from a single ASGI worker with it (checked against WEB_CONCURRENCY).
+# Streams are closed after TASK_EVENTS_STREAM_TIMEOUT seconds, and the
+# browser reconnects.
+TASK_EVENTS_BROKER = os.environ.get(
+    'TASK_EVENTS_BROKER',
+    'task_management.events.PostgresBroker'
+    if 'postgresql' in DATABASES['default']['ENGINE']
+    else 'task_management.events.InProcessBroker')
+# Direct database URL for the PostgreSQL broker's listener, needed when
+# DATABASE_URL points to a transaction-mode pooler (DB_POOLER)
+TASK_EVENTS_DATABASE_URL = os.environ.get('TASK_EVENTS_DATABASE_URL', '')
+TASK_EVENTS_STREAM_TIMEOUT = int(
+    os.environ.get('TASK_EVENTS_STREAM_TIMEOUT', 300))
+
+
+# Recurring tasks: occurrences are generated this many days ahead (the
+# longest dashboard visibility window) by `generate_occurrences`, and at
+# least the next occurrence of every series.
+TASK_RECURRENCE_HORIZON_DAYS = int(
+    os.environ.get('TASK_RECURRENCE_HORIZON_DAYS', 28))
+
+# Sessions
+# https://docs.djangoproject.com/en/4.2/topics/http/sessions/
+
+# SESSION_BACKEND picks where sessions are stored:
+# - db: a session SELECT (and often an UPDATE) on every request
+# - cache: the cache only, sessions are lost when it is cleared or
+#   evicted, so use it with a shared, persistent cache (e.g. Redis)
+# - cached_db: write-through cache, reads only hit the database on a miss
+# - signed_cookies: no server-side storage, the session is signed (not
+#   encrypted) and sent with every request
+# Compare them with `python manage.py benchmark_sessions`.
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cache': 'django.contrib.sessions.backends.cache',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+SESSION_ENGINE = SESSION_ENGINES[os.environ.get('SESSION_BACKEND', 'db')]
+
+
+# Task API
+# Maximum number of tasks accepted by one bulk API request, and number
+# of rows per INSERT/UPDATE statement for bulk writes.
+TASK_API_MAX_BULK_SIZE = int(os.environ.get('TASK_API_MAX_BULK_SIZE', 5000))
+TASK_BULK_BATCH_SIZE = int(os.environ.get('TASK_BULK_BATCH_SIZE', 500))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -158,6 +294,17 @@ STATIC_URL = 'static/'
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static'), ]
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
+# `collectstatic` fingerprints and precompresses the static files, which
+# WhiteNoise then serves with immutable far-future caching headers
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'task_manager_project.storage.StaticFilesStorage',
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
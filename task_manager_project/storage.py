@@ -0,0 +1,34 @@
+import logging
+
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+logger = logging.getLogger(__name__)
+
+
+class StaticFilesStorage(CompressedManifestStaticFilesStorage):
+    """
+    Static files collected under content-hashed names, with gzip and
+    Brotli variants, which WhiteNoise serves with far-future
+    `Cache-Control: immutable` headers.
+
+    Once a manifest has been collected, a file missing from it raises
+    `ValueError` as usual, so broken references fail loudly. Without
+    any manifest, e.g. in tests run without `collectstatic`, files are
+    linked under their plain names, with a warning.
+    `manage.py check_static_assets` reports such references before a
+    deploy.
+    """
+    warned_unhashed = False
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            if self.hashed_files:
+                raise
+            if not self.warned_unhashed:
+                logger.warning(
+                    "No static files manifest, linking unhashed names "
+                    "(run collectstatic).")
+                self.warned_unhashed = True
+            return name
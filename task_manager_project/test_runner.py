@@ -0,0 +1,32 @@
+import logging
+
+from django.test.runner import DiscoverRunner
+
+# Loggers whose records are expected while testing: the request metrics
+# of the tests enabling them, and the unhashed static file names, as
+# tests run without `collectstatic`. Tests asserting on them use
+# `assertLogs`, which still captures them.
+QUIET_LOGGERS = [
+    'task_management.metrics',
+    'task_manager_project.storage',
+]
+
+
+class TestRunner(DiscoverRunner):
+    """
+    Test runner keeping the expected log records of QUIET_LOGGERS off
+    the console, so only the test results are printed.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.logger_levels = {}
+        for name in QUIET_LOGGERS:
+            logger = logging.getLogger(name)
+            self.logger_levels[name] = logger.level
+            logger.setLevel(logging.CRITICAL)
+
+    def teardown_test_environment(self, **kwargs):
+        for name, level in self.logger_levels.items():
+            logging.getLogger(name).setLevel(level)
+        super().teardown_test_environment(**kwargs)